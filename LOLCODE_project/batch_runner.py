@@ -0,0 +1,225 @@
+'''
+CMSC 124: LOLCODE Batch Runner
+Executes one compiled program against many GIMMEH input sets
+'''
+
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from compiler import CompiledProgram, compile_source
+from syntax_analyzer import SyntaxAnalyzer
+from input_streams import ListInput
+from output_sinks import BufferSink
+from result_cache import CachedResult, program_key, is_cacheable
+from cancellation import CancellationToken
+from metrics import RunMetrics
+
+
+# result of one program run against one input vector
+class CaseResult:
+    def __init__(self, index, inputs, output, variables, errors, elapsed, cancelled=False, metrics=None,
+                 failed=False):
+        self.index = index
+        self.inputs = inputs
+        self.output = output
+        self.variables = variables
+        self.errors = errors
+        self.elapsed = elapsed
+        self.cancelled = cancelled
+        # RunMetrics of the run, None when the result came from the cache
+        self.metrics = metrics
+        # the interpreter raised instead of finishing, errors holds the exception
+        self.failed = failed
+
+    def to_dict(self):
+        return {
+            "index": self.index,
+            "inputs": self.inputs,
+            "output": self.output,
+            "variables": self.variables,
+            "errors": self.errors,
+            "elapsed": self.elapsed,
+            "cancelled": self.cancelled,
+            "failed": self.failed,
+            "metrics": self.metrics.to_dict() if self.metrics is not None else None,
+        }
+
+
+# results of a whole batch plus throughput
+class BatchResult:
+    def __init__(self, cases, elapsed, workers):
+        self.cases = cases
+        self.elapsed = elapsed
+        self.workers = workers
+
+    @property
+    def throughput(self):
+        # cases executed per second of wall time
+        return len(self.cases) / self.elapsed if self.elapsed > 0 else 0.0
+
+    def metrics(self):
+        # counters summed over the cases that were executed
+        return RunMetrics.combine(case.metrics for case in self.cases if case.metrics is not None)
+
+    def to_dict(self):
+        return {
+            "cases": [case.to_dict() for case in self.cases],
+            "total_cases": len(self.cases),
+            "elapsed": self.elapsed,
+            "workers": self.workers,
+            "throughput": self.throughput,
+            "cancelled": sum(1 for case in self.cases if case.cancelled),
+            "failed": sum(1 for case in self.cases if case.failed),
+            "metrics": self.metrics().to_dict(),
+        }
+
+
+def run_case(program, inputs, index=0, cancel_token=None, timeout=None):
+    # run the program once with a fresh symbol table and captured output
+    diagnostics = []
+    output_sink = BufferSink()
+
+    # each case gets its own token so a timeout only stops this case
+    case_token = CancellationToken()
+    if cancel_token is not None:
+        cancel_token.add_callback(case_token.cancel)
+    timer = case_token.cancel_after(timeout) if timeout else None
+
+    start = time.perf_counter()
+    analyzer = None
+    try:
+        analyzer = SyntaxAnalyzer(program, log_function=diagnostics.append,
+                                  input_provider=ListInput(inputs or []), output_sink=output_sink,
+                                  cancel_token=case_token)
+        variables = analyzer.parse_program()
+    except Exception as e:
+        # one crashing case becomes a failed result instead of ending the batch
+        elapsed = time.perf_counter() - start
+        errors = list(analyzer.error_messages) if analyzer is not None else []
+        errors.append(f"Internal error: {type(e).__name__}: {e}")
+        return CaseResult(index, list(inputs or []), output_sink.getvalue(), {}, errors, elapsed,
+                          case_token.cancelled, failed=True)
+    finally:
+        if timer is not None:
+            timer.cancel()
+        if cancel_token is not None:
+            cancel_token.remove_callback(case_token.cancel)
+
+    elapsed = time.perf_counter() - start
+    output = output_sink.getvalue()
+    metrics = RunMetrics.collect(analyzer, program if isinstance(program, CompiledProgram) else None,
+                                 execute_seconds=elapsed)
+    return CaseResult(index, list(inputs or []), output, variables,
+                      list(analyzer.error_messages), elapsed, analyzer.cancelled, metrics)
+
+
+def run_cached(program, inputs=None, cache=None, index=0, cancel_token=None, timeout=None):
+    # run a program through the result cache, returns (CaseResult, was_cached)
+    if not isinstance(program, CompiledProgram):
+        program = compile_source(program)
+
+    if cache is None or not is_cacheable(program, inputs):
+        if cache is not None:
+            cache.bypasses += 1
+        return run_case(program, inputs, index, cancel_token, timeout), False
+
+    key = program_key(program, inputs)
+    entry = cache.get(key)
+    if entry is not None:
+        return CaseResult(index, list(inputs or []), entry.output, entry.variables, entry.errors, 0.0), True
+
+    result = run_case(program, inputs, index, cancel_token, timeout)
+    # a cancelled or failed run is partial, so it is never stored
+    if not (result.cancelled or result.failed):
+        cache.put(key, CachedResult(result.output, result.variables, result.errors))
+    return result, False
+
+
+# the compiled program each worker process executes, and its cancel state
+_worker_program = None
+_worker_token = None
+_worker_timeout = None
+
+
+def _init_worker(program, cancel_event, timeout):
+    # ship the program to a worker once instead of once per case
+    global _worker_program, _worker_token, _worker_timeout
+    _worker_program = program
+    _worker_timeout = timeout
+    _worker_token = CancellationToken()
+
+    # a watcher thread turns the shared event into a cheap local flag
+    def watch():
+        cancel_event.wait()
+        _worker_token.cancel()
+
+    threading.Thread(target=watch, daemon=True).start()
+
+
+def _run_worker_case(index, inputs):
+    return run_case(_worker_program, inputs, index, _worker_token, _worker_timeout)
+
+
+def run_batch(program, input_sets, workers=None, executor="process", cache=None,
+              cancel_token=None, timeout=None):
+    # run a program (source or compiled) against every input vector
+    if not isinstance(program, CompiledProgram):
+        program = compile_source(program)
+
+    input_sets = [list(inputs) for inputs in input_sets]
+    if workers is None:
+        workers = min(len(input_sets), os.cpu_count() or 1) or 1
+
+    start = time.perf_counter()
+
+    # serve what we can from the cache, only the misses get executed
+    cases = [None] * len(input_sets)
+    pending = []
+    for index, inputs in enumerate(input_sets):
+        key = None
+        if cache is not None:
+            if is_cacheable(program, inputs):
+                key = program_key(program, inputs)
+                entry = cache.get(key)
+                if entry is not None:
+                    cases[index] = CaseResult(index, inputs, entry.output, entry.variables, entry.errors, 0.0)
+                    continue
+            else:
+                cache.bypasses += 1
+        pending.append((index, inputs, key))
+
+    if workers <= 1 or len(pending) <= 1:
+        results = [run_case(program, inputs, index, cancel_token, timeout) for index, inputs, _ in pending]
+    elif executor == "thread":
+        # threads share the compiled program directly
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(run_case, program, inputs, index, cancel_token, timeout)
+                       for index, inputs, _ in pending]
+            results = [future.result() for future in futures]
+    else:
+        # cancelling the batch token sets an event every worker is watching
+        cancel_event = multiprocessing.Event()
+        if cancel_token is not None:
+            cancel_token.add_callback(cancel_event.set)
+        try:
+            with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                     initargs=(program, cancel_event, timeout)) as pool:
+                # bigger chunks mean fewer round trips for short cases
+                chunksize = max(1, len(pending) // (workers * 4))
+                indexes = [index for index, _, _ in pending]
+                vectors = [inputs for _, inputs, _ in pending]
+                results = list(pool.map(_run_worker_case, indexes, vectors, chunksize=chunksize))
+        finally:
+            if cancel_token is not None:
+                cancel_token.remove_callback(cancel_event.set)
+
+    for (index, _, key), result in zip(pending, results):
+        cases[index] = result
+        if key is not None and not (result.cancelled or result.failed):
+            cache.put(key, CachedResult(result.output, result.variables, result.errors))
+
+    elapsed = time.perf_counter() - start
+    return BatchResult(cases, elapsed, workers)
@@ -0,0 +1,5 @@
+'''
+CMSC 124: LOLCODE Benchmarks
+Run from the LOLCODE_project directory, e.g. python -m benchmarks.bench_lolc
+or python -m benchmarks.suite run -o baseline.json
+'''
@@ -0,0 +1,46 @@
+'''
+CMSC 124: LOLCODE Function Call Benchmarks
+Deep recursion and many shallow calls, each call running in its own frame
+'''
+
+from compiler import compile_source
+
+from benchmarks.scaling import run_program
+from benchmarks.harness import Benchmark
+
+RECURSION_DEPTH = 10000
+SHALLOW_CALLS = 5000
+
+RECURSION = """HAI
+HOW IZ I depth YR k
+  BOTH SAEM k AN 0
+  O RLY?
+    YA RLY
+      FOUND YR 0
+  OIC
+  FOUND YR SUM OF 1 AN I IZ depth YR DIFF OF k AN 1 MKAY
+IF U SAY SO
+I IZ depth YR {depth} MKAY
+KTHXBYE
+"""
+
+SHALLOW = """HAI
+I HAS A total ITZ 0
+HOW IZ I twice YR x
+  I HAS A doubled ITZ PRODUKT OF x AN 2
+  FOUND YR doubled
+IF U SAY SO
+IM IN YR calls UPPIN YR i TIL BOTH SAEM i AN {calls}
+  total R SUM OF total AN I IZ twice YR i MKAY
+IM OUTTA YR calls
+KTHXBYE
+"""
+
+
+def benchmarks():
+    recursion = compile_source(RECURSION.format(depth=RECURSION_DEPTH))
+    shallow = compile_source(SHALLOW.format(calls=SHALLOW_CALLS))
+    return [
+        Benchmark("calls.recursion", lambda: run_program(recursion), RECURSION_DEPTH, "calls"),
+        Benchmark("calls.shallow", lambda: run_program(shallow), SHALLOW_CALLS, "calls"),
+    ]
@@ -0,0 +1,45 @@
+'''
+CMSC 124: LOLCODE End-to-End Benchmarks
+Runs each numbered test program, its body replicated to make it long enough to time
+'''
+
+import glob
+import os
+
+from compiler import compile_source
+from syntax_analyzer import SyntaxAnalyzer
+from input_streams import ListInput
+from output_sinks import BufferSink
+
+from benchmarks.bench_lolc import TESTCASE_DIR
+from benchmarks.harness import Benchmark
+
+# value given to every GIMMEH, numeric so the arithmetic paths run
+INPUT_VALUE = "3"
+
+
+def replicate(source, copies):
+    body = [line for line in source.split('\n') if line.strip() not in ('HAI', 'KTHXBYE')]
+    return "HAI\n" + "\n".join(body * copies) + "\nKTHXBYE\n"
+
+
+def run_program(program, inputs):
+    analyzer = SyntaxAnalyzer(program, log_function=lambda message: None,
+                              input_provider=ListInput(inputs), output_sink=BufferSink())
+    analyzer.parse_program()
+    return analyzer
+
+
+def benchmarks(copies=5):
+    result = []
+    for path in sorted(glob.glob(os.path.join(TESTCASE_DIR, "[0-9]*.lol"))):
+        with open(path, "r", encoding="utf-8") as f:
+            source = replicate(f.read(), copies)
+        # lexing is measured by the lexer benchmarks, only execution is timed here
+        program = compile_source(source)
+        inputs = [INPUT_VALUE] * sum(1 for token in program.tokens if token.type == 'Input Keyword')
+        statements = sum(run_program(program, inputs).line_hits.values())
+        name = os.path.splitext(os.path.basename(path))[0]
+        result.append(Benchmark(f"e2e.{name}", lambda program=program, inputs=inputs: run_program(program, inputs),
+                                statements, "stmts"))
+    return result
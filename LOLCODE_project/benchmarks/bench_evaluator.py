@@ -0,0 +1,48 @@
+'''
+CMSC 124: LOLCODE Evaluator Benchmarks
+Every arithmetic, boolean, comparison and SMOOSH operation through SemanticsEvaluator
+'''
+
+from semantics_analyzer import SemanticsEvaluator
+
+from benchmarks.harness import Benchmark
+
+# operations per call, so the loop and call overhead of the harness stays small
+BATCH = 1000
+
+ARITHMETIC = ('SUM OF', 'DIFF OF', 'PRODUKT OF', 'QUOSHUNT OF', 'MOD OF', 'BIGGR OF', 'SMALLR OF')
+BOOLEAN = ('BOTH OF', 'EITHER OF', 'WON OF')
+COMPARISON = ('BOTH SAEM', 'DIFFRINT')
+
+
+def batched(function, *arguments):
+    steps = range(BATCH)
+
+    def run():
+        for _ in steps:
+            function(*arguments)
+    return run
+
+
+def benchmarks():
+    semantics = SemanticsEvaluator({})
+    result = []
+    for operation in ARITHMETIC:
+        name = operation.split()[0].lower()
+        result.append(Benchmark(f"evaluator.{name}", batched(semantics.evaluate_arithmetic, operation, 17, 5),
+                                BATCH, "ops"))
+    # YARN operands go through _to_numeric's string parsing
+    result.append(Benchmark("evaluator.sum.yarn", batched(semantics.evaluate_arithmetic, 'SUM OF', "17", "2.5"),
+                            BATCH, "ops"))
+    for operation in BOOLEAN:
+        name = operation.split()[0].lower()
+        result.append(Benchmark(f"evaluator.{name}", batched(semantics.evaluate_boolean, operation, 'WIN', 'FAIL'),
+                                BATCH, "ops"))
+    result.append(Benchmark("evaluator.not", batched(semantics.evaluate_unary_not, 'WIN'), BATCH, "ops"))
+    for operation in COMPARISON:
+        name = operation.split()[-1].lower()
+        result.append(Benchmark(f"evaluator.{name}", batched(semantics.evaluate_comparison, operation, 17, 5),
+                                BATCH, "ops"))
+    result.append(Benchmark("evaluator.smoosh",
+                            batched(semantics.evaluate_concatenation, ["hello", 42, 'WIN', 3.5]), BATCH, "ops"))
+    return result
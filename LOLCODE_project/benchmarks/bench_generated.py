@@ -0,0 +1,34 @@
+'''
+CMSC 124: LOLCODE Generated Program Benchmarks
+Lexes and runs a generated program of every shape, with a fixed seed so
+baselines stay comparable
+'''
+
+from lexer_analyzer import tokenize
+from compiler import CompiledProgram
+
+from benchmarks.generator import generate, SHAPES
+from benchmarks.scaling import run_program
+from benchmarks.harness import Benchmark
+
+SEED = 124
+
+# shapes also timed without type inference, to see what the specialized operations gain
+GENERIC_SHAPES = ("expressions", "loops")
+
+
+def benchmarks(size=300):
+    result = []
+    for shape in SHAPES:
+        source = generate(shape, size, SEED)
+        program = CompiledProgram(tokenize(source))
+        statements = sum(run_program(program).line_hits.values())
+        result.append(Benchmark(f"generated.lex.{shape}", lambda source=source: tokenize(source),
+                                len(program.tokens), "tokens"))
+        result.append(Benchmark(f"generated.run.{shape}", lambda program=program: run_program(program),
+                                statements, "stmts"))
+        if shape in GENERIC_SHAPES:
+            result.append(Benchmark(f"generated.run.{shape}.generic",
+                                    lambda program=program: run_program(program, specialize=False),
+                                    statements, "stmts"))
+    return result
@@ -0,0 +1,28 @@
+'''
+CMSC 124: LOLCODE Lexer Benchmarks
+Tokens per second for whole-program and per-line lexing
+'''
+
+from lexer_analyzer import tokenize, lex_line
+from compiler import CompiledProgram
+
+from benchmarks.bench_lolc import build_large_program
+from benchmarks.harness import Benchmark
+
+
+def benchmarks(copies=5):
+    source = build_large_program(copies)
+    token_count = len(tokenize(source))
+    lines = source.split('\n')
+
+    def lex_lines():
+        # the incremental lexer's path, one line at a time with the comment state threaded through
+        in_comment = False
+        for line in lines:
+            _, in_comment = lex_line(line, in_comment)
+
+    return [
+        Benchmark("lexer.tokenize", lambda: tokenize(source), token_count, "tokens"),
+        Benchmark("lexer.lex_line", lex_lines, token_count, "tokens"),
+        Benchmark("lexer.compile", lambda: CompiledProgram(tokenize(source)), token_count, "tokens"),
+    ]
@@ -0,0 +1,63 @@
+'''
+CMSC 124: LOLCODE Compiled Cache Benchmark
+Compares tokenize + organize against loading a cached .lolc file
+'''
+
+import argparse
+import glob
+import os
+import tempfile
+import time
+
+from lexer_analyzer import tokenize
+from compiler import CompiledProgram, hash_source, save_compiled, load_compiled
+
+TESTCASE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "project-testcases")
+
+
+def build_large_program(copies):
+    # replicate the bodies of the numbered test programs inside one HAI/KTHXBYE
+    body = []
+    for path in sorted(glob.glob(os.path.join(TESTCASE_DIR, "[0-9]*.lol"))):
+        with open(path, "r", encoding="utf-8") as f:
+            body.extend(line for line in f.read().split('\n') if line.strip() not in ('HAI', 'KTHXBYE'))
+    return "HAI\n" + "\n".join(body * copies) + "\nKTHXBYE\n"
+
+
+def best_of(repeats, function):
+    # best wall time over several repeats
+    best = None
+    for _ in range(repeats):
+        start = time.perf_counter()
+        function()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark .lolc loading against lexing.")
+    parser.add_argument("--copies", type=int, default=100, help="times the test programs are replicated")
+    parser.add_argument("--repeats", type=int, default=5, help="repeats per measurement (best is kept)")
+    args = parser.parse_args(argv)
+
+    source = build_large_program(args.copies)
+    source_hash = hash_source(source)
+    program = CompiledProgram(tokenize(source), source_hash)
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        path = os.path.join(temp_dir, "bench.lolc")
+        save_compiled(program, path)
+
+        compile_time = best_of(args.repeats, lambda: CompiledProgram(tokenize(source), hash_source(source)))
+        load_time = best_of(args.repeats, lambda: load_compiled(path, expected_hash=hash_source(source)))
+        size = os.path.getsize(path)
+
+    print(f"program: {len(source.splitlines())} lines, {len(program.tokens)} tokens, .lolc {size / 1024:.1f} KiB")
+    print(f"tokenize + organize: {compile_time * 1000:10.2f} ms")
+    print(f"load .lolc:          {load_time * 1000:10.2f} ms")
+    print(f"speedup:             {compile_time / load_time:10.1f}x")
+
+
+if __name__ == "__main__":
+    main()
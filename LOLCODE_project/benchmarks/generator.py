@@ -0,0 +1,255 @@
+'''
+CMSC 124: LOLCODE Program Generator
+Seeded generator of valid LOLCODE programs of a requested size and shape,
+for scaling reports and stress tests
+
+    python -m benchmarks.generator --shape switch --size 5000 --seed 7 -o big.lol
+'''
+
+import argparse
+import random
+import sys
+
+SHAPES = ("mixed", "expressions", "wazzup", "variables", "switch", "smoosh", "calls", "loops")
+
+ARITHMETIC = ('SUM OF', 'DIFF OF', 'PRODUKT OF', 'BIGGR OF', 'SMALLR OF')
+# divisors are always non-zero literals
+DIVISION = ('QUOSHUNT OF', 'MOD OF')
+BOOLEAN = ('BOTH OF', 'EITHER OF', 'WON OF')
+COMPARISON = ('BOTH SAEM', 'DIFFRINT')
+
+# nesting and call depth the interpreter handles inside Python's default
+# recursion limit (each level costs several Python frames)
+MAX_EXPRESSION_DEPTH = 60
+MAX_CALL_DEPTH = 40
+
+# per-construct knobs; they do not grow with the size, so the work per line
+# stays the same and only the program length scales
+DEFAULT_OPTIONS = {
+    "depth": 12,              # expression nesting
+    "call_depth": 20,         # functions in each call chain
+    "loop_iterations": 100,   # iterations of each loop
+    "chain": 20,              # operands of each SMOOSH
+    "cases": None,            # OMG cases of the switch, None for one per 3 lines
+}
+
+INDENT = "    "
+
+
+# builds a program from sections; `size` is the approximate number of lines
+class ProgramGenerator:
+    def __init__(self, seed=0, **options):
+        unknown = set(options) - set(DEFAULT_OPTIONS)
+        if unknown:
+            raise ValueError(f"Unknown generator options: {', '.join(sorted(unknown))}")
+        self.seed = seed
+        self.random = random.Random(seed)
+        self.options = dict(DEFAULT_OPTIONS, **options)
+        self.options["depth"] = max(1, min(MAX_EXPRESSION_DEPTH, self.options["depth"]))
+        self.options["call_depth"] = max(1, min(MAX_CALL_DEPTH, self.options["call_depth"]))
+        self.labels = 0
+
+    def generate(self, shape="mixed", size=1000):
+        if shape not in SHAPES:
+            raise ValueError(f"Unknown shape '{shape}', expected one of {', '.join(SHAPES)}")
+        size = max(size, 10)
+        if shape == "mixed":
+            # a share of the lines for every other shape
+            parts = SHAPES[1:]
+            body = []
+            for part in parts:
+                body.extend(getattr(self, f"_{part}")(size // len(parts), prefix=part[0]))
+        else:
+            body = getattr(self, f"_{shape}")(size)
+        return "HAI\n" + "\n".join(INDENT + line for line in body) + "\nKTHXBYE\n"
+
+    def _unique(self, stem):
+        self.labels += 1
+        return f"{stem}{self.labels}"
+
+    # expressions
+
+    def number(self):
+        return str(self.random.randint(1, 99))
+
+    def arithmetic(self, depth, operands=None):
+        # nested prefix arithmetic, `operands` are NUMBR variables that may appear as leaves
+        if depth <= 0:
+            if operands and self.random.random() < 0.5:
+                return self.random.choice(operands)
+            return self.number()
+        if self.random.random() < 0.2:
+            return f"{self.random.choice(DIVISION)} {self.arithmetic(depth - 1, operands)} AN {self.number()}"
+        # one side carries the nesting, the other stays shallow, so the length
+        # of the expression grows linearly with its depth
+        left_depth, right_depth = depth - 1, self.random.randint(0, min(2, depth - 1))
+        if self.random.random() < 0.5:
+            left_depth, right_depth = right_depth, left_depth
+        return (f"{self.random.choice(ARITHMETIC)} {self.arithmetic(left_depth, operands)} "
+                f"AN {self.arithmetic(right_depth, operands)}")
+
+    def boolean(self, depth):
+        if depth <= 0:
+            if self.random.random() < 0.5:
+                return self.random.choice(('WIN', 'FAIL'))
+            return f"{self.random.choice(COMPARISON)} {self.number()} AN {self.number()}"
+        if self.random.random() < 0.2:
+            return f"NOT {self.boolean(depth - 1)}"
+        shallow = self.boolean(self.random.randint(0, min(2, depth - 1)))
+        return f"{self.random.choice(BOOLEAN)} {self.boolean(depth - 1)} AN {shallow}"
+
+    # sections, each returns a list of unindented lines
+
+    def _expressions(self, size, prefix=""):
+        # deeply nested arithmetic and boolean expressions
+        depth = self.options["depth"]
+        lines = []
+        while len(lines) < size:
+            level = self.random.randint(max(1, depth // 2), depth)
+            if self.random.random() < 0.7:
+                lines.append(f"VISIBLE {self.arithmetic(level)}")
+            else:
+                lines.append(f"VISIBLE {self.boolean(level)}")
+        return lines
+
+    def _wazzup(self, size, prefix=""):
+        # one long declaration block
+        names = [f"{prefix}w{i}" for i in range(max(1, size - 3))]
+        # only NUMBR variables are used as operands (a YARN operand is looked up
+        # as a variable name, so its text must not look like one either)
+        numbers = []
+        lines = ["WAZZUP"]
+        for name in names:
+            kind = self.random.random()
+            if numbers and kind < 0.3:
+                lines.append(f"{INDENT}I HAS A {name} ITZ SUM OF {self.random.choice(numbers)} AN {self.number()}")
+                numbers.append(name)
+            elif kind < 0.6:
+                lines.append(f"{INDENT}I HAS A {name} ITZ {self.number()}")
+                numbers.append(name)
+            elif kind < 0.8:
+                lines.append(f'{INDENT}I HAS A {name} ITZ "value {self.number()}"')
+            else:
+                lines.append(f"{INDENT}I HAS A {name}")
+        lines.append("BUHBYE")
+        lines.append(f"VISIBLE {names[-1]}")
+        return lines
+
+    def _variables(self, size, prefix=""):
+        # thousands of variables, each reassigned from others
+        count = max(2, size // 2)
+        names = [f"{prefix}v{i}" for i in range(count)]
+        lines = [f"I HAS A {name} ITZ {self.number()}" for name in names]
+        while len(lines) < size - 1:
+            target = self.random.choice(names)
+            operands = self.random.sample(names, 2)
+            lines.append(f"{target} R {self.arithmetic(2, operands)}")
+        lines.append(f"VISIBLE {names[-1]}")
+        return lines
+
+    def _switch(self, size, prefix=""):
+        # huge WTF? blocks, a case every three lines
+        lines = []
+        while len(lines) < size - 8:
+            name = self._unique(f"{prefix}choice")
+            room = max(1, (size - len(lines) - 7) // 3)
+            cases = min(self.options["cases"] or room, room)
+            lines.extend([f"I HAS A {name} ITZ {self.random.randrange(cases)}", name, "WTF?"])
+            for case in range(cases):
+                lines.append(f"{INDENT}OMG {case}")
+                lines.append(f'{INDENT * 2}VISIBLE "case {case}"')
+                lines.append(f"{INDENT * 2}GTFO")
+            lines.append(f"{INDENT}OMGWTF")
+            lines.append(f'{INDENT * 2}VISIBLE "default"')
+            lines.append("OIC")
+        return lines
+
+    def _smoosh(self, size, prefix=""):
+        # long SMOOSH chains, and strings built up one SMOOSH at a time
+        name = f"{prefix}text"
+        chain = max(2, self.options["chain"])
+        lines = [f'I HAS A {name} ITZ ""']
+        while len(lines) < size - 1:
+            roll = self.random.random()
+            if roll < 0.5:
+                parts = [self.random.choice((f'"{self.number()}"', self.number(), 'WIN', name))
+                         for _ in range(self.random.randint(2, chain))]
+                lines.append(f"VISIBLE SMOOSH {' AN '.join(parts)}")
+            elif roll < 0.95:
+                lines.append(f'{name} R SMOOSH {name} AN "{self.number()}"')
+            else:
+                # keep the string from growing with the program
+                lines.append(f'{name} R ""')
+        lines.append(f"VISIBLE {name}")
+        return lines
+
+    def _calls(self, size, prefix=""):
+        # chains of functions, each calling the next, so every top-level call
+        # goes call_depth deep (real recursion needs a working O RLY?)
+        depth = self.options["call_depth"]
+        chain = self._unique(f"{prefix}f")
+        lines = []
+        for level in range(depth):
+            lines.append(f"HOW IZ I {chain}_{level} YR n")
+            if level + 1 < depth:
+                lines.append(f"{INDENT}I IZ {chain}_{level + 1} YR SUM OF n AN 1 MKAY")
+                lines.append(f"{INDENT}FOUND YR IT")
+            else:
+                lines.append(f"{INDENT}FOUND YR PRODUKT OF n AN 2")
+            lines.append("IF U SAY SO")
+        while len(lines) < size - 1:
+            lines.append(f"I IZ {chain}_0 YR {self.number()} MKAY")
+            lines.append("VISIBLE IT")
+        return lines
+
+    def _loops(self, size, prefix=""):
+        # counted loops, the number of loops grows with the size
+        iterations = max(1, self.options["loop_iterations"])
+        lines = []
+        while len(lines) < size - 6:
+            label = self._unique(f"{prefix}loop")
+            counter = f"{label}_i"
+            total = f"{label}_sum"
+            lines.append(f"I HAS A {counter} ITZ 0")
+            lines.append(f"I HAS A {total} ITZ 0")
+            lines.append(f"IM IN YR {label} UPPIN YR {counter} TIL BOTH SAEM {counter} AN {iterations}")
+            lines.append(f"{INDENT}{total} R SUM OF {total} AN {self.arithmetic(1, [counter])}")
+            lines.append(f"IM OUTTA YR {label}")
+            lines.append(f"VISIBLE {total}")
+        return lines
+
+
+def generate(shape="mixed", size=1000, seed=0, **options):
+    return ProgramGenerator(seed, **options).generate(shape, size)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate a LOLCODE program for stress testing.")
+    parser.add_argument("--shape", choices=SHAPES, default="mixed", help="kind of program to generate")
+    parser.add_argument("--size", type=int, default=1000, help="approximate number of lines")
+    parser.add_argument("--seed", type=int, default=0, help="random seed, the same seed gives the same program")
+    parser.add_argument("--depth", type=int, default=DEFAULT_OPTIONS["depth"],
+                        help=f"expression nesting (at most {MAX_EXPRESSION_DEPTH})")
+    parser.add_argument("--call-depth", type=int, default=DEFAULT_OPTIONS["call_depth"],
+                        help=f"functions in each call chain (at most {MAX_CALL_DEPTH})")
+    parser.add_argument("--loop-iterations", type=int, default=DEFAULT_OPTIONS["loop_iterations"],
+                        help="iterations of each loop")
+    parser.add_argument("--chain", type=int, default=DEFAULT_OPTIONS["chain"],
+                        help="longest SMOOSH operand list")
+    parser.add_argument("--cases", type=int, default=None,
+                        help="OMG cases per switch (default: one switch with a case every three lines)")
+    parser.add_argument("-o", "--output", help="write the program here instead of stdout")
+    args = parser.parse_args(argv)
+
+    source = generate(args.shape, args.size, args.seed, depth=args.depth, call_depth=args.call_depth,
+                      loop_iterations=args.loop_iterations, chain=args.chain, cases=args.cases)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(source)
+    else:
+        sys.stdout.write(source)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,231 @@
+'''
+CMSC 124: LOLCODE Benchmark Harness
+Timing, JSON baselines and a significance test for comparing runs
+'''
+
+import json
+import math
+import platform
+import statistics
+import sys
+import time
+
+# layout version of the baseline JSON files
+BASELINE_VERSION = 1
+
+# samples taken per benchmark; with the correction for comparing many
+# benchmarks at once, fewer samples cannot show a significant difference
+DEFAULT_REPEATS = 20
+
+# each sample runs the benchmark enough times to take at least this long,
+# so timer resolution and scheduling noise stay small next to it
+DEFAULT_MIN_SAMPLE_TIME = 0.02
+
+DEFAULT_THRESHOLD = 0.05
+DEFAULT_ALPHA = 0.01
+
+
+# one thing to time: `function` processes `items` units (tokens, operations, runs) per call
+class Benchmark:
+    def __init__(self, name, function, items=1, unit="op"):
+        self.name = name
+        self.function = function
+        self.items = items
+        self.unit = unit
+
+
+# per-call timings of one benchmark
+class BenchmarkResult:
+    def __init__(self, name, samples, items=1, unit="op", number=1):
+        self.name = name
+        # seconds per call, one entry per sample
+        self.samples = samples
+        self.items = items
+        self.unit = unit
+        # calls averaged into each sample
+        self.number = number
+
+    @property
+    def median(self):
+        return statistics.median(self.samples)
+
+    @property
+    def stdev(self):
+        return statistics.stdev(self.samples) if len(self.samples) > 1 else 0.0
+
+    @property
+    def throughput(self):
+        # units per second at the median
+        return self.items / self.median if self.median > 0 else 0.0
+
+    def per_item(self):
+        return [sample / self.items for sample in self.samples]
+
+    def to_dict(self):
+        return {
+            "samples": self.samples,
+            "items": self.items,
+            "unit": self.unit,
+            "number": self.number,
+            "median": self.median,
+            "stdev": self.stdev,
+            "throughput": self.throughput,
+        }
+
+    @classmethod
+    def from_dict(cls, name, data):
+        return cls(name, list(data["samples"]), data.get("items", 1), data.get("unit", "op"), data.get("number", 1))
+
+
+def calibrate(function, min_time=DEFAULT_MIN_SAMPLE_TIME):
+    # calls per sample so one sample takes at least min_time
+    number = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(number):
+            function()
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time:
+            return number
+        number *= 2 if elapsed == 0 else max(2, min(10, int(min_time / elapsed) + 1))
+
+
+def measure(benchmark, repeats=DEFAULT_REPEATS, min_time=DEFAULT_MIN_SAMPLE_TIME):
+    function = benchmark.function
+    # the calibration doubles as the warm-up
+    number = calibrate(function, min_time)
+    samples = []
+    clock = time.perf_counter
+    for _ in range(repeats):
+        start = clock()
+        for _ in range(number):
+            function()
+        samples.append((clock() - start) / number)
+    return BenchmarkResult(benchmark.name, samples, benchmark.items, benchmark.unit, number)
+
+
+def environment():
+    return {
+        "python": sys.version.split()[0],
+        "implementation": platform.python_implementation(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+    }
+
+
+def save_results(results, path, settings=None):
+    data = {
+        "version": BASELINE_VERSION,
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "environment": environment(),
+        "settings": settings or {},
+        "benchmarks": {result.name: result.to_dict() for result in results},
+    }
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2)
+
+
+def load_results(path):
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    if data.get("version") != BASELINE_VERSION:
+        raise ValueError(f"{path}: unsupported baseline version {data.get('version')}")
+    return [BenchmarkResult.from_dict(name, entry) for name, entry in data["benchmarks"].items()]
+
+
+def mann_whitney(a, b):
+    # two-sided p-value of the Mann-Whitney U test (normal approximation with
+    # tie correction); makes no assumption about the shape of the timings
+    n1, n2 = len(a), len(b)
+    n = n1 + n2
+    combined = sorted([(value, 0) for value in a] + [(value, 1) for value in b])
+
+    # average ranks over runs of equal values
+    rank_sum = 0.0
+    ties = 0
+    i = 0
+    while i < n:
+        j = i
+        while j + 1 < n and combined[j + 1][0] == combined[i][0]:
+            j += 1
+        rank = (i + j) / 2 + 1
+        count = j - i + 1
+        ties += count ** 3 - count
+        rank_sum += rank * sum(1 for k in range(i, j + 1) if combined[k][1] == 0)
+        i = j + 1
+
+    u = rank_sum - n1 * (n1 + 1) / 2
+    mean = n1 * n2 / 2
+    variance = n1 * n2 / 12 * ((n + 1) - ties / (n * (n - 1)))
+    if variance <= 0:
+        return 1.0
+    # continuity correction
+    z = (abs(u - mean) - 0.5) / math.sqrt(variance)
+    return min(1.0, math.erfc(max(z, 0.0) / math.sqrt(2)))
+
+
+def lowest_p_value(n1, n2):
+    # p-value when every sample of one side is faster than all of the other
+    return mann_whitney(range(n1), range(n1, n1 + n2))
+
+
+# baseline vs current timing of one benchmark
+class Comparison:
+    def __init__(self, name, baseline, current, threshold=DEFAULT_THRESHOLD, alpha=DEFAULT_ALPHA):
+        self.name = name
+        self.baseline = baseline
+        self.current = current
+        base = baseline.per_item()
+        now = current.per_item()
+        # relative change of the median time per unit, positive is slower
+        self.change = statistics.median(now) / statistics.median(base) - 1
+        self.p_value = mann_whitney(base, now)
+
+        # a different program size (e.g. another --copies) is not a like for like run
+        if baseline.items != current.items:
+            self.status = "workload changed"
+        # even completely separated samples would not be significant
+        elif lowest_p_value(len(base), len(now)) >= alpha:
+            self.status = "too few samples"
+        elif self.p_value >= alpha or abs(self.change) <= threshold:
+            self.status = "unchanged"
+        elif self.change > 0:
+            self.status = "regression"
+        else:
+            self.status = "improvement"
+
+    def __str__(self):
+        return (f"{self.name:<32} {self.baseline.median * 1000:>10.3f} {self.current.median * 1000:>10.3f} "
+                f"{self.change:>+8.1%} {self.p_value:>8.4f}  {self.status}")
+
+
+def compare(baseline_results, current_results, threshold=DEFAULT_THRESHOLD, alpha=DEFAULT_ALPHA):
+    # comparisons for benchmarks present in both, plus the names found in only one
+    baseline = {result.name: result for result in baseline_results}
+    current = {result.name: result for result in current_results}
+    names = [name for name in current if name in baseline]
+    # Bonferroni correction: testing many benchmarks at alpha each would
+    # flag some of them by chance alone
+    corrected = alpha / max(1, len(names))
+    comparisons = [Comparison(name, baseline[name], current[name], threshold, corrected) for name in names]
+    missing = sorted(set(baseline) - set(current))
+    added = sorted(set(current) - set(baseline))
+    return comparisons, missing, added
+
+
+def format_results(results):
+    lines = [f"{'benchmark':<32} {'median ms':>10} {'stdev ms':>10} {'throughput':>16}"]
+    for result in results:
+        lines.append(f"{result.name:<32} {result.median * 1000:>10.3f} {result.stdev * 1000:>10.3f} "
+                     f"{result.throughput:>12.0f} {result.unit}/s")
+    return "\n".join(lines) + "\n"
+
+
+def format_comparisons(comparisons, missing=(), added=()):
+    lines = [f"{'benchmark':<32} {'base ms':>10} {'now ms':>10} {'change':>8} {'p':>8}  status"]
+    lines.extend(str(comparison) for comparison in comparisons)
+    for name in missing:
+        lines.append(f"{name:<32} missing from the current run")
+    for name in added:
+        lines.append(f"{name:<32} not in the baseline")
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,150 @@
+'''
+CMSC 124: LOLCODE Scaling Report
+Lex time, execution time and peak memory of generated programs as their
+size grows, with the growth exponent of each curve
+
+    python -m benchmarks.scaling --shapes mixed,switch --sizes 250,500,1000,2000,4000
+'''
+
+import argparse
+import json
+import math
+import sys
+import time
+import tracemalloc
+
+from lexer_analyzer import tokenize
+from compiler import CompiledProgram
+from syntax_analyzer import SyntaxAnalyzer
+from output_sinks import BufferSink
+
+from benchmarks.generator import generate, SHAPES
+
+DEFAULT_SIZES = (250, 500, 1000, 2000, 4000)
+
+# a growth exponent above this is reported as superlinear (1.0 is linear)
+SUPERLINEAR_EXPONENT = 1.3
+
+
+def run_program(program, specialize=True):
+    analyzer = SyntaxAnalyzer(program, log_function=lambda message: None, output_sink=BufferSink(),
+                              specialize=specialize)
+    analyzer.parse_program()
+    return analyzer
+
+
+def measure_size(source, repeats=1, memory=True):
+    # best lex and execute times of `repeats` runs, then one traced run for memory
+    lex_time = execute_time = None
+    for _ in range(repeats):
+        start = time.perf_counter()
+        program = CompiledProgram(tokenize(source))
+        lexed = time.perf_counter()
+        analyzer = run_program(program)
+        done = time.perf_counter()
+        lex_time = min(lex_time, lexed - start) if lex_time is not None else lexed - start
+        execute_time = min(execute_time, done - lexed) if execute_time is not None else done - lexed
+
+    row = {
+        "lines": source.count("\n"),
+        "tokens": len(program.tokens),
+        "statements": sum(analyzer.line_hits.values()),
+        "errors": len(analyzer.error_messages),
+        "lex_seconds": lex_time,
+        "execute_seconds": execute_time,
+    }
+    if memory:
+        # tracemalloc slows everything down, so it gets a run of its own
+        tracemalloc.start()
+        try:
+            program = CompiledProgram(tokenize(source))
+            row["lex_peak_bytes"] = tracemalloc.get_traced_memory()[1]
+            tracemalloc.reset_peak()
+            run_program(program)
+            row["execute_peak_bytes"] = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+    return row
+
+
+def growth_exponent(sizes, values):
+    # least squares slope of log(value) against log(size): 1 is linear, 2 quadratic
+    points = [(math.log(size), math.log(value)) for size, value in zip(sizes, values) if value and value > 0]
+    if len(points) < 2:
+        return None
+    mean_x = sum(x for x, _ in points) / len(points)
+    mean_y = sum(y for _, y in points) / len(points)
+    spread = sum((x - mean_x) ** 2 for x, _ in points)
+    if spread == 0:
+        return None
+    return sum((x - mean_x) * (y - mean_y) for x, y in points) / spread
+
+
+def scaling_report(shapes, sizes, seed=0, repeats=1, memory=True, progress=None):
+    report = {"seed": seed, "sizes": list(sizes), "shapes": {}}
+    for shape in shapes:
+        rows = []
+        for size in sizes:
+            source = generate(shape, size, seed)
+            rows.append(dict(measure_size(source, repeats, memory), size=size))
+            if progress is not None:
+                progress(f"  {shape} {size}")
+        line_counts = [row["lines"] for row in rows]
+        exponents = {key: growth_exponent(line_counts, [row[key] for row in rows])
+                     for key in ("lex_seconds", "execute_seconds", "lex_peak_bytes", "execute_peak_bytes")
+                     if key in rows[0]}
+        report["shapes"][shape] = {"rows": rows, "exponents": exponents}
+    return report
+
+
+def format_report(report):
+    lines = []
+    for shape, entry in report["shapes"].items():
+        lines.append(f"{shape}")
+        lines.append(f"{'lines':>8} {'tokens':>9} {'stmts':>9} {'lex ms':>10} {'exec ms':>10} "
+                     f"{'lex KiB':>10} {'exec KiB':>10}")
+        for row in entry["rows"]:
+            lex_memory = f"{row['lex_peak_bytes'] / 1024:>10.0f}" if "lex_peak_bytes" in row else f"{'-':>10}"
+            execute_memory = f"{row['execute_peak_bytes'] / 1024:>10.0f}" if "execute_peak_bytes" in row else f"{'-':>10}"
+            lines.append(f"{row['lines']:>8} {row['tokens']:>9} {row['statements']:>9} "
+                         f"{row['lex_seconds'] * 1000:>10.2f} {row['execute_seconds'] * 1000:>10.2f} "
+                         f"{lex_memory} {execute_memory}")
+        growth = []
+        for key, exponent in entry["exponents"].items():
+            if exponent is None:
+                continue
+            flag = " (superlinear)" if exponent > SUPERLINEAR_EXPONENT else ""
+            growth.append(f"{key.replace('_', ' ')} ~ n^{exponent:.2f}{flag}")
+        lines.append("  growth: " + ", ".join(growth))
+        lines.append("")
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Report how lexing and execution scale with program size.")
+    parser.add_argument("--shapes", type=lambda text: text.split(","), default=["mixed"],
+                        help=f"comma separated generator shapes ({','.join(SHAPES)})")
+    parser.add_argument("--sizes", type=lambda text: [int(size) for size in text.split(",")],
+                        default=list(DEFAULT_SIZES), help="comma separated program sizes in lines")
+    parser.add_argument("--seed", type=int, default=0, help="generator seed")
+    parser.add_argument("--repeats", type=int, default=3, help="timed runs per size, the best is kept")
+    parser.add_argument("--no-memory", action="store_true", help="skip the tracemalloc peak memory runs")
+    parser.add_argument("--json", dest="json_output", help="also write the report to this JSON file")
+    args = parser.parse_args(argv)
+
+    unknown = set(args.shapes) - set(SHAPES)
+    if unknown:
+        print(f"Unknown shapes: {', '.join(sorted(unknown))}", file=sys.stderr)
+        return 2
+
+    report = scaling_report(args.shapes, args.sizes, args.seed, args.repeats, not args.no_memory,
+                            progress=lambda message: print(message, file=sys.stderr))
+    print(format_report(report))
+    if args.json_output:
+        with open(args.json_output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,146 @@
+'''
+CMSC 124: LOLCODE Benchmark Suite
+Runs the lexer, evaluator, call and end-to-end benchmarks, saves JSON baselines
+and compares a run against one
+
+    python -m benchmarks.suite run -o baseline.json
+    python -m benchmarks.suite compare baseline.json            (runs the suite now)
+    python -m benchmarks.suite compare baseline.json current.json
+    python -m benchmarks.suite run --groups generated --size 2000
+
+compare exits with 1 on a regression, and with 3 when the comparison
+cannot vouch for the run: a benchmark had too few samples or a changed
+workload, or a baseline benchmark is missing from the current results
+'''
+
+import argparse
+import sys
+
+from benchmarks import bench_lexer, bench_evaluator, bench_calls, bench_e2e, bench_generated
+from benchmarks.harness import (measure, save_results, load_results, compare, format_results,
+                                format_comparisons, DEFAULT_REPEATS, DEFAULT_MIN_SAMPLE_TIME,
+                                DEFAULT_THRESHOLD, DEFAULT_ALPHA)
+
+GROUPS = ("lexer", "evaluator", "calls", "e2e", "generated")
+
+EXIT_REGRESSION = 1
+EXIT_INCONCLUSIVE = 3
+
+
+def collect(groups, copies, size):
+    benchmarks = []
+    if "lexer" in groups:
+        benchmarks.extend(bench_lexer.benchmarks(copies))
+    if "evaluator" in groups:
+        benchmarks.extend(bench_evaluator.benchmarks())
+    if "calls" in groups:
+        benchmarks.extend(bench_calls.benchmarks())
+    if "e2e" in groups:
+        benchmarks.extend(bench_e2e.benchmarks(copies))
+    if "generated" in groups:
+        benchmarks.extend(bench_generated.benchmarks(size))
+    return benchmarks
+
+
+def run_suite(args):
+    results = []
+    for benchmark in collect(args.groups, args.copies, args.size):
+        if args.filter and args.filter not in benchmark.name:
+            continue
+        results.append(measure(benchmark, args.repeats, args.min_time))
+        print(f"  {benchmark.name}", file=sys.stderr)
+    return results
+
+
+def settings(args):
+    return {"groups": list(args.groups), "copies": args.copies, "size": args.size, "repeats": args.repeats, "min_time": args.min_time}
+
+
+def add_run_arguments(parser):
+    parser.add_argument("--groups", type=lambda text: text.split(","), default=list(GROUPS),
+                        help=f"comma separated benchmark groups ({','.join(GROUPS)})")
+    parser.add_argument("--filter", help="only run benchmarks whose name contains this text")
+    parser.add_argument("--copies", type=int, default=5,
+                        help="times the test programs are replicated for the lexer and e2e benchmarks")
+    parser.add_argument("--size", type=int, default=300,
+                        help="lines of each generated program (benchmarks.generator)")
+    parser.add_argument("--repeats", type=int, default=DEFAULT_REPEATS,
+                        help="samples per benchmark, compare needs about 10 or more on each side")
+    parser.add_argument("--min-time", type=float, default=DEFAULT_MIN_SAMPLE_TIME,
+                        help="minimum seconds per sample, short benchmarks are repeated within a sample")
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="LOLCODE interpreter benchmarks.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = commands.add_parser("run", help="run the benchmarks")
+    add_run_arguments(run_parser)
+    run_parser.add_argument("-o", "--output", help="save the results as a JSON baseline")
+
+    compare_parser = commands.add_parser("compare", help="compare results against a baseline")
+    compare_parser.add_argument("baseline", help="baseline JSON file")
+    compare_parser.add_argument("current", nargs="?", help="results JSON file (default: run the suite now)")
+    add_run_arguments(compare_parser)
+    compare_parser.add_argument("-o", "--output", help="save the current run as JSON")
+    compare_parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                                help="relative slowdown tolerated before a change counts (0.05 = 5%%)")
+    compare_parser.add_argument("--alpha", type=float, default=DEFAULT_ALPHA,
+                                help="significance level of the Mann-Whitney test, shared by all benchmarks")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    unknown = set(args.groups) - set(GROUPS)
+    if unknown:
+        print(f"Unknown benchmark groups: {', '.join(sorted(unknown))}", file=sys.stderr)
+        return 2
+
+    if args.command == "run":
+        results = run_suite(args)
+        print(format_results(results), end="")
+        if args.output:
+            save_results(results, args.output, settings(args))
+        return 0
+
+    try:
+        baseline = load_results(args.baseline)
+        current = load_results(args.current) if args.current else None
+    except (OSError, ValueError, KeyError) as e:
+        print(f"Error reading results: {e}", file=sys.stderr)
+        return 2
+    if current is None:
+        current = run_suite(args)
+        if args.output:
+            save_results(current, args.output, settings(args))
+
+    comparisons, missing, added = compare(baseline, current, args.threshold, args.alpha)
+    print(format_comparisons(comparisons, missing, added), end="")
+    regressions = [comparison for comparison in comparisons if comparison.status == "regression"]
+    inconclusive = [comparison for comparison in comparisons
+                    if comparison.status in ("too few samples", "workload changed")]
+    # a suite run now with --filter or fewer --groups leaves the rest out on purpose
+    if args.current is None and (args.filter or set(args.groups) != set(GROUPS)):
+        if missing:
+            print(f"\nnote: {len(missing)} baseline benchmark(s) not selected in this run", file=sys.stderr)
+        missing = []
+
+    if regressions:
+        print(f"\n{len(regressions)} regression(s) beyond {args.threshold:.0%}", file=sys.stderr)
+    if inconclusive or missing:
+        print(f"\nWARNING: {len(inconclusive)} comparison(s) inconclusive and {len(missing)} benchmark(s) missing, "
+              f"the run does not show that nothing got slower:", file=sys.stderr)
+        for comparison in inconclusive:
+            print(f"  {comparison.name}: {comparison.status}", file=sys.stderr)
+        for name in missing:
+            print(f"  {name}: missing from the current run", file=sys.stderr)
+    if regressions:
+        return EXIT_REGRESSION
+    if inconclusive or missing:
+        return EXIT_INCONCLUSIVE
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
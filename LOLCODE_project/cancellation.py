@@ -0,0 +1,51 @@
+'''
+CMSC 124: LOLCODE Cancellation
+Cooperative cancellation for running programs
+'''
+
+import threading
+
+
+# raised inside the interpreter when its cancellation token is set
+class ExecutionCancelled(Exception):
+    pass
+
+
+# a flag the interpreter polls once per statement, set from any thread
+class CancellationToken:
+    def __init__(self):
+        # a plain attribute keeps the per-statement check to one lookup
+        self.cancelled = False
+        self.reason = None
+        self._callbacks = []
+        self._lock = threading.Lock()
+
+    def cancel(self, reason="cancelled"):
+        with self._lock:
+            if self.cancelled:
+                return
+            self.reason = reason
+            self.cancelled = True
+            callbacks = list(self._callbacks)
+        for callback in callbacks:
+            callback()
+
+    def add_callback(self, callback):
+        # run callback on cancel (right away if already cancelled)
+        with self._lock:
+            if not self.cancelled:
+                self._callbacks.append(callback)
+                return
+        callback()
+
+    def remove_callback(self, callback):
+        with self._lock:
+            if callback in self._callbacks:
+                self._callbacks.remove(callback)
+
+    def cancel_after(self, seconds):
+        # cancel with reason "timeout" once the given time has passed
+        timer = threading.Timer(seconds, self.cancel, args=("timeout",))
+        timer.daemon = True
+        timer.start()
+        return timer
@@ -0,0 +1,153 @@
+'''
+CMSC 124: LOLCODE Checker
+Lints programs without running them: every statement line is validated,
+the blocks are matched and the whole-program checks of static_analysis are
+made, so all the errors of a file come out in one pass
+
+    python checker.py project-testcases --json
+'''
+
+import argparse
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+from compiler import load_or_compile
+from live_diagnostics import StatementValidator, match_blocks
+from static_analysis import StaticAnalyzer
+from diagnostics import count_errors
+
+# files per task handed to a worker process
+CHUNK_SIZE = 32
+
+# distinct statement lines remembered before the cache starts over
+STATEMENT_CACHE_LIMIT = 65536
+
+
+# checks whole programs; statement results are shared between identical
+# lines, across all the files one checker sees
+class ProgramChecker:
+    def __init__(self, compile_cache_dir=None, use_compile_cache=False):
+        self.validator = StatementValidator()
+        self.compile_cache_dir = compile_cache_dir
+        self.use_compile_cache = use_compile_cache or compile_cache_dir is not None
+        self._statement_cache = {}
+
+    def check_program(self, program):
+        # Diagnostic objects of a CompiledProgram, in line order
+        cache = self._statement_cache
+        lines = program.lines
+        diagnostics = []
+        for line_number in program.line_numbers:
+            tokens = lines[line_number]
+            key = tuple((token.type, token.value) for token in tokens)
+            found = cache.get(key)
+            if found is None:
+                if len(cache) >= STATEMENT_CACHE_LIMIT:
+                    cache.clear()
+                found = cache[key] = self.validator.validate_diagnostics(tokens)
+            diagnostics.extend(diagnostic.at(line_number) for diagnostic in found)
+
+        diagnostics.extend(match_blocks([(line_number, lines[line_number][0].value)
+                                         for line_number in program.line_numbers]))
+        diagnostics.extend(StaticAnalyzer(program).analyze())
+        diagnostics.sort(key=lambda diagnostic: diagnostic.line)
+        return diagnostics
+
+    def check_source(self, source, path=None):
+        # .lolc files are only read or written when the compile cache is on
+        source_path = path if self.use_compile_cache else None
+        return self.check_program(load_or_compile(source, source_path, self.compile_cache_dir))
+
+    def check_file(self, path):
+        with open(path, "r", encoding="utf-8") as f:
+            return self.check_source(f.read(), path)
+
+
+def check_source(source):
+    return ProgramChecker().check_source(source)
+
+
+def find_programs(paths):
+    # .lol files named directly or found under the given directories
+    programs = []
+    for path in paths:
+        if os.path.isdir(path):
+            for root, directories, files in os.walk(path):
+                directories.sort()
+                programs.extend(os.path.join(root, name) for name in sorted(files) if name.endswith(".lol"))
+        else:
+            programs.append(path)
+    return programs
+
+
+def _check_chunk(paths, compile_cache_dir=None):
+    # worker task: (path, diagnostics or None, error text) per file
+    checker = ProgramChecker(compile_cache_dir)
+    results = []
+    for path in paths:
+        try:
+            results.append((path, checker.check_file(path), None))
+        except (OSError, UnicodeDecodeError) as error:
+            results.append((path, None, str(error)))
+    return results
+
+
+def check_paths(paths, workers=1, compile_cache_dir=None):
+    # yields (path, diagnostics, read error) for every program, in order
+    programs = find_programs(paths)
+    if workers <= 1 or len(programs) <= 1:
+        yield from _check_chunk(programs, compile_cache_dir)
+        return
+
+    # small enough chunks that every worker gets a share
+    size = max(1, min(CHUNK_SIZE, len(programs) // workers))
+    chunks = [programs[i:i + size] for i in range(0, len(programs), size)]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for results in pool.map(_check_chunk, chunks, [compile_cache_dir] * len(chunks)):
+            yield from results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Check LOLCODE programs for errors without running them.")
+    parser.add_argument("paths", nargs="+", help=".lol files or directories to search for them")
+    parser.add_argument("--json", dest="json_output", action="store_true",
+                        help="print the diagnostics of every file as JSON")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="worker processes for large corpora")
+    parser.add_argument("--compile-cache-dir",
+                        help="reuse compiled .lolc files stored in this directory")
+    parser.add_argument("-q", "--quiet", action="store_true",
+                        help="only print the summary")
+    args = parser.parse_args(argv)
+
+    files = failed = errors = 0
+    report = {}
+    for path, diagnostics, read_error in check_paths(args.paths, args.workers, args.compile_cache_dir):
+        files += 1
+        if read_error is not None:
+            failed += 1
+            report[path] = {"error": read_error}
+            if not args.json_output:
+                print(f"{path}: cannot read ({read_error})", file=sys.stderr)
+            continue
+
+        errors += count_errors(diagnostics)
+        if diagnostics:
+            failed += 1
+        if args.json_output:
+            report[path] = [diagnostic.to_dict() for diagnostic in diagnostics]
+        elif not args.quiet:
+            for diagnostic in diagnostics:
+                print(f"{path}:{diagnostic.line}: {diagnostic.code} {diagnostic.describe()}")
+
+    if args.json_output:
+        print(json.dumps({"files": files, "failed": failed, "errors": errors, "results": report}, indent=2))
+    else:
+        print(f"{files} file(s) checked, {errors} error(s) in {failed} file(s)", file=sys.stderr)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,220 @@
+'''
+CMSC 124: LOLCODE Checkpoints
+Snapshots taken between top-level statements so an edited program can
+resume from the first changed line instead of from HAI: a checkpoint holds
+only the names written since the one before it, with a full copy (a
+keyframe) now and then, like the symbol history
+'''
+
+import bisect
+
+from output_sinks import RecordingSink
+from symbol_history import RecordedScope, SET, DELETE, CLEAR
+
+# names changed between keyframes; a keyframe also waits for as many changes
+# as the last one held entries, so rebuilding a checkpoint stays bounded
+KEYFRAME_INTERVAL = 256
+
+
+# interpreter state right before a top-level statement runs; variables and
+# functions map the names changed since the previous checkpoint to their new
+# entry (None when removed), or hold every name when it is a keyframe
+class Checkpoint:
+    __slots__ = ("line_number", "variables", "functions", "output_offset", "error_count", "in_wazzup_block",
+                 "keyframe")
+
+    def __init__(self, line_number, variables, functions, output_offset, error_count, in_wazzup_block,
+                 keyframe=False):
+        self.line_number = line_number
+        self.variables = variables
+        self.functions = functions
+        self.output_offset = output_offset
+        self.error_count = error_count
+        self.in_wazzup_block = in_wazzup_block
+        self.keyframe = keyframe
+
+
+# a table that remembers which names were written since they were last
+# taken, so a checkpoint copies only those
+class TrackedTable(dict):
+    __slots__ = ("written", "cleared")
+
+    def __init__(self, *args, **kwargs):
+        dict.__init__(self, *args, **kwargs)
+        self.written = set()
+        self.cleared = False
+
+    def __setitem__(self, name, value):
+        dict.__setitem__(self, name, value)
+        self.written.add(name)
+
+    def __delitem__(self, name):
+        dict.__delitem__(self, name)
+        self.written.add(name)
+
+    def clear(self):
+        dict.clear(self)
+        self.written.clear()
+        self.cleared = True
+
+    def update(self, *args, **kwargs):
+        for name, value in dict(*args, **kwargs).items():
+            self[name] = value
+
+    def take_written(self):
+        # (names written, whether the table was emptied) since the last call
+        written, cleared = self.written, self.cleared
+        self.written = set()
+        self.cleared = False
+        return written, cleared
+
+
+def first_changed_line(old_program, new_program):
+    # first line number whose tokens differ between two compiled programs,
+    # None when they are the same
+    old_lines, new_lines = old_program.lines, new_program.lines
+    for old_number, new_number in zip(old_program.line_numbers, new_program.line_numbers):
+        if old_number != new_number:
+            return min(old_number, new_number)
+        old_tokens, new_tokens = old_lines[old_number], new_lines[new_number]
+        if len(old_tokens) != len(new_tokens) or any(
+                a.type != b.type or a.value != b.value for a, b in zip(old_tokens, new_tokens)):
+            return old_number
+
+    old_count, new_count = len(old_program.line_numbers), len(new_program.line_numbers)
+    if old_count > new_count:
+        return old_program.line_numbers[new_count]
+    if new_count > old_count:
+        return new_program.line_numbers[old_count]
+    return None
+
+
+# records checkpoints during one run and resumes later runs from them
+class CheckpointRecorder:
+    def __init__(self, program, output_sink):
+        self.program = program
+        # every VISIBLE write passes through here so checkpoints can point into it
+        self.sink = RecordingSink(output_sink)
+        self.checkpoints = []
+        self.errors = []
+        self.diagnostics = []
+        # set up at the first checkpoint, once every other hook is installed
+        self.analyzer = None
+        self._history = None
+        self._log_index = 0
+        self._changes = 0
+        self._next_keyframe = 0
+
+        # checkpoints after the first GIMMEH depend on what was typed in
+        self.first_input_line = next(
+            (line_number for line_number in program.line_numbers
+             if any(token.type == 'Input Keyword' for token in program.lines[line_number])), None)
+
+    def record(self, analyzer):
+        # called by parse_program before each top-level statement
+        line_number = analyzer.current_line_number
+        if self.first_input_line is not None and line_number > self.first_input_line:
+            return
+        self.errors = analyzer.error_messages
+        self.diagnostics = analyzer.diagnostics
+
+        if self.analyzer is not analyzer:
+            self._attach(analyzer)
+            written, cleared, functions_written = None, True, None
+        else:
+            written, cleared = self._written_globals()
+            functions_written, functions_cleared = analyzer.functions.take_written()
+            cleared = cleared or functions_cleared
+        variables, functions = analyzer.globals, analyzer.functions
+
+        keyframe = cleared or self._changes >= self._next_keyframe
+        if keyframe:
+            changed_variables = {name: dict(info) for name, info in variables.items()}
+            changed_functions = dict(functions)
+            self._changes = 0
+            self._next_keyframe = max(KEYFRAME_INTERVAL, len(changed_variables) + len(changed_functions))
+        else:
+            changed_variables = {name: dict(variables[name]) if name in variables else None for name in written}
+            changed_functions = {name: functions.get(name) for name in functions_written}
+            self._changes += len(changed_variables) + len(changed_functions)
+        self.checkpoints.append(Checkpoint(
+            line_number,
+            changed_variables,
+            changed_functions,
+            self.sink.length,
+            len(analyzer.error_messages),
+            analyzer.in_wazzup_block,
+            keyframe,
+        ))
+
+    def _attach(self, analyzer):
+        # follow the writes to the globals: through the symbol history's log
+        # when one is installed, through a tracked table otherwise
+        self.analyzer = analyzer
+        self._history = None
+        if isinstance(analyzer.globals, RecordedScope):
+            self._history = analyzer.globals.history
+            self._log_index = len(self._history.log)
+        else:
+            scope = TrackedTable(analyzer.globals)
+            analyzer.globals = analyzer.variables = analyzer.semantics.symbol_table = scope
+        analyzer.functions = TrackedTable(analyzer.functions)
+
+    def _written_globals(self):
+        if self._history is None:
+            return self.analyzer.globals.take_written()
+        # the writes to the globals logged since the last checkpoint
+        log = self._history.log
+        written, cleared = set(), False
+        for index in range(self._log_index, len(log)):
+            _, kind, depth, name, _, _ = log[index]
+            if depth != 0:
+                continue
+            if kind == SET or kind == DELETE:
+                written.add(name)
+            elif kind == CLEAR:
+                written.clear()
+                cleared = True
+        self._log_index = len(log)
+        return written, cleared
+
+    def state_at(self, checkpoint):
+        # (variables, functions) right before a checkpoint's statement ran:
+        # its latest keyframe plus the changes recorded since
+        index = self.checkpoints.index(checkpoint)
+        start = index
+        while not self.checkpoints[start].keyframe:
+            start -= 1
+        variables, functions = {}, {}
+        for recorded in self.checkpoints[start:index + 1]:
+            for table, changes in ((variables, recorded.variables), (functions, recorded.functions)):
+                for name, value in changes.items():
+                    if value is None:
+                        table.pop(name, None)
+                    else:
+                        table[name] = value
+        return variables, functions
+
+    def resume_point(self, program):
+        # latest checkpoint whose preceding lines are unchanged in the new
+        # program; an unchanged program is run again from the start
+        if not self.checkpoints:
+            return None
+        changed_line = first_changed_line(self.program, program)
+        if changed_line is None:
+            return None
+        index = bisect.bisect_right(self.checkpoints, changed_line, key=lambda c: c.line_number)
+        return self.checkpoints[index - 1] if index else None
+
+    def resume(self, analyzer, previous, checkpoint):
+        # restore the state of an earlier run at a checkpoint and run from there
+        variables, functions = previous.state_at(checkpoint)
+        self.checkpoints = previous.checkpoints[:previous.checkpoints.index(checkpoint)]
+        analyzer.variables.clear()
+        analyzer.variables.update({name: dict(info) for name, info in variables.items()})
+        analyzer.functions = functions
+        analyzer.in_wazzup_block = checkpoint.in_wazzup_block
+        analyzer.error_messages.extend(previous.errors[:checkpoint.error_count])
+        analyzer.diagnostics.extend(previous.diagnostics[:checkpoint.error_count])
+        return analyzer.parse_program(start_line=checkpoint.line_number,
+                                      resumed_output=previous.sink.getvalue()[:checkpoint.output_offset])
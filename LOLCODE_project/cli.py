@@ -0,0 +1,440 @@
+'''
+CMSC 124: LOLCODE Command Line Runner
+Runs a LOLCODE program non-interactively
+'''
+
+import argparse
+import json
+import os
+import signal
+import sys
+import time
+
+from compiler import load_or_compile
+from syntax_analyzer import SyntaxAnalyzer
+from batch_runner import run_batch, run_cached
+from result_cache import ResultCache, is_cacheable
+from cancellation import CancellationToken
+from input_streams import ListInput, FileInput, StdinInput
+from output_sinks import FileSink, PipeSink, DEFAULT_FLUSH_THRESHOLD
+from tracer import StatementTracer, DEFAULT_TRACE_CAPACITY
+from profiler import Profiler, SORT_KEYS
+from flamegraph import StackSampler, DEFAULT_SAMPLE_INTERVAL
+from interpreter_profile import InterpreterProfile
+from metrics import RunMetrics, METRIC_FORMATS
+from memory_profile import MemoryProfile, DEFAULT_LINE_DEPTH
+from checker import ProgramChecker
+from static_analysis import prune_unreachable
+from diagnostics import count_errors
+from debugger import Debugger, DebuggerShell
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Run a LOLCODE program.")
+    parser.add_argument("file", help="path to the .lol program")
+    parser.add_argument("-i", "--input", dest="input_file",
+                        help="file with GIMMEH values, one per line")
+    parser.add_argument("-v", "--value", dest="values", action="append",
+                        help="GIMMEH value (repeatable, used in order)")
+    parser.add_argument("-o", "--output", dest="output_file",
+                        help="write VISIBLE output to this file instead of stdout")
+    parser.add_argument("--flush-threshold", type=int, default=DEFAULT_FLUSH_THRESHOLD,
+                        help="characters of output buffered before each write")
+    parser.add_argument("-q", "--quiet", action="store_true",
+                        help="hide interpreter diagnostics, show only program output")
+    parser.add_argument("--batch", dest="batch_file",
+                        help="JSON list of GIMMEH input vectors; runs the program once per vector")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="worker count for --batch (default: one per CPU)")
+    parser.add_argument("--executor", choices=["process", "thread"], default="process",
+                        help="worker pool type for --batch")
+    parser.add_argument("--json", dest="json_output", action="store_true",
+                        help="print --batch results as JSON")
+    parser.add_argument("--cache-dir",
+                        help="reuse results of deterministic runs stored in this directory "
+                             "(not used with --trace, --profile, --memory or --debug)")
+    parser.add_argument("--timeout", type=float, default=None,
+                        help="stop a run after this many seconds, keeping its partial output")
+    parser.add_argument("--compile-cache-dir",
+                        help="store compiled .lolc files here instead of next to the program")
+    parser.add_argument("--no-compile-cache", action="store_true",
+                        help="always lex from source, never read or write .lolc files")
+    parser.add_argument("--trace", action="store_true",
+                        help="print the executed statements to stderr after the run")
+    parser.add_argument("--trace-json",
+                        help="write the statement trace to this JSON file")
+    parser.add_argument("--trace-size", type=int, default=DEFAULT_TRACE_CAPACITY,
+                        help="number of trace events kept (oldest are dropped)")
+    parser.add_argument("--profile", action="store_true",
+                        help="print per-line and per-function timings to stderr after the run")
+    parser.add_argument("--profile-json",
+                        help="write the profile to this JSON file")
+    parser.add_argument("--profile-sample", type=float, default=None, metavar="MS",
+                        help="sample the running line every MS milliseconds instead of timing every statement")
+    parser.add_argument("--profile-sort", choices=SORT_KEYS, default="self",
+                        help="column the profile table is sorted by")
+    parser.add_argument("--flame-collapsed",
+                        help="sample the call stack and write collapsed stacks (flamegraph.pl format) here")
+    parser.add_argument("--flame-speedscope",
+                        help="sample the call stack and write speedscope JSON here")
+    parser.add_argument("--flame-interval", type=float, default=DEFAULT_SAMPLE_INTERVAL * 1000, metavar="MS",
+                        help="milliseconds between call stack samples")
+    parser.add_argument("--flame-lines", action="store_true",
+                        help="end each sampled stack with the running line")
+    parser.add_argument("--profile-interpreter", action="store_true",
+                        help="profile the interpreter itself with cProfile and print a per-phase summary")
+    parser.add_argument("--pstats-out",
+                        help="where --profile-interpreter writes its pstats dump (default: <program>.pstats)")
+    parser.add_argument("--memory", action="store_true",
+                        help="trace allocations and print peak/retained memory per phase and per line to stderr; "
+                             f"lines more than {DEFAULT_LINE_DEPTH} calls deep are counted in their caller, "
+                             "and deep recursion runs much slower (tracemalloc walks the whole stack on every "
+                             "allocation)")
+    parser.add_argument("--memory-json",
+                        help="write the memory profile to this JSON file")
+    parser.add_argument("--metrics", choices=METRIC_FORMATS,
+                        help="print run counters and phase timings to stderr in this format")
+    parser.add_argument("--metrics-out",
+                        help="write the run metrics to this file (JSON unless --metrics prometheus)")
+    parser.add_argument("--check", action="store_true",
+                        help="report every error in the program without running it (with --json, as JSON)")
+    parser.add_argument("--fail-fast", action="store_true",
+                        help="check the whole program first and do not run it if any error is found")
+    parser.add_argument("--prune", action="store_true",
+                        help="drop unreachable code (after GTFO or FOUND YR) before running")
+    parser.add_argument("--no-specialize", action="store_true",
+                        help="evaluate every operation on the generic path, without type inference")
+    parser.add_argument("--debug", action="store_true",
+                        help="run under the debugger, which takes commands before the program starts")
+    parser.add_argument("-b", "--break", dest="breakpoints", action="append", metavar="LINE|FUNCTION",
+                        help="pause at this line or in this function under the debugger (repeatable)")
+    return parser
+
+
+# flags that watch a single run in this process: a --batch run happens in
+# its workers, and a result served from --cache-dir runs nothing at all
+INSTRUMENTATION_FLAGS = (("trace", "--trace"), ("trace_json", "--trace-json"), ("profile", "--profile"),
+                         ("profile_json", "--profile-json"), ("profile_sample", "--profile-sample"),
+                         ("flame_collapsed", "--flame-collapsed"), ("flame_speedscope", "--flame-speedscope"),
+                         ("profile_interpreter", "--profile-interpreter"), ("memory", "--memory"),
+                         ("memory_json", "--memory-json"), ("debug", "--debug"), ("breakpoints", "--break"))
+
+
+# flags the --memory run does not go through: it lexes and runs the program
+# on its own path, so checking, pruning and the other hooks never happen
+MEMORY_EXCLUSIVE_FLAGS = (("check", "--check"), ("fail_fast", "--fail-fast"), ("prune", "--prune"),
+                          ("no_specialize", "--no-specialize"), ("metrics", "--metrics"),
+                          ("metrics_out", "--metrics-out")) + tuple(
+    (name, flag) for name, flag in INSTRUMENTATION_FLAGS
+    if name not in ("memory", "memory_json", "profile_interpreter"))
+
+
+def instrumentation_flags(args, flags=INSTRUMENTATION_FLAGS):
+    return [flag for name, flag in flags if getattr(args, name)]
+
+
+def make_provider(args):
+    # explicit values win over an input file, stdin is the fallback
+    if args.values:
+        return ListInput(args.values)
+    if args.input_file:
+        return FileInput(args.input_file)
+    return StdinInput()
+
+
+# exit statuses for stopped runs, following the timeout(1) and shell conventions
+EXIT_TIMEOUT = 124
+EXIT_INTERRUPTED = 130
+
+
+def make_cancel_token():
+    # ctrl-c stops the LOLCODE program instead of killing the interpreter
+    cancel_token = CancellationToken()
+    signal.signal(signal.SIGINT, lambda signum, frame: cancel_token.cancel("interrupted"))
+    return cancel_token
+
+
+def cancelled_status(cancel_token, default):
+    if cancel_token.reason == "interrupted":
+        return EXIT_INTERRUPTED
+    if cancel_token.reason == "timeout":
+        return EXIT_TIMEOUT
+    return default
+
+
+def report_metrics(metrics, args):
+    # --metrics prints to stderr, --metrics-out writes a file, both may be given
+    if not (args.metrics or args.metrics_out):
+        return
+    text = metrics.format(args.metrics or "json", labels={"program": os.path.basename(args.file)})
+    if args.metrics:
+        sys.stderr.write(text)
+    if args.metrics_out:
+        with open(args.metrics_out, "w", encoding="utf-8") as f:
+            f.write(text)
+
+
+def run_batch_mode(program, args, lex_seconds=0.0):
+    try:
+        with open(args.batch_file, "r", encoding="utf-8") as f:
+            input_sets = json.load(f)
+    except (OSError, ValueError) as e:
+        print(f"Error reading batch file '{args.batch_file}': {e}", file=sys.stderr)
+        return 1
+
+    cache = ResultCache(cache_dir=args.cache_dir) if args.cache_dir else None
+    cancel_token = make_cancel_token()
+    result = run_batch(program, input_sets, workers=args.workers, executor=args.executor, cache=cache,
+                       cancel_token=cancel_token, timeout=args.timeout)
+
+    if args.json_output:
+        print(json.dumps(result.to_dict(), indent=2))
+    else:
+        for case in result.cases:
+            status = " cancelled" if case.cancelled else " failed" if case.failed else ""
+            print(f"--- case {case.index} inputs={case.inputs} ({case.elapsed * 1000:.2f} ms){status}")
+            print(case.output, end="")
+            for error in case.errors:
+                print(f"  {error}")
+        print(f"\n{len(result.cases)} cases in {result.elapsed:.3f}s "
+              f"({result.throughput:.1f} cases/s, {result.workers} workers)")
+        if cache is not None:
+            print(f"cache: {cache.stats()}")
+
+    metrics = result.metrics()
+    metrics.phase_seconds["lex"] += lex_seconds
+    report_metrics(metrics, args)
+
+    if cancel_token.cancelled:
+        return cancelled_status(cancel_token, 1)
+    if any(case.cancelled for case in result.cases):
+        return EXIT_TIMEOUT
+    return 1 if any(case.errors for case in result.cases) else 0
+
+
+def run_memory_mode(source, args):
+    # lexing is part of what is measured, so the .lolc cache is not used
+    if args.output_file:
+        output_sink = FileSink(args.output_file, flush_threshold=args.flush_threshold)
+    else:
+        output_sink = PipeSink(sys.stdout, flush_threshold=args.flush_threshold)
+    log_function = (lambda message: None) if args.quiet else sys.stderr.write
+    cancel_token = make_cancel_token()
+    timer = cancel_token.cancel_after(args.timeout) if args.timeout else None
+    try:
+        profile = MemoryProfile().run(source, log_function=log_function, input_provider=make_provider(args),
+                                      output_sink=output_sink, cancel_token=cancel_token)
+    finally:
+        if timer is not None:
+            timer.cancel()
+
+    if args.memory or not args.memory_json:
+        sys.stderr.write(profile.summary())
+    if args.memory_json:
+        profile.export_json(args.memory_json)
+    if profile.cancelled:
+        return cancelled_status(cancel_token, 1)
+    return 1 if profile.errors else 0
+
+
+def run_cached_mode(program, args, lex_seconds=0.0):
+    # only a fixed input vector makes a GIMMEH program reproducible
+    inputs = None
+    if args.values:
+        inputs = list(args.values)
+    elif args.input_file:
+        try:
+            with open(args.input_file, "r", encoding="utf-8") as f:
+                inputs = f.read().splitlines()
+        except OSError as e:
+            print(f"Error reading input file '{args.input_file}': {e}", file=sys.stderr)
+            return 1
+
+    # interactive input: fall back to a normal, uncached run
+    if not is_cacheable(program, inputs):
+        return None
+
+    cache = ResultCache(cache_dir=args.cache_dir)
+    cancel_token = make_cancel_token()
+    result, cached = run_cached(program, inputs, cache, cancel_token=cancel_token, timeout=args.timeout)
+
+    if args.output_file:
+        with open(args.output_file, "w", encoding="utf-8") as f:
+            f.write(result.output)
+    else:
+        sys.stdout.write(result.output)
+    if not args.quiet:
+        for error in result.errors:
+            print(error, file=sys.stderr)
+        print(f"({'cached' if cached else 'executed'} in {result.elapsed * 1000:.2f} ms)", file=sys.stderr)
+    # a cache hit executed nothing, only the lexing is counted
+    metrics = result.metrics if result.metrics is not None else RunMetrics()
+    metrics.phase_seconds["lex"] += lex_seconds
+    report_metrics(metrics, args)
+    if result.cancelled:
+        return cancelled_status(cancel_token, EXIT_TIMEOUT)
+    return 1 if result.errors else 0
+
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if args.batch_file and instrumentation_flags(args):
+        parser.error(f"{', '.join(instrumentation_flags(args))} cannot be used with --batch")
+    if (args.memory or args.memory_json) and instrumentation_flags(args, MEMORY_EXCLUSIVE_FLAGS):
+        parser.error(f"{', '.join(instrumentation_flags(args, MEMORY_EXCLUSIVE_FLAGS))} cannot be used with --memory")
+    if not args.profile_interpreter:
+        return run(args)
+
+    # everything from reading the source to the last flush is profiled
+    with InterpreterProfile() as profile:
+        status = run(args)
+    pstats_path = args.pstats_out or os.path.splitext(args.file)[0] + ".pstats"
+    profile.dump(pstats_path)
+    sys.stderr.write(profile.summary())
+    sys.stderr.write(f"pstats written to {pstats_path}\n")
+    return status
+
+
+def run_check_mode(program, args):
+    # lint only: nothing is executed, so no input is read and nothing is printed by the program
+    diagnostics = ProgramChecker().check_program(program)
+    if args.json_output:
+        print(json.dumps([diagnostic.to_dict() for diagnostic in diagnostics], indent=2))
+    else:
+        for diagnostic in diagnostics:
+            print(f"{args.file}:{diagnostic.line}: {diagnostic.code} {diagnostic.describe()}")
+        if not args.quiet:
+            print(f"{len(diagnostics)} problem(s) found", file=sys.stderr)
+    return 1 if count_errors(diagnostics) else 0
+
+
+def run(args):
+    try:
+        with open(args.file, "r", encoding="utf-8") as f:
+            source = f.read()
+    except OSError as e:
+        print(f"Error reading file '{args.file}': {e}", file=sys.stderr)
+        return 1
+
+    # FileInput opens the file at the first GIMMEH, so check it before running
+    if args.input_file and not args.values:
+        try:
+            open(args.input_file, "r", encoding="utf-8").close()
+        except OSError as e:
+            print(f"Error reading input file '{args.input_file}': {e}", file=sys.stderr)
+            return 1
+
+    if args.memory or args.memory_json:
+        return run_memory_mode(source, args)
+
+    # lex and organize once (or load the .lolc), whatever the mode
+    lex_start = time.perf_counter()
+    if args.no_compile_cache:
+        program = load_or_compile(source)
+    else:
+        program = load_or_compile(source, source_path=args.file, cache_dir=args.compile_cache_dir)
+    lex_seconds = time.perf_counter() - lex_start
+
+    if args.check:
+        return run_check_mode(program, args)
+
+    if args.fail_fast:
+        diagnostics = ProgramChecker().check_program(program)
+        if not args.quiet or count_errors(diagnostics):
+            for diagnostic in diagnostics:
+                print(str(diagnostic), file=sys.stderr)
+        if count_errors(diagnostics):
+            print(f"Not running '{args.file}': {count_errors(diagnostics)} error(s) found", file=sys.stderr)
+            return 1
+
+    if args.prune:
+        program, pruned = prune_unreachable(program)
+        if pruned and not args.quiet:
+            print(f"Pruned {pruned} unreachable line(s)", file=sys.stderr)
+
+    if args.batch_file:
+        return run_batch_mode(program, args, lex_seconds)
+
+    # an instrumented run must execute, so it bypasses the result cache
+    if args.cache_dir and not instrumentation_flags(args):
+        status = run_cached_mode(program, args, lex_seconds)
+        if status is not None:
+            return status
+
+    if args.output_file:
+        output_sink = FileSink(args.output_file, flush_threshold=args.flush_threshold)
+    else:
+        output_sink = PipeSink(sys.stdout, flush_threshold=args.flush_threshold)
+
+    # diagnostics go to stderr so program output stays clean
+    log_function = (lambda message: None) if args.quiet else sys.stderr.write
+
+    cancel_token = make_cancel_token()
+    timer = cancel_token.cancel_after(args.timeout) if args.timeout else None
+
+    analyzer = SyntaxAnalyzer(program, log_function=log_function,
+                              input_provider=make_provider(args), output_sink=output_sink,
+                              cancel_token=cancel_token, specialize=not args.no_specialize)
+    tracer = None
+    if args.trace or args.trace_json:
+        tracer = StatementTracer(args.trace_size).install(analyzer)
+    profiler = None
+    if args.profile or args.profile_json or args.profile_sample:
+        sample_interval = args.profile_sample / 1000 if args.profile_sample else None
+        profiler = Profiler(sample_interval).install(analyzer)
+    sampler = None
+    if args.flame_collapsed or args.flame_speedscope:
+        sampler = StackSampler(args.flame_interval / 1000, include_lines=args.flame_lines,
+                               name=os.path.basename(args.file)).start(analyzer)
+    if args.debug or args.breakpoints:
+        # installed last so the wrappers above run inside its hooks
+        debugger = Debugger().install(analyzer)
+        shell = DebuggerShell(debugger, source)
+        for spec in args.breakpoints or ():
+            shell.onecmd(f"break {spec}")
+        # ctrl-c pauses the program instead of stopping it
+        signal.signal(signal.SIGINT, lambda signum, frame: debugger.interrupt())
+        if args.debug:
+            shell.start()
+    execute_start = time.perf_counter()
+    try:
+        analyzer.parse_program()
+    finally:
+        if timer is not None:
+            timer.cancel()
+        if profiler is not None:
+            profiler.stop()
+        if sampler is not None:
+            sampler.stop()
+        output_sink.close()
+    execute_seconds = time.perf_counter() - execute_start
+
+    if sampler is not None:
+        if args.flame_collapsed:
+            sampler.write_collapsed(args.flame_collapsed)
+        if args.flame_speedscope:
+            sampler.write_speedscope(args.flame_speedscope, source_path=args.file)
+
+    if profiler is not None:
+        report = profiler.report(program)
+        if args.profile or not args.profile_json:
+            sys.stderr.write(report.format_table(sort=args.profile_sort))
+        if args.profile_json:
+            report.export_json(args.profile_json)
+
+    if tracer is not None:
+        if args.trace:
+            sys.stderr.write(tracer.format())
+        if args.trace_json:
+            tracer.export_json(args.trace_json)
+
+    report_metrics(RunMetrics.collect(analyzer, program, lex_seconds, execute_seconds), args)
+
+    if analyzer.cancelled:
+        return cancelled_status(cancel_token, 1)
+    return 1 if analyzer.error_messages else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,159 @@
+'''
+CMSC 124: LOLCODE Program Compiler
+Lexes and organizes a program once so it can be executed many times
+'''
+
+import hashlib
+import marshal
+import os
+import sys
+
+import lexer_analyzer
+from lexer_analyzer import tokenize, Token
+
+# compiled (.lolc) file layout version, bump when the layout changes
+LOLC_FORMAT_VERSION = 2
+LOLC_MAGIC = b"LOLC"
+LOLC_EXTENSION = ".lolc"
+
+
+def hash_source(source):
+    return hashlib.sha256(source.encode('utf-8')).hexdigest()
+
+
+def hash_file(path):
+    # None when the file cannot be read
+    try:
+        with open(path, "rb") as f:
+            return hashlib.sha256(f.read()).hexdigest()
+    except OSError:
+        return None
+
+
+# the tokens stored in a .lolc are what this lexer made of the source; any
+# edit to lexer_analyzer.py changes the hash, so older files are lexed again
+LEXER_VERSION = hash_file(lexer_analyzer.__file__)
+
+
+def organize_tokens_by_line(tokens):
+    # group all tokens by their line numbers so we can process line by line
+    lines = {}
+    for token in tokens:
+        # skip comment tokens since we dont need to parse them
+        if token.type != "Comment Line":
+            if token.line_number not in lines:
+                lines[token.line_number] = []
+            lines[token.line_number].append(token)
+    return lines
+
+
+def build_line_index(line_numbers):
+    # map each line number to its position in the ordered list
+    return {line_number: index for index, line_number in enumerate(line_numbers)}
+
+
+# token stream plus the line structure the syntax analyzer walks
+# (read-only once built, so one instance can back many runs)
+class CompiledProgram:
+    def __init__(self, tokens, source_hash=None, lines=None, line_numbers=None):
+        self.tokens = tokens
+        self.source_hash = source_hash
+        self.lines = lines if lines is not None else organize_tokens_by_line(tokens)
+        self.line_numbers = line_numbers if line_numbers is not None else sorted(self.lines.keys())
+        self.line_index = build_line_index(self.line_numbers)
+        # programs with GIMMEH depend on their input vector
+        self.reads_input = any(token.type == 'Input Keyword' for token in tokens)
+        # type_inference's TypedOperations, filled in by the first run
+        self.typed_operations = None
+
+    def __repr__(self):
+        return f"CompiledProgram({len(self.tokens)} tokens, {len(self.line_numbers)} lines)"
+
+
+def compile_source(source):
+    # lex and organize LOLCODE source into a reusable program
+    return CompiledProgram(tokenize(source), hash_source(source))
+
+
+def compiled_path_for(source_path=None, source_hash=None, cache_dir=None):
+    # a cache directory is keyed by content, otherwise the .lolc sits next to the .lol
+    if cache_dir:
+        return os.path.join(cache_dir, f"{source_hash}{LOLC_EXTENSION}")
+    if source_path:
+        return os.path.splitext(source_path)[0] + LOLC_EXTENSION
+    return None
+
+
+def save_compiled(program, path):
+    # tokens are stored as flat tuples, lines as lists of token indexes
+    token_index = {id(token): index for index, token in enumerate(program.tokens)}
+    payload = (
+        LOLC_FORMAT_VERSION,
+        tuple(sys.version_info[:2]),
+        LEXER_VERSION,
+        program.source_hash,
+        [(token.type, token.value, token.line_number) for token in program.tokens],
+        [(line_number, [token_index[id(token)] for token in program.lines[line_number]])
+         for line_number in program.line_numbers],
+    )
+
+    # write to a temp file first so readers never see a partial file
+    temp_path = f"{path}.{os.getpid()}.tmp"
+    with open(temp_path, "wb") as f:
+        f.write(LOLC_MAGIC)
+        f.write(marshal.dumps(payload))
+    os.replace(temp_path, path)
+
+
+def load_compiled(path, expected_hash=None):
+    # returns None when the file is missing, stale or from another format
+    try:
+        with open(path, "rb") as f:
+            data = f.read()
+    except OSError:
+        return None
+
+    if not data.startswith(LOLC_MAGIC):
+        return None
+    try:
+        version, python_version, lexer_version, source_hash, raw_tokens, raw_lines = marshal.loads(
+            data[len(LOLC_MAGIC):])
+    except (EOFError, ValueError, TypeError):
+        return None
+
+    # marshal data is only portable within one python version
+    if version != LOLC_FORMAT_VERSION or tuple(python_version) != tuple(sys.version_info[:2]):
+        return None
+    # an unknown lexer version matches nothing, not even itself
+    if LEXER_VERSION is None or lexer_version != LEXER_VERSION:
+        return None
+    if expected_hash is not None and source_hash != expected_hash:
+        return None
+
+    tokens = [Token(token_type, value, line_number) for token_type, value, line_number in raw_tokens]
+    lines = {line_number: [tokens[index] for index in indexes] for line_number, indexes in raw_lines}
+    line_numbers = [line_number for line_number, _ in raw_lines]
+    return CompiledProgram(tokens, source_hash, lines, line_numbers)
+
+
+def load_or_compile(source, source_path=None, cache_dir=None):
+    # reuse the compiled form when the source is unchanged, else compile and store it
+    source_hash = hash_source(source)
+    path = compiled_path_for(source_path, source_hash, cache_dir)
+
+    if path:
+        program = load_compiled(path, expected_hash=source_hash)
+        if program is not None:
+            return program
+
+    program = CompiledProgram(tokenize(source), source_hash)
+
+    if path:
+        try:
+            if cache_dir:
+                os.makedirs(cache_dir, exist_ok=True)
+            save_compiled(program, path)
+        except OSError:
+            # an unwritable cache only costs us the speedup
+            pass
+    return program
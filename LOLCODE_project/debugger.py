@@ -0,0 +1,440 @@
+'''
+CMSC 124: LOLCODE Debugger
+Line and function breakpoints, watches and stepping into, over and out of
+I IZ calls, with a command line front end. The debugger's hooks are only
+in the analyzer's dispatch path while something needs them: with nothing
+set, a run executes exactly the code of a plain run
+'''
+
+import bisect
+import cmd
+
+# how the run goes on after a pause: to the next breakpoint, or to the next
+# statement anywhere, in the same call or its callers, or after the call returns
+RUN = "run"
+STEP = "step"
+NEXT = "next"
+OUT = "out"
+
+# analyzer methods the debugger can replace
+HOOKED_METHODS = ("parse_line", "call_function")
+
+# lines that belong to a block instead of running as statements of their
+# own; a breakpoint on one moves to the next statement
+BLOCK_LINES = ('HAI', 'KTHXBYE', 'OIC', 'YA RLY', 'NO WAI', 'MEBBE', 'OMG', 'OMGWTF', 'IM OUTTA YR', 'IF U SAY SO')
+
+# source lines shown around the current one by the shell's list command
+LIST_CONTEXT = 5
+
+
+# where and why the run stopped; function is None at the top level
+class PauseEvent:
+    __slots__ = ("reason", "line", "depth", "function")
+
+    def __init__(self, reason, line, depth, function):
+        self.reason = reason
+        self.line = line
+        self.depth = depth
+        self.function = function
+
+    def __str__(self):
+        where = f" in '{self.function}'" if self.function is not None else ""
+        return f"Paused at line {self.line}{where} ({self.reason})"
+
+
+# breakpoints and stepping for one analyzer; on_pause is called with the
+# debugger and a PauseEvent, inspects what it wants and picks how the run
+# goes on (cont, step, step_over, step_out or quit) before it returns
+class Debugger:
+    def __init__(self, on_pause=None):
+        self.on_pause = on_pause
+        self.breakpoints = set()
+        self.function_breakpoints = set()
+        # watched name -> (value, type) last seen, None while undeclared
+        self.watches = {}
+        self.mode = RUN
+        self.step_depth = 0
+        # reason of a stop requested by a function breakpoint
+        self.pending_reason = None
+        # the PauseEvent while the run is paused
+        self.paused = None
+        self.analyzer = None
+        self._saved = {}
+        self._inner_parse_line = None
+        self._inner_call_function = None
+
+    def install(self, analyzer):
+        # install last: tracer, profiler and history wrappers run inside the hooks
+        self.analyzer = analyzer
+        self._saved = {name: analyzer.__dict__.get(name) for name in HOOKED_METHODS}
+        self._inner_parse_line = analyzer.parse_line
+        self._inner_call_function = analyzer.call_function
+        self._update_hooks()
+        return self
+
+    def uninstall(self):
+        for name in HOOKED_METHODS:
+            self._set_hook(name, None)
+
+    def _set_hook(self, name, hook):
+        # None puts back what was there before install (nothing, for a plain analyzer)
+        analyzer = self.analyzer
+        if hook is None:
+            hook = self._saved.get(name)
+        if hook is None:
+            analyzer.__dict__.pop(name, None)
+        else:
+            setattr(analyzer, name, hook)
+
+    def _update_hooks(self):
+        if self.analyzer is None:
+            return
+        line_hook = self.breakpoints or self.watches or self.mode != RUN
+        self._set_hook("parse_line", self._debug_parse_line if line_hook else None)
+        self._set_hook("call_function", self._debug_call_function if self.function_breakpoints else None)
+
+    def _debug_parse_line(self):
+        # lines skipped after a GTFO do not run, so they do not stop either
+        if not self.analyzer.break_requested:
+            reason = self._stop_reason()
+            if reason is not None:
+                self._pause(reason)
+        return self._inner_parse_line()
+
+    def _debug_call_function(self, function, arguments):
+        if function.name in self.function_breakpoints:
+            # stop at the first statement of the body
+            self.pending_reason = f"breakpoint in function '{function.name}'"
+            self.mode = STEP
+            self._update_hooks()
+        return self._inner_call_function(function, arguments)
+
+    def _stop_reason(self):
+        reasons = self._changed_watches() if self.watches else []
+        mode = self.mode
+        if mode != RUN:
+            depth = self.depth()
+            if mode == STEP or (mode == NEXT and depth <= self.step_depth) or (mode == OUT and depth < self.step_depth):
+                reasons.insert(0, self.pending_reason or "step")
+        line = self.analyzer.current_line_number
+        if line in self.breakpoints:
+            reasons.append(f"breakpoint at line {line}")
+        return ", ".join(reasons) if reasons else None
+
+    def _changed_watches(self):
+        changed = []
+        for name, last in self.watches.items():
+            current = self._watched_value(name)
+            if current != last:
+                self.watches[name] = current
+                changed.append(f"'{name}' is now {current[0] if current is not None else 'undeclared'}")
+        return changed
+
+    def _watched_value(self, name):
+        info = self.analyzer.lookup(name)
+        return (info.get("value"), info.get("type")) if info is not None else None
+
+    def _pause(self, reason):
+        analyzer = self.analyzer
+        frame = analyzer.frame
+        event = PauseEvent(reason, analyzer.current_line_number, self.depth(),
+                           frame.function.name if frame is not None else None)
+        # what the program printed so far comes before the pause
+        analyzer.output_sink.flush()
+        self.mode = RUN
+        self.pending_reason = None
+        self.paused = event
+        try:
+            if self.on_pause is not None:
+                self.on_pause(self, event)
+        finally:
+            self.paused = None
+        self._update_hooks()
+
+    # how to go on, called from on_pause (or before the run starts)
+    def cont(self):
+        self.mode = RUN
+        self._update_hooks()
+
+    def step(self):
+        self.mode = STEP
+        self._update_hooks()
+
+    def step_over(self):
+        self.mode = NEXT
+        self.step_depth = self.depth()
+        self._update_hooks()
+
+    def step_out(self):
+        self.mode = OUT
+        self.step_depth = self.depth()
+        self._update_hooks()
+
+    def quit(self):
+        # the analyzer stops at its next cancellation check, keeping its output
+        self.analyzer.cancel_token.cancel("stopped by debugger")
+        self.cont()
+
+    def interrupt(self):
+        # pause at the next statement; safe from another thread or a signal handler
+        self.step()
+
+    # breakpoints and watches, once installed
+    def statement_line(self, line):
+        # first line at or after `line` that runs as a statement, None past the end
+        analyzer = self.analyzer
+        numbers = analyzer.line_numbers
+        for index in range(bisect.bisect_left(numbers, line), len(numbers)):
+            if analyzer.lines[numbers[index]][0].value not in BLOCK_LINES:
+                return numbers[index]
+        return None
+
+    def add_breakpoint(self, line):
+        # the line the breakpoint was put on, None when nothing runs at or after it
+        line = self.statement_line(line)
+        if line is not None:
+            self.breakpoints.add(line)
+            self._update_hooks()
+        return line
+
+    def remove_breakpoint(self, line):
+        if line not in self.breakpoints:
+            return False
+        self.breakpoints.discard(line)
+        self._update_hooks()
+        return True
+
+    def add_function_breakpoint(self, name):
+        self.function_breakpoints.add(name)
+        self._update_hooks()
+
+    def remove_function_breakpoint(self, name):
+        if name not in self.function_breakpoints:
+            return False
+        self.function_breakpoints.discard(name)
+        self._update_hooks()
+        return True
+
+    def clear_breakpoints(self):
+        self.breakpoints.clear()
+        self.function_breakpoints.clear()
+        self._update_hooks()
+
+    def watch(self, name):
+        # stops at the first statement after the value changes
+        self.watches[name] = self._watched_value(name)
+        self._update_hooks()
+
+    def unwatch(self, name):
+        if name not in self.watches:
+            return False
+        del self.watches[name]
+        self._update_hooks()
+        return True
+
+    def defines_function(self, name):
+        # whether the program has a HOW IZ I for `name`
+        lines = self.analyzer.lines
+        return any(lines[number][0].value == 'HOW IZ I' and len(lines[number]) > 1 and lines[number][1].value == name
+                   for number in self.analyzer.line_numbers)
+
+    # state of the paused run
+    def depth(self):
+        frame = self.analyzer.frame
+        return frame.depth if frame is not None else 0
+
+    def it(self):
+        return self.analyzer.variables.get("IT")
+
+    def lookup(self, name):
+        return self.analyzer.lookup(name)
+
+    def variables(self):
+        # what the current statement sees: its call's scope, then the globals it does not shadow
+        analyzer = self.analyzer
+        variables = dict(analyzer.variables)
+        if analyzer.frame is not None:
+            for name, info in analyzer.globals.items():
+                variables.setdefault(name, info)
+        return variables
+
+    def stack(self):
+        # (function, line) of the current statement and of each call to it, innermost
+        # first; the last entry is the top level, with function None
+        analyzer = self.analyzer
+        entries = []
+        line = analyzer.current_line_number
+        frame = analyzer.frame
+        while frame is not None:
+            entries.append((frame.function.name, line))
+            line = frame.call_line
+            frame = frame.parent
+        entries.append((None, line))
+        return entries
+
+
+def format_entry(name, info):
+    if info is None:
+        return f"{name} is not declared"
+    return f"{name} = {info.get('value', 'NOOB')} ({info.get('type', 'NOOB')})"
+
+
+# command line front end: takes commands before the run starts and at every pause
+class DebuggerShell(cmd.Cmd):
+    prompt = "(lol-db) "
+    intro = "LOLCODE debugger: set breakpoints, then 'run' ('help' lists the commands)"
+
+    def __init__(self, debugger, source=None, stdin=None, stdout=None):
+        super().__init__(stdin=stdin, stdout=stdout)
+        if stdin is not None:
+            self.use_rawinput = False
+        self.debugger = debugger
+        self.source_lines = source.splitlines() if source else []
+        # last line shown by list, the next list goes on from there
+        self.listed_line = None
+        debugger.on_pause = self.on_pause
+
+    def say(self, text):
+        self.stdout.write(text + "\n")
+
+    def start(self):
+        # before the run: returns once a command starts it
+        self.cmdloop()
+
+    def on_pause(self, debugger, event):
+        self.say(str(event))
+        self.show_lines(event.line, event.line)
+        self.listed_line = None
+        self.cmdloop(intro="")
+
+    def show_lines(self, first, last):
+        current = self.debugger.paused.line if self.debugger.paused is not None else None
+        for number in range(max(first, 1), min(last, len(self.source_lines)) + 1):
+            marker = "->" if number == current else "  "
+            flag = "B" if number in self.debugger.breakpoints else " "
+            self.say(f"{number:>5} {flag}{marker} {self.source_lines[number - 1]}")
+        self.listed_line = last
+
+    def emptyline(self):
+        # repeats step and next, like most debuggers; nothing else is repeated
+        if self.lastcmd.split(" ")[0] in ("s", "step", "n", "next"):
+            return self.onecmd(self.lastcmd)
+        return False
+
+    def default(self, line):
+        self.say(f"Unknown command '{line}', 'help' lists the commands")
+
+    def do_break(self, argument):
+        """break [LINE | FUNCTION]: stop at a line or in a function; lists the breakpoints without one"""
+        debugger = self.debugger
+        argument = argument.strip()
+        if not argument:
+            for line in sorted(debugger.breakpoints):
+                self.say(f"line {line}")
+            for name in sorted(debugger.function_breakpoints):
+                self.say(f"function {name}")
+            if not debugger.breakpoints and not debugger.function_breakpoints:
+                self.say("No breakpoints")
+        elif argument.isdigit():
+            line = debugger.add_breakpoint(int(argument))
+            if line is None:
+                self.say(f"No statement at or after line {argument}")
+            else:
+                self.say(f"Breakpoint at line {line}")
+        else:
+            debugger.add_function_breakpoint(argument)
+            note = "" if debugger.defines_function(argument) else " (not defined in this program)"
+            self.say(f"Breakpoint in function '{argument}'{note}")
+
+    def do_clear(self, argument):
+        """clear [LINE | FUNCTION]: remove a breakpoint, or all of them"""
+        debugger = self.debugger
+        argument = argument.strip()
+        if not argument:
+            debugger.clear_breakpoints()
+            self.say("All breakpoints removed")
+        elif argument.isdigit() and debugger.remove_breakpoint(int(argument)):
+            self.say(f"Removed breakpoint at line {argument}")
+        elif debugger.remove_function_breakpoint(argument):
+            self.say(f"Removed breakpoint in function '{argument}'")
+        else:
+            self.say(f"No breakpoint at '{argument}'")
+
+    def do_watch(self, argument):
+        """watch NAME: stop after the value of a variable changes"""
+        if not argument.strip():
+            self.say("Usage: watch NAME")
+            return
+        self.debugger.watch(argument.strip())
+        self.say(f"Watching '{argument.strip()}'")
+
+    def do_unwatch(self, argument):
+        """unwatch NAME: stop watching a variable"""
+        if not self.debugger.unwatch(argument.strip()):
+            self.say(f"'{argument.strip()}' is not watched")
+
+    def do_run(self, argument):
+        """run: start the program (the same as continue)"""
+        return self.do_continue(argument)
+
+    def do_continue(self, argument):
+        """continue (c): run to the next breakpoint"""
+        self.debugger.cont()
+        return True
+
+    def do_step(self, argument):
+        """step (s): run the next statement, stepping into I IZ calls"""
+        self.debugger.step()
+        return True
+
+    def do_next(self, argument):
+        """next (n): run the next statement, stepping over I IZ calls"""
+        self.debugger.step_over()
+        return True
+
+    def do_finish(self, argument):
+        """finish: run until the current function call returns"""
+        self.debugger.step_out()
+        return True
+
+    def do_print(self, argument):
+        """print (p) [NAME]: show a variable, or IT"""
+        name = argument.strip() or "IT"
+        self.say(format_entry(name, self.debugger.lookup(name)))
+
+    def do_vars(self, argument):
+        """vars: show every variable the current statement sees"""
+        for name, info in self.debugger.variables().items():
+            self.say(format_entry(name, info))
+
+    def do_where(self, argument):
+        """where (bt): show the function calls leading to the current statement"""
+        for function, line in self.debugger.stack():
+            self.say(f"  line {line:<5} {function if function is not None else '(top level)'}")
+
+    def do_list(self, argument):
+        """list (l) [LINE]: show the source around a line, or the next lines"""
+        if argument.strip().isdigit():
+            center = int(argument)
+        elif self.listed_line is not None:
+            center = self.listed_line + LIST_CONTEXT + 1
+        elif self.debugger.paused is not None:
+            center = self.debugger.paused.line
+        else:
+            center = LIST_CONTEXT + 1
+        self.show_lines(center - LIST_CONTEXT, center + LIST_CONTEXT)
+
+    def do_quit(self, argument):
+        """quit (q): stop the program"""
+        self.debugger.quit()
+        return True
+
+    do_b = do_break
+    do_c = do_continue
+    do_s = do_step
+    do_n = do_next
+    do_p = do_print
+    do_bt = do_where
+    do_l = do_list
+    do_q = do_quit
+    do_EOF = do_quit
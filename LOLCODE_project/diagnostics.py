@@ -0,0 +1,152 @@
+'''
+CMSC 124: LOLCODE Diagnostics
+Structured error reports (code, severity, line, expected, found) shared by
+the analyzer, live diagnostics and the checker
+'''
+
+import json
+
+ERROR = "error"
+WARNING = "warning"
+SEVERITIES = (ERROR, WARNING)
+
+# diagnostic codes, grouped by the construct they belong to:
+# E1xx expressions, E2xx declarations and casts, E3xx input/output,
+# E4xx conditionals and switches, E5xx loops, E6xx functions, E7xx statements,
+# E8xx/W8xx whole-program checks made by static_analysis before a run
+CODES = {
+    "E101": "unknown operation",
+    "E102": "missing operand",
+    "E103": "invalid boolean operand",
+    "E104": "missing first operand",
+    "E105": "missing 'AN' between operands",
+    "E106": "missing second operand",
+    "E107": "unexpected 'AN'",
+    "E108": "missing 'MKAY'",
+    "E109": "no operands",
+    "E110": "nested SMOOSH",
+    "E111": "too few operands",
+    "E201": "invalid variable name",
+    "E202": "missing initial value",
+    "E203": "invalid assignment target",
+    "E204": "missing assignment operator",
+    "E205": "missing assigned value",
+    "E206": "missing 'A' after 'MAEK'",
+    "E207": "missing value to cast",
+    "E208": "missing type",
+    "E209": "missing 'IS NOW A'",
+    "E210": "unclosed WAZZUP block, missing 'BUHBYE'",
+    "E301": "missing output",
+    "E302": "invalid output token",
+    "E303": "missing input variable",
+    "E304": "undeclared input variable",
+    "E305": "no input available",
+    "E401": "missing 'O RLY?'",
+    "E402": "missing 'YA RLY'",
+    "E403": "unclosed block, missing 'OIC'",
+    "E404": "missing 'WTF?'",
+    "E405": "missing case literal",
+    "E406": "switch without cases",
+    "E407": "case outside of a switch",
+    "E408": "missing 'MEBBE' condition",
+    "E501": "missing 'IM IN YR'",
+    "E502": "missing loop label",
+    "E503": "missing loop operation",
+    "E504": "missing 'YR' in loop header",
+    "E505": "missing loop variable",
+    "E506": "missing loop condition keyword",
+    "E507": "invalid loop condition",
+    "E508": "unclosed loop, missing 'IM OUTTA YR'",
+    "E509": "loop label mismatch",
+    "E601": "missing 'HOW IZ I'",
+    "E602": "missing function name",
+    "E603": "missing parameter name",
+    "E604": "missing 'AN' between parameters",
+    "E605": "unclosed function, missing 'IF U SAY SO'",
+    "E606": "missing 'I IZ'",
+    "E607": "missing called function name",
+    "E608": "missing argument",
+    "E609": "invalid argument",
+    "E610": "undefined function",
+    "E611": "wrong number of arguments",
+    "E612": "'FOUND YR' outside of a function",
+    "E613": "missing return value",
+    "E614": "invalid return value",
+    "E615": "maximum call depth exceeded",
+    "E701": "invalid token",
+    "E702": "undefined variable",
+    "E703": "unknown statement",
+    "E704": "unexpected statement",
+    "E705": "missing 'KTHXBYE'",
+    "E706": "missing 'HAI'",
+    "E707": "unexpected token after statement",
+    "E708": "unmatched block keyword",
+    "E709": "block keyword outside of its block",
+    "E710": "missing value",
+    "E711": "invalid value",
+    "E801": "undeclared variable",
+    "E802": "function called before its definition",
+    "W801": "unreachable code",
+}
+
+# reported for messages logged without a code
+UNKNOWN_CODE = "E000"
+
+
+# one problem found in a program; str() gives the analyzer's error line
+class Diagnostic:
+    __slots__ = ("code", "severity", "line", "message", "expected", "found")
+
+    def __init__(self, code, message, line=None, expected=None, found=None, severity=ERROR):
+        self.code = code or UNKNOWN_CODE
+        self.severity = severity
+        self.line = line
+        self.message = message
+        self.expected = expected
+        self.found = found
+
+    def describe(self):
+        # the message with what was expected and found, without the line
+        if self.expected and self.found:
+            return f"{self.message}. Expected '{self.expected}', but found '{self.found}'"
+        if self.expected:
+            return f"{self.message}. Expected '{self.expected}'"
+        if self.found:
+            return f"{self.message} '{self.found}'"
+        return self.message
+
+    def __str__(self):
+        prefix = "Syntax Error" if self.severity == ERROR else "Warning"
+        if self.line is None:
+            return f"{prefix}: {self.describe()}"
+        return f"{prefix}: {self.describe()} (line {self.line})"
+
+    def __repr__(self):
+        return f"Diagnostic({self.code!r}, {self.describe()!r}, line={self.line!r})"
+
+    def at(self, line):
+        # the same diagnostic reported on another line
+        return Diagnostic(self.code, self.message, line, self.expected, self.found, self.severity)
+
+    def to_dict(self):
+        return {
+            "code": self.code,
+            "severity": self.severity,
+            "line": self.line,
+            "message": self.message,
+            "expected": self.expected,
+            "found": self.found,
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data.get("code"), data["message"], data.get("line"), data.get("expected"),
+                   data.get("found"), data.get("severity", ERROR))
+
+
+def count_errors(diagnostics):
+    return sum(1 for diagnostic in diagnostics if diagnostic.severity == ERROR)
+
+
+def diagnostics_to_json(diagnostics):
+    return json.dumps([diagnostic.to_dict() for diagnostic in diagnostics], indent=2) + "\n"
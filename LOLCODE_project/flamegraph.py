@@ -0,0 +1,141 @@
+'''
+CMSC 124: LOLCODE Flame Graphs
+Samples the LOLCODE call stack (functions and loops) and writes it as
+collapsed stacks or speedscope JSON
+'''
+
+import json
+import threading
+import time
+
+# seconds between samples, the interpreter thread only pays for the GIL hand-off
+DEFAULT_SAMPLE_INTERVAL = 0.005
+
+SPEEDSCOPE_SCHEMA = "https://www.speedscope.app/file-format-schema.json"
+
+
+# background sampler of an analyzer's call_stack, aggregated by unique stack
+class StackSampler:
+    def __init__(self, interval=DEFAULT_SAMPLE_INTERVAL, include_lines=False, name="program"):
+        self.interval = interval
+        # also end each stack with the line that was running
+        self.include_lines = include_lines
+        self.name = name
+        # stack (tuple of frame keys) -> [samples, weight in ns]
+        self.stacks = {}
+        # frame key -> source line shown for it
+        self.frame_lines = {}
+        self.samples = 0
+        self.elapsed_ns = 0
+        self._stop = threading.Event()
+        self._thread = None
+        self._start_ns = None
+
+    def start(self, analyzer):
+        self._start_ns = time.perf_counter_ns()
+        self._thread = threading.Thread(target=self._run, args=(analyzer,), daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        if self._start_ns is not None:
+            self.elapsed_ns = time.perf_counter_ns() - self._start_ns
+
+    def _run(self, analyzer):
+        clock = time.perf_counter_ns
+        last = clock()
+        stacks = self.stacks
+        while not self._stop.wait(self.interval):
+            now = clock()
+            weight = now - last
+            last = now
+            line = analyzer.current_line_number
+            if line is None:
+                continue
+
+            # the frames are copied in one step, the interpreter keeps running
+            frames = tuple(analyzer.call_stack)
+            stack = self._stack_key(analyzer, frames, line)
+            entry = stacks.get(stack)
+            if entry is None:
+                stacks[stack] = [1, weight]
+            else:
+                entry[0] += 1
+                entry[1] += weight
+            self.samples += 1
+
+    def _stack_key(self, analyzer, frames, line):
+        keys = [self.name]
+        for kind, name, frame_line in frames:
+            if kind == 'function':
+                key = name
+                if key not in self.frame_lines:
+                    function = analyzer.functions.get(name)
+                    self.frame_lines[key] = function.header_line if function else frame_line
+            else:
+                key = f"{kind} {name}"
+                self.frame_lines.setdefault(key, frame_line)
+            keys.append(key)
+        if self.include_lines:
+            key = f"line {line}"
+            self.frame_lines.setdefault(key, line)
+            keys.append(key)
+        return tuple(keys)
+
+    def collapsed(self, weighted=False):
+        # one "frame;frame;frame count" line per stack (flamegraph.pl, inferno)
+        lines = []
+        for stack, (count, weight) in sorted(self.stacks.items()):
+            value = weight // 1000 if weighted else count
+            lines.append(f"{';'.join(stack)} {value}")
+        return "\n".join(lines) + ("\n" if lines else "")
+
+    def write_collapsed(self, path, weighted=False):
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(self.collapsed(weighted))
+
+    def speedscope(self, source_path=None):
+        # a single "sampled" profile, weights in nanoseconds
+        frames = []
+        frame_index = {}
+        samples = []
+        weights = []
+        for stack, (_, weight) in sorted(self.stacks.items()):
+            indexes = []
+            for key in stack:
+                if key not in frame_index:
+                    frame_index[key] = len(frames)
+                    frame = {"name": key}
+                    if source_path:
+                        frame["file"] = source_path
+                    if key in self.frame_lines:
+                        frame["line"] = self.frame_lines[key]
+                    frames.append(frame)
+                indexes.append(frame_index[key])
+            samples.append(indexes)
+            weights.append(weight)
+
+        return {
+            "$schema": SPEEDSCOPE_SCHEMA,
+            "name": self.name,
+            "exporter": "lolcode-interpreter",
+            "activeProfileIndex": 0,
+            "shared": {"frames": frames},
+            "profiles": [{
+                "type": "sampled",
+                "name": self.name,
+                "unit": "nanoseconds",
+                "startValue": 0,
+                "endValue": sum(weights),
+                "samples": samples,
+                "weights": weights,
+            }],
+        }
+
+    def write_speedscope(self, path, source_path=None):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.speedscope(source_path), f)
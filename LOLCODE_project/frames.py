@@ -0,0 +1,62 @@
+'''
+CMSC 124: LOLCODE Call Frames
+Every HOW IZ I call runs in a frame of its own holding its parameters,
+locals and IT; frames are pooled so deep recursion does not allocate
+a new scope per call
+'''
+
+# frames kept for reuse once their call returns
+FRAME_POOL_LIMIT = 256
+
+
+# the scope of one function call
+class Frame:
+    __slots__ = ("function", "variables", "parent", "call_line", "call_position", "depth")
+
+    def __init__(self):
+        self.function = None
+        # parameters, locals and the call's own IT
+        self.variables = {}
+        # frame of the caller, None when called from the top level
+        self.parent = None
+        # where the call was made, execution resumes there on return
+        self.call_line = None
+        self.call_position = 0
+        self.depth = 0
+
+    def __repr__(self):
+        name = self.function.name if self.function is not None else None
+        return f"Frame({name!r}, depth={self.depth})"
+
+
+# hands out frames and takes them back when their call returns
+class FramePool:
+    def __init__(self, limit=FRAME_POOL_LIMIT):
+        self.limit = limit
+        self._free = []
+
+    def new_frame(self):
+        # called when the pool is empty
+        return Frame()
+
+    def acquire(self, function, parent, call_line, call_position):
+        frame = self._free.pop() if self._free else self.new_frame()
+        frame.function = function
+        frame.parent = parent
+        frame.call_line = call_line
+        frame.call_position = call_position
+        frame.depth = parent.depth + 1 if parent is not None else 1
+        frame.variables["IT"] = {"value": "NOOB", "type": "NOOB"}
+        return frame
+
+    def release(self, frame):
+        # the scope is emptied so the pool keeps no values alive
+        frame.variables.clear()
+        frame.function = None
+        frame.parent = None
+        if len(self._free) < self.limit:
+            self._free.append(frame)
+
+    def __len__(self):
+        return len(self._free)
+
@@ -2,8 +2,22 @@ import customtkinter as ctk
 import tkinter as tk
 from tkinter import filedialog, messagebox
 import os
-from lexer_analyzer import tokenize
+import queue
+import threading
+import time
+from compiler import load_or_compile
 from syntax_analyzer import SyntaxAnalyzer
+from input_streams import CallbackInput
+from output_sinks import QueueSink
+from cancellation import CancellationToken
+from checkpoints import CheckpointRecorder
+from tracer import StatementTracer
+from profiler import Profiler
+from symbol_history import SymbolHistory
+from debugger import Debugger
+from metrics import RunMetrics
+from virtual_table import VirtualTable
+from live_diagnostics import LiveAnalyzer
 
 # color scheme
 BG = "#0B1220"
@@ -13,8 +27,47 @@ ACCENT_PURPLE = "#9B63FF"
 CLEAR_RED = "#880808"
 TEXT = "#D6E6FF"
 
+# how often (ms) and for how long (s) the ui drains worker updates
+UI_DRAIN_INTERVAL_MS = 50
+UI_DRAIN_BUDGET = 0.02
+
+# live analysis runs this long (ms) after the last keystroke
+LIVE_ANALYSIS_DELAY_MS = 150
+
+# trace events shown in the console after a traced run
+TRACE_CONSOLE_LIMIT = 200
+
+# editor highlight colors by token category, other categories count as keywords
+TOKEN_COLORS = {
+    'YARN Literal': "#E6C07B",
+    'NUMBR Literal': "#D19A66",
+    'NUMBAR Literal': "#D19A66",
+    'TROOF Literal': "#56B6C2",
+    'Type Literal': "#56B6C2",
+    'Variable Identifier': TEXT,
+    'INVALID TOKEN': "#FF6B6B",
+}
+KEYWORD_COLOR = "#C39BFF"
+COMMENT_COLOR = "#5C6B7A"
+ERROR_LINE_BG = "#3A1620"
+HISTORY_LINE_BG = "#2A2150"
+PAUSED_LINE_BG = "#1F3A2A"
+BREAKPOINT_BG = "#7A1F2B"
+
+# profile gutter colors, coolest to hottest line
+HEAT_COLORS = ["#4F6274", "#7F9A6A", "#C9B458", "#E08A4B", "#FF5C5C"]
+
 ctk.set_appearance_mode("dark") # modes : "dark", "light"
 
+
+# symbol table snapshot as (identifier, value, type) rows
+def symbol_rows(variables):
+    if not variables:
+        return []
+    return [(identifier, info.get("value", "NOOB"), str(info.get("type", "")))
+            for identifier, info in variables.items()]
+
+
 # main gui class
 class LOLCodeInterpreterGUI:  
     def __init__(self): # default 
@@ -25,6 +78,38 @@ class LOLCodeInterpreterGUI:
         self.root.minsize(900, 600)
 
         self.current_file = None
+
+        # updates from the execution thread, drained on a root.after timer
+        self.ui_queue = queue.Queue()
+        self.worker = None
+        self.cancel_token = None
+
+        # checkpoints of the last run, the next run resumes from them when it can
+        self.last_checkpoints = None
+
+        # statement trace of the last traced run
+        self.last_trace = None
+
+        # symbol history of the last run with History on, and the step shown
+        self.last_history = None
+        self.history_step = 0
+
+        # editor lines with a breakpoint, the running program's debugger, and
+        # where the paused worker waits for its next command (None while running)
+        self.breakpoints = set()
+        self.debugger = None
+        self.debug_reply = None
+
+        # counters of the last run (metrics.RunMetrics)
+        self.last_metrics = None
+
+        # profile shown beside the gutter, until the line count changes
+        self.profile_shown = False
+
+        # live analysis state (None while the switch is off)
+        self.live_analyzer = None
+        self.live_job = None
+
         self.create_gui()
         self._configure_grid_weights()  # enable full resizing
 
@@ -59,6 +144,15 @@ class LOLCodeInterpreterGUI:
         editor_label_frame.pack(fill="x", padx=6, pady=(8, 4))
         ctk.CTkLabel(editor_label_frame, text="Text Editor", font=("Arial", 13, "bold"),
                      text_color=TEXT).pack(side="left", anchor="w")
+        self.live_switch = ctk.CTkSwitch(editor_label_frame, text="Live analysis", font=("Arial", 11),
+                                         text_color=TEXT, progress_color=ACCENT_PURPLE,
+                                         command=self.toggle_live_analysis)
+        self.live_switch.pack(side="right")
+
+        # live diagnostics summary under the editor
+        self.live_status = ctk.CTkLabel(editor_frame, text="", font=("Arial", 11), text_color=TEXT,
+                                        anchor="w", justify="left")
+        self.live_status.pack(side="bottom", fill="x", padx=10, pady=(0, 6))
 
         # line numbers + text editor container
         editor_container = ctk.CTkFrame(editor_frame, fg_color=INNER)
@@ -71,16 +165,41 @@ class LOLCodeInterpreterGUI:
                                     font=("Courier New", 12), state="disabled", cursor="arrow",
                                     spacing1=0, spacing2=0, spacing3=0)
         self.line_numbers.pack(side="left", fill="y")
+        # clicking a line number sets or removes a breakpoint
+        self.line_numbers.tag_config("breakpoint", background=BREAKPOINT_BG, foreground=TEXT)
+        self.line_numbers.bind("<Button-1>", self.toggle_breakpoint)
+
+        # per-line profile annotations, packed next to the gutter after a profiled run
+        self.profile_gutter = tk.Text(editor_container, width=14, padx=4, pady=8, takefocus=0,
+                                      border=0, background=gutter_bg, foreground="#6B7B8C",
+                                      font=("Courier New", 12), state="disabled", cursor="arrow",
+                                      spacing1=0, spacing2=0, spacing3=0, wrap="none")
+        for level, color in enumerate(HEAT_COLORS):
+            self.profile_gutter.tag_config(f"heat{level}", foreground=color)
 
         # text editor textbox
         self.text_editor = ctk.CTkTextbox(editor_container, wrap="none", font=("Courier New", 12),
                                           fg_color="#091218", text_color=TEXT)
         self.text_editor.pack(side="left", fill="both", expand=True)
 
-        # bind events to sync scrolling and update line numbers
-        self.text_editor.bind("<KeyRelease>", lambda e: self.update_line_numbers())
+        # the gutter follows the editor's own scroll reports, whatever scrolled it
+        self.gutter_line_count = 0
+        self.text_editor._textbox.configure(yscrollcommand=self._on_editor_yscroll)
+
+        # highlight tags for live analysis, errors are drawn under the token colors
+        self.text_editor.tag_config("live_error", background=ERROR_LINE_BG)
+        self.text_editor.tag_config("history_line", background=HISTORY_LINE_BG)
+        self.text_editor.tag_config("paused_line", background=PAUSED_LINE_BG)
+        self.text_editor.tag_config("live_comment", foreground=COMMENT_COLOR)
+        self.text_editor.tag_config("live_keyword", foreground=KEYWORD_COLOR)
+        for category, color in TOKEN_COLORS.items():
+            self.text_editor.tag_config(self.token_tag(category), foreground=color)
+        self.text_editor.tag_config(self.token_tag('INVALID TOKEN'), underline=True)
+        self.live_tags = ["live_comment", "live_keyword"] + [self.token_tag(c) for c in TOKEN_COLORS]
+
+        # bind events to update line numbers
+        self.text_editor.bind("<KeyRelease>", self._on_editor_key)
         self.text_editor.bind("<ButtonRelease-1>", lambda e: self.update_line_numbers())
-        self.text_editor.bind("<MouseWheel>", lambda e: self.sync_scroll())
 
         # mid lexemes panel
         lex_panel = ctk.CTkFrame(self.root, fg_color=PANEL, corner_radius=16)
@@ -101,10 +220,10 @@ class LOLCodeInterpreterGUI:
         ctk.CTkLabel(headers, text="Classification", font=("Arial", 11, "bold"),
                      text_color=TEXT).pack(side="right")
 
-        # lexemes textbox
-        self.lexemes_textbox = ctk.CTkTextbox(lex_inner, wrap="none", font=("Courier New", 11),
-                                              fg_color="#08121a", text_color=TEXT)
-        self.lexemes_textbox.pack(fill="both", expand=True, padx=8, pady=(0, 8))
+        # lexemes table (only the rows in view are drawn)
+        self.lexeme_table = VirtualTable(lex_inner, columns=[("Lexeme", 22), ("Classification", 28), ("Line", 6)],
+                                         fg_color=INNER, text_color=TEXT, show_jump=True)
+        self.lexeme_table.pack(fill="both", expand=True, padx=8, pady=(0, 8))
 
         # right symbol table panel
         sym_panel = ctk.CTkFrame(self.root, fg_color=PANEL, corner_radius=16)
@@ -115,8 +234,25 @@ class LOLCodeInterpreterGUI:
         ctk.CTkLabel(sym_title_row, text="SYMBOL TABLE", font=("Arial", 14, "bold"),
                      text_color=TEXT).pack(side="left")
 
+        # step through the symbol history of the last run (History switch)
+        self.history_next_button = ctk.CTkButton(sym_title_row, text="▶", width=28, height=24, fg_color="#2A3350",
+                                                 hover_color="#3A4570", state="disabled",
+                                                 command=lambda: self.show_history_step(self.history_step + 1))
+        self.history_next_button.pack(side="right")
+        self.history_label = ctk.CTkLabel(sym_title_row, text="", font=("Arial", 11), text_color=TEXT)
+        self.history_label.pack(side="right", padx=6)
+        self.history_prev_button = ctk.CTkButton(sym_title_row, text="◀", width=28, height=24, fg_color="#2A3350",
+                                                 hover_color="#3A4570", state="disabled",
+                                                 command=lambda: self.show_history_step(self.history_step - 1))
+        self.history_prev_button.pack(side="right")
+        # jumps to any step, packed while there is a history to show
+        self.history_slider = ctk.CTkSlider(sym_panel, from_=0, to=1, progress_color=ACCENT_PURPLE,
+                                            button_color=ACCENT_PURPLE,
+                                            command=lambda value: self.show_history_step(round(value)))
+
         sym_inner = ctk.CTkFrame(sym_panel, fg_color=INNER, corner_radius=12) # symbol table inner frame
         sym_inner.pack(fill="both", expand=True, padx=12, pady=(0, 12))
+        self.sym_inner = sym_inner
 
         # symbol table headers
         sheaders = ctk.CTkFrame(sym_inner, fg_color=INNER)
@@ -126,10 +262,10 @@ class LOLCodeInterpreterGUI:
         ctk.CTkLabel(sheaders, text="Value", font=("Arial", 11, "bold"),
                      text_color=TEXT).pack(side="right")
 
-        # symbol table textbox
-        self.symbol_textbox = ctk.CTkTextbox(sym_inner, wrap="none", font=("Courier New", 11),
-                                             fg_color="#08121a", text_color=TEXT)
-        self.symbol_textbox.pack(fill="both", expand=True, padx=8, pady=(0, 8))
+        # symbol table (only the rows in view are drawn)
+        self.symbol_table = VirtualTable(sym_inner, columns=[("Identifier", 16), ("Value", 18), ("Type", 8)],
+                                         fg_color=INNER, text_color=TEXT)
+        self.symbol_table.pack(fill="both", expand=True, padx=8, pady=(0, 8))
 
         # execute & clear buttons
         controls_frame = ctk.CTkFrame(self.root, fg_color=BG)
@@ -137,8 +273,38 @@ class LOLCodeInterpreterGUI:
 
         ctk.CTkButton(controls_frame, text="🗑️ Clear", width=110, fg_color=CLEAR_RED,
                       hover_color="#9E5B4B", command=self.clear_all).pack(side="left", padx=(2, 6))
-        ctk.CTkButton(controls_frame, text="Execute", width=140, fg_color=ACCENT_PURPLE,
-                      hover_color=ACCENT_PURPLE, command=self.execute_code).pack(side="right", padx=(6, 2))
+
+        # debugger controls, usable while a program runs
+        self.continue_button = ctk.CTkButton(controls_frame, text="Pause", width=90, fg_color="#2A3350",
+                                             hover_color="#3A4570", state="disabled", command=self.debug_continue)
+        self.continue_button.pack(side="left", padx=(6, 2))
+        self.step_buttons = []
+        for text, command in (("Step Into", "step"), ("Step Over", "step_over"), ("Step Out", "step_out")):
+            button = ctk.CTkButton(controls_frame, text=text, width=90, fg_color="#2A3350", hover_color="#3A4570",
+                                   state="disabled", command=lambda command=command: self.debug_command(command))
+            button.pack(side="left", padx=2)
+            self.step_buttons.append(button)
+        self.break_functions_entry = ctk.CTkEntry(controls_frame, width=150, placeholder_text="break in functions")
+        self.break_functions_entry.pack(side="left", padx=(6, 2))
+        self.execute_button = ctk.CTkButton(controls_frame, text="Execute", width=140, fg_color=ACCENT_PURPLE,
+                                            hover_color=ACCENT_PURPLE, command=self.execute_code)
+        self.execute_button.pack(side="right", padx=(6, 2))
+        self.stop_button = ctk.CTkButton(controls_frame, text="Stop", width=110, fg_color="#2A3350",
+                                         hover_color="#3A4570", state="disabled", command=self.stop_code)
+        self.stop_button.pack(side="right", padx=(6, 2))
+        self.trace_switch = ctk.CTkSwitch(controls_frame, text="Trace", font=("Arial", 11), text_color=TEXT,
+                                          progress_color=ACCENT_PURPLE)
+        self.trace_switch.pack(side="right", padx=(6, 10))
+        self.profile_switch = ctk.CTkSwitch(controls_frame, text="Profile", font=("Arial", 11), text_color=TEXT,
+                                            progress_color=ACCENT_PURPLE)
+        self.profile_switch.pack(side="right", padx=(6, 10))
+        self.history_switch = ctk.CTkSwitch(controls_frame, text="History", font=("Arial", 11), text_color=TEXT,
+                                            progress_color=ACCENT_PURPLE)
+        self.history_switch.pack(side="right", padx=(6, 10))
+        ctk.CTkButton(controls_frame, text="Export Trace", width=110, fg_color="#2A3350", hover_color="#3A4570",
+                      command=self.export_trace).pack(side="right", padx=(6, 2))
+        ctk.CTkButton(controls_frame, text="Export Metrics", width=120, fg_color="#2A3350", hover_color="#3A4570",
+                      command=self.export_metrics).pack(side="right", padx=(6, 2))
 
         # bottom console panel
         console_frame = ctk.CTkFrame(self.root, fg_color=PANEL, corner_radius=14)
@@ -172,62 +338,370 @@ class LOLCodeInterpreterGUI:
                 self.text_editor.delete("1.0", "end")
                 self.text_editor.insert("1.0", content)
                 self.update_line_numbers()
+                self.schedule_live_analysis()
                 self.log_to_console(f"File loaded: {os.path.basename(filename)}\n")
             except Exception as e:
                 messagebox.showerror("Error", f"Failed to load file: {e}")
 
     # execute code function
     def execute_code(self):
+        if self.worker and self.worker.is_alive():
+            messagebox.showwarning("Warning", "A program is already running!")
+            return
+
         self.console_textbox.delete("1.0", "end")
         code = self.text_editor.get("1.0", "end-1c")
         if not code.strip():
             messagebox.showwarning("Warning", "No code to execute!")
             return
 
-        self.log_to_console("Running Lexical Analysis...\n")
+        # lexing, parsing and execution happen off the Tk main thread
+        self.execute_button.configure(state="disabled")
+        self.stop_button.configure(state="normal")
+        self.cancel_token = CancellationToken()
+        tracer = StatementTracer() if self.trace_switch.get() else None
+        profiler = Profiler() if self.profile_switch.get() else None
+        history = SymbolHistory() if self.history_switch.get() else None
+        # installed whatever is set; with no breakpoints it stays out of the run until Pause
+        self.debugger = Debugger()
+        break_functions = self.break_functions_entry.get().replace(",", " ").split()
+        self.hide_profile()
+        self.hide_history()
+        self.set_debug_buttons(running=True, paused=False)
+        self.worker = threading.Thread(target=self._run_program,
+                                       args=(code, self.current_file, self.cancel_token, tracer, profiler, history,
+                                             self.debugger, sorted(self.breakpoints), break_functions),
+                                       daemon=True)
+        self.worker.start()
+        self.root.after(UI_DRAIN_INTERVAL_MS, self._drain_ui_queue)
+
+    # stop the running program, its partial output and symbol table are kept
+    def stop_code(self):
+        if self.cancel_token:
+            self.cancel_token.cancel("stopped by user")
+        # a paused program has to be let go to see the cancellation
+        self.debug_command("quit")
+
+    # worker thread: everything it produces goes through the ui queue
+    def _run_program(self, code, source_path, cancel_token, tracer=None, profiler=None, history=None,
+                     debugger=None, breakpoints=(), break_functions=()):
+        post = self.ui_queue.put
+        post(("console", "Running Lexical Analysis...\n"))
         try:
-            tokens = tokenize(code)
-            self.display_lexemes(tokens)
-            self.log_to_console(f"Found {len(tokens)} tokens\n\n")
+            # a .lolc next to the loaded file is reused while the source is unchanged
+            lex_start = time.perf_counter()
+            program = load_or_compile(code, source_path=source_path)
+            lex_seconds = time.perf_counter() - lex_start
+            # the token list is shared read-only, the categories are found off the main thread
+            post(("lexemes", (program.tokens, {token.type for token in program.tokens})))
+            post(("console", f"Found {len(program.tokens)} tokens\n\n"))
         except Exception as e:
-            self.log_to_console(f"Lexer error: {e}\n")
+            post(("console", f"Lexer error: {e}\n"))
+            post(("done", None))
             return
 
-        self.log_to_console("Running Syntax Analysis & Execution...\n")
-        try:
-            parser_obj = SyntaxAnalyzer(tokens, log_function=self.log_to_console)
-            symbol_table = parser_obj.parse_program()
+        post(("console", "Running Syntax Analysis & Execution...\n"))
+        output_sink = QueueSink(self.ui_queue, "console", flush_threshold=4096)
 
-            self.display_symbol_table(symbol_table)
-        except Exception as e:
-            self.log_to_console(f"\nSyntax/Runtime error: {e}\n")
+        def request_input(variable_name):
+            # show pending output (e.g. the prompt), then wait for the dialog
+            output_sink.flush()
+            reply = queue.Queue(maxsize=1)
+            post(("input", (variable_name, reply)))
+            return reply.get()
 
-    # display lexemes in textbox
-    def display_lexemes(self, tokens):
-        self.lexemes_textbox.delete("1.0", "end")
-        for token in tokens:
-            self.lexemes_textbox.insert("end", f"{token.value:<25} {token.type}\n")
+        def pause(debugger, event):
+            # wait for a debug button (or Stop) to say how to go on
+            reply = queue.Queue(maxsize=1)
+            post(("paused", (event, symbol_rows(debugger.variables()), debugger.stack(), reply)))
+            getattr(debugger, reply.get())()
 
-    # display symbol table in textbox
+        parser_obj = None
+        execute_start = time.perf_counter()
+        try:
+            recorder = CheckpointRecorder(program, output_sink)
+            parser_obj = SyntaxAnalyzer(program, log_function=lambda message: post(("console", message)),
+                                        input_provider=CallbackInput(request_input),
+                                        output_sink=recorder.sink, cancel_token=cancel_token,
+                                        checkpoints=recorder)
+            if tracer is not None:
+                tracer.install(parser_obj)
+            if profiler is not None:
+                profiler.install(parser_obj)
+            if history is not None:
+                history.install(parser_obj)
+            if debugger is not None:
+                # installed last so the wrappers above run inside its hooks
+                debugger.on_pause = pause
+                debugger.install(parser_obj)
+                for line in breakpoints:
+                    debugger.add_breakpoint(line)
+                for name in break_functions:
+                    debugger.add_function_breakpoint(name)
+
+            # skip the statements before the first edited line when the last run saw them;
+            # a traced, profiled, recorded or debugged run has to see every statement
+            previous = self.last_checkpoints
+            instrumented = (tracer is not None or profiler is not None or history is not None
+                            or breakpoints or break_functions)
+            checkpoint = previous.resume_point(program) if previous and not instrumented else None
+            self.last_checkpoints = recorder
+            if checkpoint is not None:
+                symbol_table = recorder.resume(parser_obj, previous, checkpoint)
+            else:
+                symbol_table = parser_obj.parse_program()
+            post(("symbols", symbol_rows(symbol_table)))
+        except Exception as e:
+            output_sink.flush()
+            post(("console", f"\nSyntax/Runtime error: {e}\n"))
+        execute_seconds = time.perf_counter() - execute_start
+        if parser_obj is not None:
+            parser_obj.output_sink.flush()
+            self.last_metrics = RunMetrics.collect(parser_obj, program, lex_seconds, execute_seconds)
+            post(("console", "\n" + self.last_metrics.summary()))
+        if profiler is not None:
+            profiler.stop()
+            post(("profile", profiler.report(program)))
+        if tracer is not None:
+            self.last_trace = tracer
+            post(("console", "\n" + tracer.format(limit=TRACE_CONSOLE_LIMIT)))
+        if history is not None and parser_obj is not None:
+            post(("history", history))
+        post(("done", None))
+
+    # main thread: apply queued updates in batches
+    def _drain_ui_queue(self):
+        console_chunks = []
+        deadline = time.perf_counter() + UI_DRAIN_BUDGET
+        finished = False
+
+        while time.perf_counter() < deadline:
+            try:
+                kind, payload = self.ui_queue.get_nowait()
+            except queue.Empty:
+                break
+
+            if kind == "console":
+                # consecutive console messages become one insert
+                console_chunks.append(payload)
+                continue
+
+            if console_chunks:
+                self.log_to_console("".join(console_chunks))
+                console_chunks = []
+
+            if kind == "lexemes":
+                self.display_lexemes(*payload)
+            elif kind == "symbols":
+                self.show_symbol_rows(payload)
+            elif kind == "profile":
+                self.show_profile(payload)
+            elif kind == "history":
+                self.show_history(payload)
+            elif kind == "paused":
+                self.show_pause(*payload)
+            elif kind == "input":
+                variable_name, reply = payload
+                reply.put(self.ask_input(variable_name))
+            elif kind == "done":
+                finished = True
+
+        if console_chunks:
+            self.log_to_console("".join(console_chunks))
+
+        if finished:
+            self.execute_button.configure(state="normal")
+            self.stop_button.configure(state="disabled")
+            self.debugger = None
+            self.set_debug_buttons(running=False, paused=False)
+        if not finished or not self.ui_queue.empty():
+            self.root.after(UI_DRAIN_INTERVAL_MS, self._drain_ui_queue)
+
+    # save the last run's statement trace as JSON
+    def export_trace(self):
+        if self.last_trace is None:
+            messagebox.showwarning("Warning", "Turn on Trace and run a program first!")
+            return
+        filename = filedialog.asksaveasfilename(title="Export Trace", defaultextension=".json",
+                                                filetypes=(("JSON files", "*.json"), ("All files", "*.*")))
+        if filename:
+            try:
+                self.last_trace.export_json(filename)
+                self.log_to_console(f"Trace saved: {os.path.basename(filename)}\n")
+            except OSError as e:
+                messagebox.showerror("Error", f"Failed to save trace: {e}")
+
+    # save the last run's metrics, as Prometheus text for a .prom file, else JSON
+    def export_metrics(self):
+        if self.last_metrics is None:
+            messagebox.showwarning("Warning", "Run a program first!")
+            return
+        filename = filedialog.asksaveasfilename(title="Export Metrics", defaultextension=".json",
+                                                filetypes=(("JSON files", "*.json"),
+                                                           ("Prometheus text", "*.prom"),
+                                                           ("All files", "*.*")))
+        if filename:
+            metrics_format = "prometheus" if filename.endswith(".prom") else "json"
+            labels = {"program": os.path.basename(self.current_file)} if self.current_file else None
+            try:
+                with open(filename, "w", encoding="utf-8") as f:
+                    f.write(self.last_metrics.format(metrics_format, labels))
+                self.log_to_console(f"Metrics saved: {os.path.basename(filename)}\n")
+            except OSError as e:
+                messagebox.showerror("Error", f"Failed to save metrics: {e}")
+
+    # ask the user for a GIMMEH value
+    def ask_input(self, variable_name):
+        dialog = ctk.CTkInputDialog(title="GIMMEH", text=f"Enter value for '{variable_name}':")
+        value = dialog.get_input()
+        if value is None:
+            return None
+        self.log_to_console(f"{value}\n")
+        return value
+
+    # display lexemes, rows are read from the token list as they scroll into view
+    def display_lexemes(self, tokens, categories=None):
+        if categories is None:
+            categories = {token.type for token in tokens}
+        self.lexeme_table.set_source(len(tokens),
+                                     lambda i: (tokens[i].value, tokens[i].type, tokens[i].line_number),
+                                     get_category=lambda i: tokens[i].type,
+                                     get_line=lambda i: tokens[i].line_number,
+                                     categories=categories)
+
+    # display symbol table
     def display_symbol_table(self, variables):
-        self.symbol_textbox.delete("1.0", "end")
-        if not variables:
+        self.show_symbol_rows(symbol_rows(variables))
+
+    def show_symbol_rows(self, rows):
+        self.symbol_table.set_source(len(rows), lambda i: rows[i],
+                                     get_category=lambda i: rows[i][2],
+                                     categories={row[2] for row in rows})
+
+    # clicking a line number sets or removes a breakpoint on that line
+    def toggle_breakpoint(self, event):
+        line = int(self.line_numbers.index(f"@{event.x},{event.y}").split(".")[0])
+        if line > self.gutter_line_count:
+            return "break"
+        debugger = self.debugger
+        running = debugger is not None and debugger.analyzer is not None
+        if line in self.breakpoints:
+            self.breakpoints.discard(line)
+            self.line_numbers.tag_remove("breakpoint", f"{line}.0", f"{line}.0 lineend")
+            if running:
+                debugger.remove_breakpoint(debugger.statement_line(line))
+        else:
+            self.breakpoints.add(line)
+            self.line_numbers.tag_add("breakpoint", f"{line}.0", f"{line}.0 lineend")
+            if running:
+                debugger.add_breakpoint(line)
+        return "break"
+
+    def set_debug_buttons(self, running, paused):
+        self.continue_button.configure(text="Continue" if paused else "Pause",
+                                       state="normal" if running else "disabled")
+        for button in self.step_buttons:
+            button.configure(state="normal" if paused else "disabled")
+
+    # the worker stopped at a breakpoint or step: show where, IT and the symbol table
+    def show_pause(self, event, rows, stack, reply):
+        self.debug_reply = reply
+        self.set_debug_buttons(running=True, paused=True)
+        self.show_symbol_rows(rows)
+        it = next((row for row in rows if row[0] == "IT"), None)
+        calls = "".join(f"  called from line {line}\n" for _, line in stack[1:])
+        self.log_to_console(f"\n{event}, IT = {it[1] if it else 'NOOB'}\n{calls}")
+        self.text_editor.tag_remove("paused_line", "1.0", "end")
+        if event.line is not None:
+            self.text_editor.tag_add("paused_line", f"{event.line}.0", f"{event.line}.0 lineend")
+            self.text_editor.see(f"{event.line}.0")
+
+    # a Debugger method name (cont, step, step_over, step_out or quit) for the paused worker
+    def debug_command(self, command):
+        reply = self.debug_reply
+        if reply is None:
             return
-        for identifier, info in variables.items():
-            val = info.get("value", "NOOB")
-            t = info.get("type", "")
-            self.symbol_textbox.insert("end", f"{identifier:<18} {val} ({t})\n")
+        self.debug_reply = None
+        self.text_editor.tag_remove("paused_line", "1.0", "end")
+        self.set_debug_buttons(running=True, paused=False)
+        reply.put(command)
+
+    # Continue while paused, Pause (at the next statement) while running
+    def debug_continue(self):
+        if self.debug_reply is not None:
+            self.debug_command("cont")
+        elif self.debugger is not None:
+            self.debugger.interrupt()
+
+    # show a run's symbol history, starting from the end of the run
+    def show_history(self, history):
+        self.last_history = history
+        self.history_slider.configure(from_=0, to=max(len(history), 1), number_of_steps=max(len(history), 1))
+        self.history_slider.pack(fill="x", padx=12, pady=(0, 6), before=self.sym_inner)
+        self.show_history_step(len(history))
+
+    # the symbol table as the statement at `step` saw it, with its line marked in the editor
+    def show_history_step(self, step):
+        history = self.last_history
+        if history is None:
+            return
+        step = max(0, min(step, len(history)))
+        self.history_step = step
+        state = history.state_at(step)
+        self.show_symbol_rows(symbol_rows(state.visible()))
+        self.history_slider.set(step)
+
+        self.text_editor.tag_remove("history_line", "1.0", "end")
+        if state.line is None:
+            self.history_label.configure(text=f"end of run ({len(history)} steps)")
+        else:
+            self.history_label.configure(text=f"step {step + 1}/{len(history)}, line {state.line}")
+            self.text_editor.tag_add("history_line", f"{state.line}.0", f"{state.line}.0 lineend")
+            self.text_editor.see(f"{state.line}.0")
+        self.history_prev_button.configure(state="normal" if step > 0 else "disabled")
+        self.history_next_button.configure(state="normal" if step < len(history) else "disabled")
+
+    def hide_history(self):
+        self.last_history = None
+        self.history_step = 0
+        self.history_slider.pack_forget()
+        self.history_label.configure(text="")
+        self.history_prev_button.configure(state="disabled")
+        self.history_next_button.configure(state="disabled")
+        self.text_editor.tag_remove("history_line", "1.0", "end")
+
+    # annotate each profiled line beside the gutter, colored by how hot it is
+    def show_profile(self, report):
+        annotations = report.annotations()
+        line_count = max(self.gutter_line_count, 1)
+        gutter = self.profile_gutter
+        gutter.configure(state="normal")
+        gutter.delete("1.0", "end")
+        gutter.insert("1.0", "\n".join(annotations.get(line, ("",))[0] for line in range(1, line_count + 1)))
+        for line, (_, heat) in annotations.items():
+            if line <= line_count:
+                level = min(len(HEAT_COLORS) - 1, int(heat * len(HEAT_COLORS)))
+                gutter.tag_add(f"heat{level}", f"{line}.0", f"{line}.end")
+        gutter.configure(state="disabled")
+        if not self.profile_shown:
+            gutter.pack(side="left", fill="y", before=self.text_editor)
+            self.profile_shown = True
+        self.sync_scroll()
+
+    def hide_profile(self):
+        if self.profile_shown:
+            self.profile_gutter.pack_forget()
+            self.profile_shown = False
 
     # display console output
     def display_console(self, text):
         self.console_textbox.delete("1.0", "end")
         self.console_textbox.insert("1.0", text)
 
-    # log messages to console
+    # log messages to console (main thread only, redraw is left to the event loop)
     def log_to_console(self, msg):
         self.console_textbox.insert("end", msg)
         self.console_textbox.see("end")
-        self.root.update_idletasks()
 
     # clear all fields
     def clear_all(self):
@@ -235,32 +709,141 @@ class LOLCodeInterpreterGUI:
         self.line_numbers.configure(state="normal")
         self.line_numbers.delete("1.0", "end")
         self.line_numbers.configure(state="disabled")
-        self.lexemes_textbox.delete("1.0", "end")
-        self.symbol_textbox.delete("1.0", "end")
+        self.gutter_line_count = 0
+        self.breakpoints = set()
+        self.hide_profile()
+        self.hide_history()
+        self.lexeme_table.clear()
+        self.symbol_table.clear()
         self.console_textbox.delete("1.0", "end")
         self.filename_label.configure(text="(None)")
         self.current_file = None
+        self.last_checkpoints = None
+        self.schedule_live_analysis()
         self.log_to_console("✓ All fields cleared\n")
 
     # update line numbers to match editor content
     def update_line_numbers(self):
+        # only the difference in line count is inserted or deleted
         try:
-            content = self.text_editor.get("1.0", "end-1c")
-            line_count = content.count('\n') + 1 if content else 1
-            line_numbers_string = "\n".join(str(i) for i in range(1, line_count + 1))
-            
+            line_count = int(self.text_editor.index("end-1c").split(".")[0])
+            old_count = self.gutter_line_count
+            if line_count == old_count:
+                return
+
             self.line_numbers.configure(state="normal")
-            self.line_numbers.delete("1.0", "end")
-            self.line_numbers.insert("1.0", line_numbers_string)
+            if line_count > old_count:
+                new_numbers = "\n".join(str(i) for i in range(old_count + 1, line_count + 1))
+                self.line_numbers.insert("end-1c", ("\n" if old_count else "") + new_numbers)
+            else:
+                self.line_numbers.delete(f"{line_count}.end", "end-1c")
             self.line_numbers.configure(state="disabled")
+            # breakpoints below the last line go with it
+            self.breakpoints = {line for line in self.breakpoints if line <= line_count}
+
+            # widen the gutter when the numbers gain a digit
+            digits = len(str(line_count))
+            if digits != len(str(old_count)):
+                self.line_numbers.configure(width=max(4, digits + 1))
+
+            self.gutter_line_count = line_count
+            # the annotations no longer line up with the code
+            self.hide_profile()
+            self.sync_scroll()
         except Exception:
             pass
 
+    def _on_editor_key(self, event):
+        self.update_line_numbers()
+        self.schedule_live_analysis()
+
+    # tag name used to color one token category
+    @staticmethod
+    def token_tag(category):
+        return "live_" + category.replace(" ", "_") if category in TOKEN_COLORS else "live_keyword"
+
+    def toggle_live_analysis(self):
+        if self.live_switch.get():
+            self.live_analyzer = LiveAnalyzer()
+            self.run_live_analysis()
+        else:
+            if self.live_job is not None:
+                self.root.after_cancel(self.live_job)
+                self.live_job = None
+            self.live_analyzer = None
+            for tag in self.live_tags + ["live_error"]:
+                self.text_editor.tag_remove(tag, "1.0", "end")
+            self.live_status.configure(text="")
+
+    # restart the debounce timer, the analysis runs once typing pauses
+    def schedule_live_analysis(self):
+        if self.live_analyzer is None:
+            return
+        if self.live_job is not None:
+            self.root.after_cancel(self.live_job)
+        self.live_job = self.root.after(LIVE_ANALYSIS_DELAY_MS, self.run_live_analysis)
+
+    def run_live_analysis(self):
+        self.live_job = None
+        if self.live_analyzer is None:
+            return
+        code = self.text_editor.get("1.0", "end-1c")
+
+        # only the lines that were lexed again get new highlight tags,
+        # the tags on every other line move along with their text
+        changed = self.live_analyzer.update(code)
+        lines = self.live_analyzer.lexer.lines
+        for index in changed:
+            self.highlight_line(index + 1, lines[index])
+
+        diagnostics = self.live_analyzer.diagnostics()
+        self.text_editor.tag_remove("live_error", "1.0", "end")
+        for line_number, _ in diagnostics:
+            self.text_editor.tag_add("live_error", f"{line_number}.0", f"{line_number}.0 lineend")
+
+        if diagnostics:
+            line_number, message = diagnostics[0]
+            self.live_status.configure(text=f"⚠ {len(diagnostics)} problem(s) - line {line_number}: {message}",
+                                       text_color="#FF6B6B")
+        else:
+            self.live_status.configure(text="✓ No problems found", text_color=TEXT)
+
+    def highlight_line(self, line_number, line):
+        editor = self.text_editor
+        line_start = f"{line_number}.0"
+        line_end = f"{line_number}.0 lineend"
+        for tag in self.live_tags:
+            editor.tag_remove(tag, line_start, line_end)
+
+        # a line without tokens is blank or a comment
+        if not line.spans:
+            if line.text.strip():
+                editor.tag_add("live_comment", line_start, line_end)
+            return
+
+        for token_type, _, start, end in line.spans:
+            editor.tag_add(self.token_tag(token_type), f"{line_number}.{start}", f"{line_number}.{end}")
+
+        # a trailing BTW comment after the last token
+        last_end = line.spans[-1][3]
+        comment_start = line.text.find("BTW", last_end)
+        if comment_start != -1:
+            editor.tag_add("live_comment", f"{line_number}.{comment_start}", line_end)
+
+    # editor scrolled (by keys, wheel, scrollbar or edits): move scrollbar and gutter
+    def _on_editor_yscroll(self, first, last):
+        self.text_editor._y_scrollbar.set(first, last)
+        self.line_numbers.yview_moveto(first)
+        if self.profile_shown:
+            self.profile_gutter.yview_moveto(first)
+
     # sync scroll position between line numbers and editor
     def sync_scroll(self):
         try:
             # get the editor's first visible line
             self.line_numbers.yview_moveto(self.text_editor.yview()[0])
+            if self.profile_shown:
+                self.profile_gutter.yview_moveto(self.text_editor.yview()[0])
         except Exception:
             pass
 
@@ -0,0 +1,114 @@
+'''
+CMSC 124: LOLCODE Incremental Lexer
+Re-lexes only the lines of the editor buffer that changed
+'''
+
+from lexer_analyzer import lex_line, Token
+
+# cached (line text, comment state) results kept per lexed line
+CACHE_SLACK = 1024
+
+# lines compared per slice when looking for the unchanged prefix and suffix
+COMPARE_CHUNK = 256
+
+
+def common_prefix(old, new, limit):
+    # length of the shared start of two lists, compared a slice at a time
+    prefix = 0
+    while prefix < limit:
+        end = min(prefix + COMPARE_CHUNK, limit)
+        if old[prefix:end] == new[prefix:end]:
+            prefix = end
+            continue
+        while old[prefix] == new[prefix]:
+            prefix += 1
+        break
+    return prefix
+
+
+# lexing result of one source line, independent of its line number so it
+# stays valid when lines above it are inserted or deleted
+class LexedLine:
+    __slots__ = ("text", "state_in", "spans", "state_out", "keyword", "errors")
+
+    def __init__(self, text, state_in, spans, state_out):
+        self.text = text
+        # state_in / state_out: whether the line starts / ends inside OBTW ... TLDR
+        self.state_in = state_in
+        self.spans = spans
+        self.state_out = state_out
+        self.keyword = spans[0][1] if spans else None
+        # statement diagnostics, filled in by the live analyzer
+        self.errors = None
+
+    def tokens(self, line_number):
+        return [Token(token_type, lexeme, line_number) for token_type, lexeme, _, _ in self.spans]
+
+
+# keeps the lexed lines of a buffer and updates them from edited text
+class IncrementalLexer:
+    def __init__(self):
+        self.lines = []
+        self.texts = []
+        self._cache = {}
+
+    def _lex(self, text, state_in):
+        # lines are cached by content and entry state, so undo or a pasted copy is free
+        key = (text, state_in)
+        result = self._cache.get(key)
+        if result is None:
+            spans, state_out = lex_line(text, state_in)
+            result = (tuple(spans), state_out)
+            if len(self._cache) > len(self.lines) + CACHE_SLACK:
+                self._cache.clear()
+            self._cache[key] = result
+        return LexedLine(text, state_in, result[0], result[1])
+
+    def update(self, source):
+        # returns the indexes (0-based) of the lines that were lexed again
+        new_texts = source.split('\n')
+        old_lines = self.lines
+
+        # unchanged lines at the start and the end of the buffer
+        limit = min(len(old_lines), len(new_texts))
+        prefix = common_prefix(self.texts, new_texts, limit)
+        suffix = common_prefix(self.texts[::-1], new_texts[::-1], limit - prefix)
+
+        lines = old_lines[:prefix]
+        changed = []
+        state = lines[-1].state_out if lines else False
+
+        for index in range(prefix, len(new_texts) - suffix):
+            line = self._lex(new_texts[index], state)
+            lines.append(line)
+            changed.append(index)
+            state = line.state_out
+
+        # an opened or closed OBTW ripples forward until the comment state
+        # matches what the old line was lexed with again
+        old_index = len(old_lines) - suffix
+        while old_index < len(old_lines):
+            old_line = old_lines[old_index]
+            if old_line.state_in == state:
+                lines.extend(old_lines[old_index:])
+                break
+            line = self._lex(old_line.text, state)
+            changed.append(len(lines))
+            lines.append(line)
+            state = line.state_out
+            old_index += 1
+
+        self.lines = lines
+        self.texts = new_texts
+        return changed
+
+    def line_tokens(self, index):
+        return self.lines[index].tokens(index + 1)
+
+    def tokens(self):
+        # full token list, same as tokenize() on the whole buffer
+        tokens = []
+        for index, line in enumerate(self.lines):
+            if line.spans:
+                tokens.extend(line.tokens(index + 1))
+        return tokens
@@ -0,0 +1,118 @@
+'''
+CMSC 124: LOLCODE Input Streams
+Pluggable input providers that back the GIMMEH statement
+'''
+
+import os
+import sys
+from collections import deque
+
+
+# base input provider, values are read in bulk and served from a buffer;
+# a provider whose source is finite (a list, a file, piped stdin) marks
+# itself exhausted once it is used up, the others are asked again each time
+class InputProvider:
+    def __init__(self):
+        self._buffer = deque()
+        self._exhausted = False
+
+    def read_value(self, variable_name=None):
+        # refill the buffer only when it runs dry; an empty fill from an
+        # interactive source (a cancelled dialog) only fails this GIMMEH
+        if not self._buffer and not self._exhausted:
+            self._buffer.extend(self._fill(variable_name))
+
+        if self._buffer:
+            return self._buffer.popleft()
+        return None
+
+    def _fill(self, variable_name):
+        # subclasses return a list of values, or an empty list when done
+        return []
+
+    def remaining(self):
+        return len(self._buffer)
+
+
+# input supplied up front as a python list
+class ListInput(InputProvider):
+    def __init__(self, values):
+        super().__init__()
+        self._buffer.extend(str(value) for value in values)
+        self._exhausted = True
+
+
+# input read from a text file, one value per line
+class FileInput(InputProvider):
+    def __init__(self, path, encoding='utf-8'):
+        super().__init__()
+        self.path = path
+        self.encoding = encoding
+
+    def _fill(self, variable_name):
+        # the whole file is loaded on the first GIMMEH
+        with open(self.path, "r", encoding=self.encoding) as f:
+            content = f.read()
+        self._exhausted = True
+        return content.splitlines()
+
+
+# input read from stdin (or any file-like stream)
+class StdinInput(InputProvider):
+    def __init__(self, stream=None, prompt=""):
+        super().__init__()
+        self.stream = stream
+        self.prompt = prompt
+
+    def _fill(self, variable_name):
+        stream = self.stream if self.stream is not None else sys.stdin
+
+        # piped or redirected input is slurped in one read
+        if not stream.isatty():
+            self._exhausted = True
+            return stream.read().splitlines()
+
+        # interactive terminals can only be read a line at a time
+        if self.prompt:
+            sys.stdout.write(self.prompt)
+            sys.stdout.flush()
+        line = stream.readline()
+        if not line:
+            return []
+        return [line.rstrip('\n')]
+
+
+# input requested from a callback, e.g. a GUI dialog
+class CallbackInput(InputProvider):
+    def __init__(self, callback):
+        super().__init__()
+        self.callback = callback
+
+    def _fill(self, variable_name):
+        # the callback may return a single value or a batch of values
+        result = self.callback(variable_name)
+        if result is None:
+            return []
+        if isinstance(result, (list, tuple)):
+            return [str(value) for value in result]
+        return [str(result)]
+
+
+def make_input_provider(source=None):
+    # build an input provider from a list, callable or stream; a string is
+    # the path of a file with one value per line, never the input itself
+    if source is None:
+        return StdinInput()
+    if isinstance(source, InputProvider):
+        return source
+    if isinstance(source, (list, tuple)):
+        return ListInput(source)
+    if isinstance(source, str):
+        if not os.path.isfile(source):
+            raise FileNotFoundError(f"GIMMEH input file not found: {source!r} (pass a list for literal values)")
+        return FileInput(source)
+    if callable(source):
+        return CallbackInput(source)
+    if hasattr(source, 'read'):
+        return StdinInput(stream=source)
+    raise TypeError(f"Unsupported input source: {source!r}")
@@ -0,0 +1,123 @@
+'''
+CMSC 124: LOLCODE Interpreter Profile
+cProfile wrapper that reports where the interpreter itself spends its time,
+per phase (lex, parse, evaluate, output) and per Python function
+'''
+
+import cProfile
+import os
+import pstats
+
+PHASES = ("lex", "parse", "evaluate", "output", "other")
+
+# interpreter modules and the phase their functions belong to by default
+MODULE_PHASES = {
+    "lexer_analyzer.py": "lex",
+    "compiler.py": "lex",
+    "incremental_lexer.py": "lex",
+    "syntax_analyzer.py": "parse",
+    "semantics_analyzer.py": "evaluate",
+    "output_sinks.py": "output",
+}
+
+# functions whose phase differs from their module's
+FUNCTION_PHASES = {
+    "write_output": "output",
+    "get_output": "output",
+    "emit": "output",
+    "call_function": "evaluate",
+    "type_of": "evaluate",
+    "step_loop_variable": "evaluate",
+}
+
+
+def classify(filename, function_name):
+    # phase of one interpreter function, None for code outside the interpreter
+    module = os.path.basename(filename)
+    phase = MODULE_PHASES.get(module)
+    if phase is None:
+        return None
+    if function_name in FUNCTION_PHASES:
+        return FUNCTION_PHASES[function_name]
+    if module == "syntax_analyzer.py" and function_name.startswith("evaluate_"):
+        return "evaluate"
+    return phase
+
+
+def function_label(key):
+    filename, line, name = key
+    if filename == "~":
+        return name
+    return f"{os.path.basename(filename)}:{line}({name})"
+
+
+# profiles a block of code, e.g. `with InterpreterProfile() as profile: ...`
+class InterpreterProfile:
+    def __init__(self):
+        self.profile = cProfile.Profile()
+        self._stats = None
+
+    def __enter__(self):
+        self.profile.enable()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.profile.disable()
+        return False
+
+    def stats(self):
+        if self._stats is None:
+            self._stats = pstats.Stats(self.profile)
+        return self._stats
+
+    def dump(self, path):
+        # readable later with `python -m pstats <path>` or snakeviz
+        self.profile.dump_stats(path)
+
+    def phase_totals(self):
+        # self time per phase; library and builtin time goes to the phase of
+        # whichever interpreter code called it
+        raw = self.stats().stats
+        phases = {phase: 0.0 for phase in PHASES}
+        resolved = {}
+
+        def phase_of(key, visiting=()):
+            if key in resolved:
+                return resolved[key]
+            phase = classify(key[0], key[2])
+            if phase is None:
+                callers = raw.get(key, (0, 0, 0, 0, {}))[4]
+                phase = "other"
+                if callers and key not in visiting:
+                    caller = max(callers, key=lambda c: callers[c][3])
+                    phase = phase_of(caller, visiting + (key,))
+            resolved[key] = phase
+            return phase
+
+        for key, (_, _, self_time, _, callers) in raw.items():
+            if classify(key[0], key[2]) is not None or not callers:
+                phases[phase_of(key)] += self_time
+            else:
+                # split the time by the caller it was spent under
+                for caller, edge in callers.items():
+                    phases[phase_of(caller)] += edge[2]
+        return phases
+
+    def top_functions(self, limit=15, sort="tottime"):
+        # (label, calls, self seconds, cumulative seconds) of the hottest functions
+        index = 2 if sort == "tottime" else 3
+        rows = sorted(self.stats().stats.items(), key=lambda item: item[1][index], reverse=True)
+        return [(function_label(key), calls, self_time, cumulative)
+                for key, (_, calls, self_time, cumulative, _) in rows[:limit]]
+
+    def summary(self, limit=15):
+        phases = self.phase_totals()
+        total = sum(phases.values()) or 1.0
+        lines = ["Interpreter profile", f"{'phase':<10} {'ms':>10} {'share':>7}"]
+        for phase in PHASES:
+            lines.append(f"{phase:<10} {phases[phase] * 1000:>10.2f} {phases[phase] / total:>7.1%}")
+        lines.append("")
+        lines.append(f"{'calls':>9} {'self ms':>10} {'cum ms':>10}  function")
+        for label, calls, self_time, cumulative in self.top_functions(limit):
+            lines.append(f"{calls:>9} {self_time * 1000:>10.2f} {cumulative * 1000:>10.2f}  {label}")
+        return "\n".join(lines) + "\n"
@@ -131,6 +131,97 @@ def showOutput(tokens_found):
     print("-" * 70)
     print(f"Total tokens: {len(tokens_found)}\n")
 
+# scan one line of code into (token_type, lexeme, start, end) spans
+def scan_line(line):
+    spans = []
+    position = 0
+    
+    while position < len(line):
+        # skips spaces
+        if line[position].isspace():
+            position += 1
+            continue
+        
+        matched = False
+        
+        # Special handling for string literals (both closed and unclosed)
+        if line[position] == '"':
+            closing_quote = line.find('"', position + 1)
+            if closing_quote == -1:
+                # Unclosed string - mark entire rest of line as invalid
+                invalid_string = line[position:]
+                spans.append(('INVALID TOKEN', invalid_string, position, len(line)))
+                break  # Stop processing this line
+            else:
+                # Properly closed string - strip the quotes
+                string_value = line[position+1:closing_quote]  # Remove quotes
+                spans.append(('YARN Literal', string_value, position, closing_quote + 1))
+                position = closing_quote + 1
+                matched = True
+                continue
+        
+        # check each token pattern
+        for pattern, token_type in tokens:
+            regex = re.compile(pattern)
+            match = regex.match(line, position)
+            
+            if match:
+                lexeme = match.group(0)
+                
+                # skip comments
+                if token_type == 'Comment Line':
+                    if lexeme.startswith('BTW'):
+                        position = len(line)
+                    else:
+                        position = match.end()
+                    matched = True
+                    break
+                
+                # Skip YARN Literal pattern since we handle strings above
+                if token_type == 'YARN Literal':
+                    continue
+                
+                # add valid token with its position
+                spans.append((token_type, lexeme, position, match.end()))
+                position = match.end()
+                matched = True
+                break
+        
+        # handle invalid tokens
+        if not matched:
+            end_pos = position
+            while end_pos < len(line) and not line[end_pos].isspace():
+                end_pos += 1
+            
+            invalid_lexeme = line[position:end_pos]
+            spans.append(('INVALID TOKEN', invalid_lexeme, position, end_pos))
+            position = end_pos
+    
+    return spans
+
+# lex one line given the multiline comment state before it,
+# returns (spans, multiline comment state after it)
+def lex_line(line, in_multiline_comment=False):
+    # skips empty lines
+    if not line.strip():
+        return [], in_multiline_comment
+    
+    # handle multiline comments
+    if in_multiline_comment:
+        if 'TLDR' in line:
+            return [], False
+        return [], True
+    
+    # check if this line starts a multiline comment
+    if re.match(r'^\s*OBTW\b', line):
+        return [], True
+    
+    # check if this line is a single-line comment
+    if re.match(r'^\s*BTW\b', line):
+        return [], False
+    
+    return scan_line(line), False
+
 # NEW: Core tokenize function that returns Token objects with line numbers
 def tokenize(file_content):
     """
@@ -152,87 +243,9 @@ def tokenize(file_content):
     
     # process each line
     for line_num, line in enumerate(lines, 1):
-        # skips empty lines
-        if not line.strip():
-            continue
-        
-        # handle multiline comments
-        if in_multiline_comment:
-            if 'TLDR' in line:
-                in_multiline_comment = False
-            continue
-        
-        # check if this line starts a multiline comment
-        if re.match(r'^\s*OBTW\b', line):
-            in_multiline_comment = True
-            continue
-        
-        # check if this line is a single-line comment
-        if re.match(r'^\s*BTW\b', line):
-            continue
-        
-        position = 0
-        
-        while position < len(line):
-            # skips spaces
-            if line[position].isspace():
-                position += 1
-                continue
-            
-            matched = False
-            
-            # Special handling for string literals (both closed and unclosed)
-            if line[position] == '"':
-                closing_quote = line.find('"', position + 1)
-                if closing_quote == -1:
-                    # Unclosed string - mark entire rest of line as invalid
-                    invalid_string = line[position:]
-                    tokens_found.append(Token('INVALID TOKEN', invalid_string, line_num))
-                    break  # Stop processing this line
-                else:
-                    # Properly closed string - strip the quotes
-                    string_value = line[position+1:closing_quote]  # Remove quotes
-                    tokens_found.append(Token('YARN Literal', string_value, line_num))
-                    position = closing_quote + 1
-                    matched = True
-                    continue
-            
-            # check each token pattern
-            for pattern, token_type in tokens:
-                regex = re.compile(pattern)
-                match = regex.match(line, position)
-                
-                if match:
-                    lexeme = match.group(0)
-                    
-                    # skip comments
-                    if token_type == 'Comment Line':
-                        if lexeme.startswith('BTW'):
-                            position = len(line)
-                        else:
-                            position = match.end()
-                        matched = True
-                        break
-                    
-                    # Skip YARN Literal pattern since we handle strings above
-                    if token_type == 'YARN Literal':
-                        continue
-                    
-                    # add valid token with line number
-                    tokens_found.append(Token(token_type, lexeme, line_num))
-                    position = match.end()
-                    matched = True
-                    break
-            
-            # handle invalid tokens
-            if not matched:
-                end_pos = position
-                while end_pos < len(line) and not line[end_pos].isspace():
-                    end_pos += 1
-                
-                invalid_lexeme = line[position:end_pos]
-                tokens_found.append(Token('INVALID TOKEN', invalid_lexeme, line_num))
-                position = end_pos
+        spans, in_multiline_comment = lex_line(line, in_multiline_comment)
+        for token_type, lexeme, _, _ in spans:
+            tokens_found.append(Token(token_type, lexeme, line_num))
     
     return tokens_found
 
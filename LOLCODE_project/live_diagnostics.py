@@ -0,0 +1,285 @@
+'''
+CMSC 124: LOLCODE Live Diagnostics
+Validates the statements of an edited buffer without executing them
+'''
+
+from incremental_lexer import IncrementalLexer
+from syntax_analyzer import SyntaxAnalyzer
+from output_sinks import BufferSink
+from diagnostics import Diagnostic, ERROR
+
+LITERAL_TYPES = ['NUMBR Literal', 'NUMBAR Literal', 'TROOF Literal', 'YARN Literal']
+OPERATION_TYPES = ['Arithmetic Operation', 'Boolean Operation', 'Comparison Operation', 'String Concatenation']
+
+# statements that are a single keyword on their own line
+KEYWORD_LINES = ['HAI', 'KTHXBYE', 'WAZZUP', 'BUHBYE', 'O RLY?', 'YA RLY', 'NO WAI', 'OIC',
+                 'WTF?', 'OMGWTF', 'GTFO', 'IF U SAY SO']
+
+# block keywords: opener -> closer, and the keywords only valid inside a block
+BLOCK_CLOSERS = {'HAI': 'KTHXBYE', 'WAZZUP': 'BUHBYE', 'O RLY?': 'OIC', 'WTF?': 'OIC',
+                 'IM IN YR': 'IM OUTTA YR', 'HOW IZ I': 'IF U SAY SO'}
+BLOCK_MEMBERS = {'YA RLY': ['O RLY?'], 'NO WAI': ['O RLY?'], 'MEBBE': ['O RLY?'],
+                 'OMG': ['WTF?'], 'OMGWTF': ['WTF?'], 'FOUND YR': ['HOW IZ I']}
+BLOCK_KEYWORDS = set(BLOCK_CLOSERS) | set(BLOCK_CLOSERS.values()) | set(BLOCK_MEMBERS)
+
+# diagnostic code of a block that is never closed, by its opener
+UNCLOSED_CODES = {'HAI': 'E705', 'WAZZUP': 'E210', 'O RLY?': 'E403', 'WTF?': 'E403',
+                  'IM IN YR': 'E508', 'HOW IZ I': 'E605'}
+
+
+# checks one statement line at a time using the analyzer's parse_* methods,
+# which validate without running anything
+class StatementValidator(SyntaxAnalyzer):
+    def __init__(self):
+        super().__init__([], log_function=lambda message: None, output_sink=BufferSink())
+        self.line_errors = []
+
+    def log_syntax_error(self, message, expected=None, found=None, code=None, severity=ERROR, line=None):
+        # diagnostics carry no line number, the caller knows where the line is
+        self.line_errors.append(Diagnostic(code, message, None, expected, found, severity))
+
+    def validate(self, tokens):
+        # list of error messages for the statement on one line
+        return [diagnostic.describe() for diagnostic in self.validate_diagnostics(tokens)]
+
+    def validate_diagnostics(self, tokens):
+        # list of Diagnostic objects (without a line) for the statement on one line
+        self.line_errors = []
+        self.lines = {0: tokens}
+        self.line_numbers = [0]
+        self.line_index = {0: 0}
+        self.jump_to_line(0)
+
+        self.validate_statement()
+        if not self.line_errors and self.current_token:
+            self.log_syntax_error("Unexpected token after statement", found=self.current_token.value, code="E707")
+        return self.line_errors
+
+    def validate_value(self, context):
+        # an expression or a MAEK A cast
+        if not self.current_token:
+            self.log_syntax_error(f"Missing value after {context}", code="E710")
+        elif self.current_token.value == 'MAEK':
+            self.parse_typecasting()
+        elif self.parse_expression() is None:
+            self.log_syntax_error(f"Invalid value after {context}", found=self.current_token.value, code="E711")
+
+    def validate_statement(self):
+        token = self.current_token
+        value = token.value
+
+        if token.type == 'INVALID TOKEN':
+            self.log_syntax_error("Invalid token", found=value, code="E701")
+        elif value in KEYWORD_LINES:
+            self.advance_to_next_token()
+        elif value == 'I HAS A':
+            self.advance_to_next_token()
+            if not self.current_token or self.current_token.type != 'Variable Identifier':
+                self.log_syntax_error("Variable name is missing or invalid after 'I HAS A'", code="E201")
+                return
+            self.advance_to_next_token()
+            if self.current_token and self.current_token.value == 'ITZ':
+                self.advance_to_next_token()
+                self.validate_value("'ITZ'")
+        elif token.type == 'Output Keyword':
+            self.advance_to_next_token()
+            if not self.current_token:
+                self.log_syntax_error("No output specified after VISIBLE", code="E301")
+                return
+            while self.current_token and not self.line_errors:
+                if self.current_token.type == 'Output Separator' or self.current_token.value == 'AN':
+                    self.advance_to_next_token()
+                else:
+                    self.validate_value("VISIBLE")
+        elif token.type == 'Input Keyword':
+            self.advance_to_next_token()
+            if not self.current_token or self.current_token.type != 'Variable Identifier':
+                self.log_syntax_error("Missing variable identifier after GIMMEH", code="E303")
+                return
+            self.advance_to_next_token()
+        elif value == 'OMG':
+            self.advance_to_next_token()
+            if not self.current_token or self.current_token.type not in LITERAL_TYPES:
+                self.log_syntax_error("Expected literal value after 'OMG'", code="E405")
+                return
+            self.advance_to_next_token()
+        elif value == 'MEBBE':
+            self.advance_to_next_token()
+            self.validate_value("'MEBBE'")
+        elif value == 'IM IN YR':
+            self.validate_loop_header()
+        elif value == 'IM OUTTA YR':
+            self.advance_to_next_token()
+            if not self.current_token or self.current_token.type != 'Variable Identifier':
+                self.log_syntax_error("Expected loop label after 'IM OUTTA YR'", code="E502")
+                return
+            self.advance_to_next_token()
+        elif value == 'HOW IZ I':
+            self.validate_function_header()
+        elif value == 'I IZ':
+            self.validate_call()
+        elif value == 'FOUND YR':
+            self.advance_to_next_token()
+            self.validate_value("'FOUND YR'")
+        elif token.type in OPERATION_TYPES or value == 'MAEK':
+            self.validate_value("statement")
+        elif token.type == 'Variable Identifier':
+            next_token = self.current_tokens[1] if len(self.current_tokens) > 1 else None
+            if next_token is None:
+                # bare identifier, sets IT
+                self.advance_to_next_token()
+            elif next_token.value == 'R':
+                self.advance_to_next_token()
+                self.advance_to_next_token()
+                self.validate_value("assignment operator 'R'")
+            elif next_token.value == 'IS NOW A':
+                self.parse_typecasting()
+            else:
+                self.log_syntax_error("Unknown statement", found=value, code="E703")
+        else:
+            self.log_syntax_error("Unexpected or invalid statement", found=value, code="E704")
+
+    def validate_loop_header(self):
+        # IM IN YR <label> UPPIN|NERFIN YR <var> [TIL|WILE <expression>]
+        self.advance_to_next_token()
+        if not self.current_token or self.current_token.type != 'Variable Identifier':
+            self.log_syntax_error("Expected loop label after 'IM IN YR'", code="E502")
+            return
+        self.advance_to_next_token()
+        if not self.current_token or self.current_token.value not in ['UPPIN', 'NERFIN']:
+            self.log_syntax_error("Expected loop operation (UPPIN/NERFIN) after loop label", code="E503")
+            return
+        self.advance_to_next_token()
+        if not self.current_token or self.current_token.value != 'YR':
+            self.log_syntax_error("Expected 'YR' after loop operation", code="E504")
+            return
+        self.advance_to_next_token()
+        if not self.current_token or self.current_token.type != 'Variable Identifier':
+            self.log_syntax_error("Expected variable name after 'YR'", code="E505")
+            return
+        self.advance_to_next_token()
+        if not self.current_token or self.current_token.value not in ['TIL', 'WILE']:
+            self.log_syntax_error("Expected loop condition (TIL/WILE) after loop variable", code="E506")
+            return
+        self.advance_to_next_token()
+        if self.parse_expression() is None:
+            self.log_syntax_error("Invalid loop condition expression", code="E507")
+
+    def validate_call(self):
+        # I IZ <name> [YR <arg> [AN YR <arg> ...]] [MKAY], without calling it
+        self.advance_to_next_token()
+        if not self.current_token or self.current_token.type != 'Variable Identifier':
+            self.log_syntax_error("Expected function name after 'I IZ'", code="E607")
+            return
+        self.advance_to_next_token()
+        while self.current_token and self.current_token.value == 'YR' and not self.line_errors:
+            self.advance_to_next_token()
+            if self.current_token and self.current_token.value == 'I IZ':
+                self.validate_call()
+            else:
+                self.validate_value("'YR'")
+            if self.current_token and self.current_token.value == 'AN':
+                self.advance_to_next_token()
+        if self.current_token and self.current_token.value == 'MKAY':
+            self.advance_to_next_token()
+
+    def validate_function_header(self):
+        # HOW IZ I <name> [YR <param> [AN YR <param> ...]]
+        self.advance_to_next_token()
+        if not self.current_token or self.current_token.type != 'Variable Identifier':
+            self.log_syntax_error("Expected function name after 'HOW IZ I'", code="E602")
+            return
+        self.advance_to_next_token()
+        while self.current_token and self.current_token.value == 'YR':
+            self.advance_to_next_token()
+            if not self.current_token or self.current_token.type != 'Variable Identifier':
+                self.log_syntax_error("Expected parameter name after 'YR'", code="E603")
+                return
+            self.advance_to_next_token()
+            if self.current_token and self.current_token.value == 'AN':
+                self.advance_to_next_token()
+                if not self.current_token or self.current_token.value != 'YR':
+                    self.log_syntax_error("Expected 'YR' after 'AN' in parameter list", code="E604")
+                    return
+
+
+# live analysis of an editor buffer: incremental lexing, per-line statement
+# checks that are only redone for edited lines, and a cheap block check
+class LiveAnalyzer:
+    def __init__(self):
+        self.lexer = IncrementalLexer()
+        self.validator = StatementValidator()
+        self._statement_cache = {}
+
+    def update(self, source):
+        # returns the indexes (0-based) of the lines that were lexed again,
+        # only those lines get their statement validated again
+        changed = self.lexer.update(source)
+        lines = self.lexer.lines
+        for index in changed:
+            self._validate_line(lines[index])
+        return changed
+
+    def _validate_line(self, line):
+        # lines with the same tokens share one result
+        key = tuple((token_type, lexeme) for token_type, lexeme, _, _ in line.spans)
+        errors = self._statement_cache.get(key)
+        if errors is None:
+            errors = self.validator.validate(line.tokens(0)) if line.spans else []
+            if len(self._statement_cache) > len(self.lexer.lines) * 2 + 1024:
+                self._statement_cache.clear()
+            self._statement_cache[key] = errors
+        line.errors = errors
+
+    def diagnostics(self):
+        # (line number, message) pairs for the whole buffer, in line order
+        results = [(index + 1, message)
+                   for index, line in enumerate(self.lexer.lines) if line.errors
+                   for message in line.errors]
+        results.extend(self.block_diagnostics())
+        results.sort(key=lambda item: item[0])
+        return results
+
+    def block_diagnostics(self):
+        # matches block openers and closers using only the first token of each line
+        keywords = [(index + 1, line.keyword) for index, line in enumerate(self.lexer.lines) if line.keyword]
+        return [(diagnostic.line, diagnostic.describe()) for diagnostic in match_blocks(keywords)]
+
+
+def match_blocks(keywords):
+    # Diagnostic objects for the block structure of a program, given the
+    # (line number, first token) of each non-empty line in order
+    results = []
+    if keywords and keywords[0][1] != 'HAI':
+        results.append(Diagnostic("E706", "Program must start with 'HAI'", keywords[0][0]))
+
+    stack = []
+    for line_number, keyword in keywords:
+        if keyword not in BLOCK_KEYWORDS:
+            continue
+        if keyword in BLOCK_CLOSERS:
+            stack.append((keyword, line_number))
+        elif keyword in BLOCK_CLOSERS.values():
+            # the closer may skip over blocks that were left open, they are
+            # reported once here instead of throwing off every later match
+            depth = next((depth for depth in range(len(stack) - 1, -1, -1)
+                          if BLOCK_CLOSERS[stack[depth][0]] == keyword), None)
+            if depth is None:
+                results.append(Diagnostic("E708", f"'{keyword}' without a matching opening block", line_number))
+                continue
+            for opener, opener_line in stack[depth + 1:]:
+                results.append(unclosed_block(opener, opener_line))
+            del stack[depth:]
+        elif keyword in BLOCK_MEMBERS:
+            if not any(opener in BLOCK_MEMBERS[keyword] for opener, _ in stack):
+                results.append(Diagnostic("E709", f"Found '{keyword}' outside of {' or '.join(BLOCK_MEMBERS[keyword])}",
+                                          line_number))
+
+    for opener, line_number in stack:
+        results.append(unclosed_block(opener, line_number))
+    results.sort(key=lambda diagnostic: diagnostic.line)
+    return results
+
+
+def unclosed_block(opener, line_number):
+    return Diagnostic(UNCLOSED_CODES[opener], f"'{opener}' is never closed with '{BLOCK_CLOSERS[opener]}'", line_number)
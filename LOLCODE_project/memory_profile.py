@@ -0,0 +1,251 @@
+'''
+CMSC 124: LOLCODE Memory Profile
+tracemalloc accounting of peak and retained memory per pipeline phase
+(tokenize, organize, execute, output) and per LOLCODE line
+'''
+
+import json
+import os
+import tracemalloc
+
+from lexer_analyzer import tokenize
+from compiler import CompiledProgram, hash_source
+from syntax_analyzer import SyntaxAnalyzer
+from output_sinks import BufferSink
+
+PHASES = ("tokenize", "organize", "execute", "output")
+
+# traceback depth kept per allocation, enough to see whether it was made
+# under an output sink
+DEFAULT_TRACE_FRAMES = 12
+
+# call depth below which statements are measured one by one; tracemalloc
+# walks the whole Python stack on every allocation, so a statement deep in a
+# recursion costs time in proportion to its depth, and the hook's own
+# bookkeeping would make a deep recursion many times slower still
+DEFAULT_LINE_DEPTH = 64
+
+OUTPUT_MODULE = "output_sinks.py"
+PROFILE_MODULE = os.path.basename(__file__)
+
+
+# memory of one phase, in bytes relative to when profiling started
+class PhaseMemory:
+    __slots__ = ("name", "retained", "peak")
+
+    def __init__(self, name, retained=0, peak=0):
+        self.name = name
+        # allocated during the phase and still alive at its end
+        self.retained = retained
+        # highest traced memory while the phase ran
+        self.peak = peak
+
+    def to_dict(self):
+        return {"retained": self.retained, "peak": self.peak}
+
+
+# allocations made while one LOLCODE line ran
+class LineMemory:
+    __slots__ = ("line", "count", "net", "self_net", "peak")
+
+    def __init__(self, line):
+        self.line = line
+        self.count = 0
+        # bytes still allocated when the statement finished, with and without nested statements
+        self.net = 0
+        self.self_net = 0
+        # highest memory above the statement's starting point
+        self.peak = 0
+
+    def to_dict(self):
+        return {"count": self.count, "net": self.net, "self_net": self.self_net, "peak": self.peak}
+
+
+class MemoryProfile:
+    def __init__(self, frames=DEFAULT_TRACE_FRAMES, line_depth=DEFAULT_LINE_DEPTH):
+        self.frames = frames
+        self.line_depth = line_depth
+        # statements that ran deeper than line_depth calls, and the deepest call seen
+        self.deep_statements = 0
+        self.max_depth = 0
+        self.phases = {}
+        self.lines = {}
+        self.python_sites = []
+        self.source = {}
+        self.variables = None
+        self.errors = 0
+        self.cancelled = False
+        self._origin = 0
+        self._outer_peak = 0
+
+    def run(self, source, log_function=None, input_provider=None, output_sink=None, cancel_token=None):
+        # profile a whole run of `source`, lexing included, and return self
+        output_sink = output_sink if output_sink is not None else BufferSink()
+        already_tracing = tracemalloc.is_tracing()
+        if not already_tracing:
+            tracemalloc.start(self.frames)
+        try:
+            tracemalloc.reset_peak()
+            self._origin = tracemalloc.get_traced_memory()[0]
+
+            tokens = self._phase("tokenize", lambda: tokenize(source))
+            program = self._phase("organize", lambda: CompiledProgram(tokens, hash_source(source)))
+
+            analyzer = SyntaxAnalyzer(program, log_function=log_function, input_provider=input_provider,
+                                      output_sink=output_sink, cancel_token=cancel_token)
+            self._install(analyzer, log_function)
+            start = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+            self._outer_peak = 0
+            self.variables = analyzer.parse_program()
+            current, peak = tracemalloc.get_traced_memory()
+            execute = PhaseMemory("execute", current - start, max(peak, self._outer_peak) - self._origin)
+
+            # what the sink still holds was allocated while executing, it counts
+            # as output; the per-line tables kept here are not the program's
+            snapshot = tracemalloc.take_snapshot()
+            own = snapshot.filter_traces([tracemalloc.Filter(True, f"*{PROFILE_MODULE}")])
+            snapshot = snapshot.filter_traces([tracemalloc.Filter(False, f"*{PROFILE_MODULE}")])
+            buffered = sum(stat.size for stat in snapshot.filter_traces(
+                [tracemalloc.Filter(True, f"*{OUTPUT_MODULE}", all_frames=True)]).statistics("filename"))
+            execute.retained -= buffered + sum(stat.size for stat in own.statistics("filename"))
+            self.phases["execute"] = execute
+            self.python_sites = [(f"{os.path.basename(stat.traceback[0].filename)}:{stat.traceback[0].lineno}",
+                                  stat.size, stat.count)
+                                 for stat in snapshot.statistics("lineno")[:20]]
+            # the snapshots are big, they would count towards the output peak
+            del snapshot, own
+
+            self._phase("output", output_sink.close)
+            self.phases["output"].retained += buffered
+        finally:
+            if not already_tracing:
+                tracemalloc.stop()
+
+        self.errors = len(analyzer.error_messages)
+        self.cancelled = analyzer.cancelled
+        for line_number in self.lines:
+            self.source[line_number] = " ".join(str(token.value) for token in program.lines.get(line_number, []))
+        return self
+
+    def _phase(self, name, function):
+        start = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+        result = function()
+        current, peak = tracemalloc.get_traced_memory()
+        self.phases[name] = PhaseMemory(name, current - start, peak - self._origin)
+        return result
+
+    def _install(self, analyzer, log_function=None):
+        # wrap parse_line like the profiler does; each statement resets the
+        # tracemalloc peak, so the peaks are carried up the stack by hand.
+        # statements deeper than line_depth calls are not measured on their
+        # own, their memory goes to the line that made the call at that depth
+        inner = analyzer.parse_line
+        line_depth = self.line_depth
+        traced = tracemalloc.get_traced_memory
+        reset_peak = tracemalloc.reset_peak
+        lines = self.lines
+        # [peak so far, net of nested statements] per active statement
+        stack = []
+
+        def measured_parse_line():
+            frame = analyzer.frame
+            if frame is not None and frame.depth > line_depth:
+                if not self.deep_statements and log_function is not None:
+                    log_function(f"Memory profile: recursion deeper than {line_depth} calls, lines below it are "
+                                 f"not measured on their own and the run slows down with the depth\n")
+                self.deep_statements += 1
+                if frame.depth > self.max_depth:
+                    self.max_depth = frame.depth
+                return inner()
+            line = analyzer.current_line_number
+            if stack:
+                stack[-1][0] = max(stack[-1][0], traced()[1])
+            else:
+                self._outer_peak = max(self._outer_peak, traced()[1])
+            reset_peak()
+            start = traced()[0]
+            stack.append([start, 0])
+            try:
+                inner()
+            finally:
+                current, peak = traced()
+                frame_peak, nested = stack.pop()
+                peak = max(peak, frame_peak)
+                net = current - start
+                stats = lines.get(line)
+                if stats is None:
+                    stats = lines[line] = LineMemory(line)
+                stats.count += 1
+                stats.net += net
+                stats.self_net += net - nested
+                stats.peak = max(stats.peak, peak - start)
+                if stack:
+                    stack[-1][0] = max(stack[-1][0], peak)
+                    # a new LineMemory is ours, not the enclosing statement's
+                    stack[-1][1] += net + traced()[0] - current
+                else:
+                    self._outer_peak = max(self._outer_peak, peak)
+
+        analyzer.parse_line = measured_parse_line
+
+    @property
+    def peak(self):
+        # highest traced memory of the whole run
+        return max((phase.peak for phase in self.phases.values()), default=0)
+
+    def top_lines(self, limit=10, key="self_net"):
+        return sorted(self.lines.values(), key=lambda stats: getattr(stats, key), reverse=True)[:limit]
+
+    def to_dict(self, limit=20):
+        return {
+            "peak": self.peak,
+            "phases": {name: self.phases[name].to_dict() for name in PHASES if name in self.phases},
+            "lines": {str(stats.line): dict(stats.to_dict(), source=self.source.get(stats.line, ""))
+                      for stats in self.top_lines(limit)},
+            "python_sites": [{"site": site, "size": size, "count": count}
+                             for site, size, count in self.python_sites[:limit]],
+            "deep_statements": self.deep_statements,
+            "max_depth": self.max_depth,
+            "errors": self.errors,
+            "cancelled": self.cancelled,
+        }
+
+    def export_json(self, path, limit=20):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(limit), f, indent=2)
+
+    def summary(self, limit=10):
+        rows = [f"Memory profile: peak {format_bytes(self.peak)}",
+                f"{'phase':<10} {'retained':>12} {'peak':>12}"]
+        for name in PHASES:
+            if name in self.phases:
+                phase = self.phases[name]
+                rows.append(f"{name:<10} {format_bytes(phase.retained):>12} {format_bytes(phase.peak):>12}")
+
+        rows.append("")
+        rows.append(f"{'line':>6} {'count':>8} {'self net':>12} {'peak':>12}  source")
+        for stats in self.top_lines(limit):
+            rows.append(f"{stats.line:>6} {stats.count:>8} {format_bytes(stats.self_net):>12} "
+                        f"{format_bytes(stats.peak):>12}  {self.source.get(stats.line, '')[:50]}")
+
+        if self.deep_statements:
+            rows.append(f"warning: {self.deep_statements} statement(s) ran deeper than {self.line_depth} calls "
+                        f"(up to {self.max_depth}); their memory is counted in the line that made the call, "
+                        f"and tracemalloc slows down in proportion to the recursion depth")
+
+        rows.append("")
+        rows.append(f"{'retained':>12} {'blocks':>8}  python site")
+        for site, size, count in self.python_sites[:limit]:
+            rows.append(f"{format_bytes(size):>12} {count:>8}  {site}")
+        return "\n".join(rows) + "\n"
+
+
+def format_bytes(size):
+    sign = "-" if size < 0 else ""
+    size = abs(size)
+    for unit in ("B", "KiB", "MiB"):
+        if size < 1024 or unit == "MiB":
+            return f"{sign}{size:.0f} {unit}" if unit == "B" else f"{sign}{size:.1f} {unit}"
+        size /= 1024
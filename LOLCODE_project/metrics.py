@@ -0,0 +1,171 @@
+'''
+CMSC 124: LOLCODE Run Metrics
+Counters collected from every run, exported as JSON or Prometheus text
+'''
+
+import json
+
+from tracer import statement_kind
+
+METRIC_FORMATS = ("json", "prometheus")
+
+# phases timed for a run: lexing (or loading the .lolc), executing the
+# statements, and delivering output (part of execute)
+PHASES = ("lex", "execute", "output")
+
+# plain counters: (attribute, prometheus name, help text)
+COUNTERS = (
+    ("runs", "lolcode_runs_total", "Program runs"),
+    ("tokens_lexed", "lolcode_tokens_lexed_total", "Tokens produced by the lexer"),
+    ("lines_parsed", "lolcode_lines_parsed_total", "Distinct source lines that were executed"),
+    ("statements_executed", "lolcode_statements_executed_total", "Statements executed"),
+    ("function_calls", "lolcode_function_calls_total", "LOLCODE function calls"),
+    ("loop_iterations", "lolcode_loop_iterations_total", "Loop body iterations"),
+    ("bytes_emitted", "lolcode_output_bytes_total", "Bytes of VISIBLE output"),
+    ("errors", "lolcode_errors_total", "Errors logged"),
+    ("cancelled", "lolcode_cancelled_runs_total", "Runs stopped by a timeout or interrupt"),
+)
+
+
+# counters and phase timings of one run, or the sum of several runs
+class RunMetrics:
+    def __init__(self):
+        self.runs = 0
+        self.tokens_lexed = 0
+        self.lines_parsed = 0
+        self.statements_executed = 0
+        self.statements_by_kind = {}
+        self.coercions = {"numeric": 0, "bool": 0}
+        self.function_calls = 0
+        self.loop_iterations = 0
+        self.bytes_emitted = 0
+        self.errors = 0
+        self.cancelled = 0
+        self.phase_seconds = {phase: 0.0 for phase in PHASES}
+
+    @classmethod
+    def collect(cls, analyzer, program=None, lex_seconds=0.0, execute_seconds=0.0):
+        # read the counters an analyzer kept during its run, call it after
+        # the output sink is flushed so every byte is counted
+        metrics = cls()
+        metrics.runs = 1
+        lines = program.lines if program is not None else analyzer.lines
+        if program is not None:
+            metrics.tokens_lexed = len(program.tokens)
+        else:
+            metrics.tokens_lexed = sum(len(tokens) for tokens in lines.values())
+
+        line_hits = analyzer.line_hits
+        metrics.lines_parsed = len(line_hits)
+        metrics.statements_executed = sum(line_hits.values())
+        # the kind only depends on the line, so hits are grouped afterwards
+        by_kind = metrics.statements_by_kind
+        for line_number, hits in line_hits.items():
+            kind = statement_kind(lines.get(line_number, []))
+            by_kind[kind] = by_kind.get(kind, 0) + hits
+
+        semantics = analyzer.semantics
+        metrics.coercions = {"numeric": semantics.numeric_coercions, "bool": semantics.bool_coercions}
+        metrics.function_calls = analyzer.function_calls
+        metrics.loop_iterations = analyzer.loop_iterations
+        metrics.bytes_emitted = analyzer.output_sink.bytes_written
+        metrics.errors = len(analyzer.error_messages)
+        metrics.cancelled = int(analyzer.cancelled)
+        metrics.phase_seconds = {
+            "lex": lex_seconds,
+            "execute": execute_seconds,
+            "output": analyzer.output_sink.flush_seconds,
+        }
+        return metrics
+
+    @classmethod
+    def combine(cls, metrics_list):
+        # sum of several runs, e.g. the cases of a batch
+        total = cls()
+        for metrics in metrics_list:
+            total.add(metrics)
+        return total
+
+    def add(self, other):
+        for attribute, _, _ in COUNTERS:
+            setattr(self, attribute, getattr(self, attribute) + getattr(other, attribute))
+        for kind, count in other.statements_by_kind.items():
+            self.statements_by_kind[kind] = self.statements_by_kind.get(kind, 0) + count
+        for kind, count in other.coercions.items():
+            self.coercions[kind] = self.coercions.get(kind, 0) + count
+        for phase, seconds in other.phase_seconds.items():
+            self.phase_seconds[phase] = self.phase_seconds.get(phase, 0.0) + seconds
+        return self
+
+    def to_dict(self):
+        data = {attribute: getattr(self, attribute) for attribute, _, _ in COUNTERS}
+        data["statements_by_kind"] = dict(sorted(self.statements_by_kind.items()))
+        data["coercions"] = dict(self.coercions)
+        data["phase_seconds"] = dict(self.phase_seconds)
+        return data
+
+    @classmethod
+    def from_dict(cls, data):
+        metrics = cls()
+        for attribute, _, _ in COUNTERS:
+            setattr(metrics, attribute, data.get(attribute, 0))
+        metrics.statements_by_kind = dict(data.get("statements_by_kind", {}))
+        metrics.coercions = dict(data.get("coercions", metrics.coercions))
+        metrics.phase_seconds = dict(data.get("phase_seconds", metrics.phase_seconds))
+        return metrics
+
+    def to_json(self):
+        return json.dumps(self.to_dict(), indent=2) + "\n"
+
+    def to_prometheus(self, labels=None):
+        # text exposition format, `labels` (e.g. {"program": "x.lol"}) go on every sample
+        base = dict(labels or {})
+
+        def sample(name, value, **extra):
+            pairs = dict(base, **extra)
+            label_text = ",".join(f'{key}="{_escape_label(str(val))}"' for key, val in pairs.items())
+            return f"{name}{{{label_text}}} {value}" if label_text else f"{name} {value}"
+
+        lines = []
+        for attribute, name, help_text in COUNTERS:
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} counter")
+            lines.append(sample(name, getattr(self, attribute)))
+
+        lines.append("# HELP lolcode_statements_total Statements executed, by kind")
+        lines.append("# TYPE lolcode_statements_total counter")
+        for kind, count in sorted(self.statements_by_kind.items()):
+            lines.append(sample("lolcode_statements_total", count, kind=kind))
+
+        lines.append("# HELP lolcode_coercions_total Values converted to NUMBR/NUMBAR or TROOF")
+        lines.append("# TYPE lolcode_coercions_total counter")
+        for kind, count in sorted(self.coercions.items()):
+            lines.append(sample("lolcode_coercions_total", count, target=kind))
+
+        lines.append("# HELP lolcode_phase_seconds Time spent per interpreter phase")
+        lines.append("# TYPE lolcode_phase_seconds gauge")
+        for phase, seconds in self.phase_seconds.items():
+            lines.append(sample("lolcode_phase_seconds", f"{seconds:.6f}", phase=phase))
+        return "\n".join(lines) + "\n"
+
+    def format(self, metrics_format="json", labels=None):
+        if metrics_format == "prometheus":
+            return self.to_prometheus(labels)
+        return self.to_json()
+
+    def summary(self):
+        # short human readable listing, e.g. for the GUI console
+        lines = [
+            f"Metrics: {self.statements_executed} statements on {self.lines_parsed} lines, "
+            f"{self.tokens_lexed} tokens",
+            f"  calls {self.function_calls}, loop iterations {self.loop_iterations}, "
+            f"output {self.bytes_emitted} bytes, errors {self.errors}",
+            "  coercions " + ", ".join(f"{kind} {count}" for kind, count in sorted(self.coercions.items())),
+            "  statements " + ", ".join(f"{kind} {count}" for kind, count in sorted(self.statements_by_kind.items())),
+            "  phases " + ", ".join(f"{phase} {seconds * 1000:.2f} ms" for phase, seconds in self.phase_seconds.items()),
+        ]
+        return "\n".join(lines) + "\n"
+
+
+def _escape_label(value):
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
@@ -0,0 +1,150 @@
+'''
+CMSC 124: LOLCODE Output Sinks
+Buffered, pluggable targets for VISIBLE output
+'''
+
+import sys
+import time
+
+# default number of characters buffered before a flush
+DEFAULT_FLUSH_THRESHOLD = 8192
+
+
+# base output sink, writes are buffered until the threshold is reached
+class OutputSink:
+    def __init__(self, flush_threshold=DEFAULT_FLUSH_THRESHOLD):
+        self.flush_threshold = flush_threshold
+        self.bytes_written = 0
+        # time spent delivering flushed chunks to the target
+        self.flush_seconds = 0.0
+        self._pending = []
+        self._pending_size = 0
+
+    def write(self, text):
+        if not text:
+            return
+        self._pending.append(text)
+        self._pending_size += len(text)
+        if self._pending_size >= self.flush_threshold:
+            self.flush()
+
+    def flush(self):
+        if not self._pending:
+            return
+        data = ''.join(self._pending)
+        self._pending = []
+        self._pending_size = 0
+        self.bytes_written += len(data.encode('utf-8'))
+        start = time.perf_counter()
+        self._write_through(data)
+        self.flush_seconds += time.perf_counter() - start
+
+    def close(self):
+        self.flush()
+
+    def _write_through(self, data):
+        # subclasses deliver a flushed chunk to their target
+        raise NotImplementedError
+
+
+# keeps all output in memory
+class BufferSink(OutputSink):
+    def __init__(self, flush_threshold=DEFAULT_FLUSH_THRESHOLD):
+        super().__init__(flush_threshold)
+        self._chunks = []
+
+    def _write_through(self, data):
+        self._chunks.append(data)
+
+    def getvalue(self):
+        self.flush()
+        return ''.join(self._chunks)
+
+    def clear(self):
+        self._pending = []
+        self._pending_size = 0
+        self._chunks = []
+
+
+# writes output to a file path, or to an already opened file
+class FileSink(OutputSink):
+    def __init__(self, target, flush_threshold=DEFAULT_FLUSH_THRESHOLD, encoding='utf-8'):
+        super().__init__(flush_threshold)
+        if isinstance(target, str):
+            self.file = open(target, "w", encoding=encoding)
+            self._owns_file = True
+        else:
+            self.file = target
+            self._owns_file = False
+
+    def _write_through(self, data):
+        self.file.write(data)
+
+    def close(self):
+        self.flush()
+        if self._owns_file:
+            self.file.close()
+        else:
+            self.file.flush()
+
+
+# writes output to a stream such as stdout or a pipe, flushing it each time
+class PipeSink(OutputSink):
+    def __init__(self, stream=None, flush_threshold=DEFAULT_FLUSH_THRESHOLD):
+        super().__init__(flush_threshold)
+        self.stream = stream
+
+    def _write_through(self, data):
+        stream = self.stream if self.stream is not None else sys.stdout
+        stream.write(data)
+        stream.flush()
+
+
+# posts flushed chunks to a queue, e.g. for a GUI to drain
+class QueueSink(OutputSink):
+    def __init__(self, queue, tag="console", flush_threshold=DEFAULT_FLUSH_THRESHOLD):
+        super().__init__(flush_threshold)
+        self.queue = queue
+        self.tag = tag
+
+    def _write_through(self, data):
+        self.queue.put((self.tag, data))
+
+
+# hands flushed chunks to a callback
+class CallbackSink(OutputSink):
+    def __init__(self, callback, flush_threshold=DEFAULT_FLUSH_THRESHOLD):
+        super().__init__(flush_threshold)
+        self.callback = callback
+
+    def _write_through(self, data):
+        self.callback(data)
+
+
+# passes writes straight to another sink and keeps a transcript of them
+class RecordingSink(OutputSink):
+    def __init__(self, target):
+        super().__init__()
+        self.target = target
+        self._chunks = []
+        self.length = 0
+
+    def write(self, text):
+        if not text:
+            return
+        self._chunks.append(text)
+        self.length += len(text)
+        self.target.write(text)
+
+    def flush(self):
+        self.target.flush()
+        self.bytes_written = self.target.bytes_written
+        self.flush_seconds = self.target.flush_seconds
+
+    def close(self):
+        self.target.close()
+        self.bytes_written = self.target.bytes_written
+        self.flush_seconds = self.target.flush_seconds
+
+    def getvalue(self):
+        return ''.join(self._chunks)
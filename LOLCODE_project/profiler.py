@@ -0,0 +1,222 @@
+'''
+CMSC 124: LOLCODE Profiler
+Per-line and per-function hit counts, cumulative time and self time
+'''
+
+import json
+import threading
+import time
+
+# sort keys accepted by ProfileReport.format_table
+SORT_KEYS = ("self", "total", "count", "line")
+
+
+# totals for one source line or one function
+class ProfileStats:
+    __slots__ = ("key", "count", "total_ns", "self_ns")
+
+    def __init__(self, key):
+        self.key = key
+        self.count = 0
+        self.total_ns = 0
+        self.self_ns = 0
+
+    def to_dict(self):
+        return {"count": self.count, "total_ns": self.total_ns, "self_ns": self.self_ns}
+
+
+# exact mode wraps an analyzer's parse_line and call_function and times every
+# statement; sampling mode leaves them alone and instead reads the current line
+# and call stack from a background thread
+class Profiler:
+    def __init__(self, sample_interval=None):
+        # seconds between samples, None for exact timing
+        self.sample_interval = sample_interval
+        self.lines = {}
+        self.functions = {}
+        self.samples = 0
+        self.elapsed_ns = 0
+        self._start_ns = None
+        self._stop = threading.Event()
+        self._sampler = None
+
+    def _stats(self, table, key):
+        stats = table.get(key)
+        if stats is None:
+            stats = table[key] = ProfileStats(key)
+        return stats
+
+    def install(self, analyzer):
+        self._start_ns = time.perf_counter_ns()
+        if self.sample_interval:
+            self._sampler = threading.Thread(target=self._sample, args=(analyzer,), daemon=True)
+            self._sampler.start()
+        else:
+            self._install_exact(analyzer)
+        return self
+
+    def _install_exact(self, analyzer):
+        clock = time.perf_counter_ns
+        inner_line = analyzer.parse_line
+        inner_call = analyzer.call_function
+        line_stats = self.lines
+        function_stats = self.functions
+        stats_for = self._stats
+
+        # time spent in nested statements / nested calls, one slot per active frame
+        line_children = []
+        call_children = []
+        # recursion would count the same time twice in total_ns
+        active_lines = {}
+        active_functions = {}
+
+        def profiled_parse_line():
+            line = analyzer.current_line_number
+            active_lines[line] = active_lines.get(line, 0) + 1
+            line_children.append(0)
+            start = clock()
+            try:
+                inner_line()
+            finally:
+                elapsed = clock() - start
+                nested = line_children.pop()
+                if line_children:
+                    line_children[-1] += elapsed
+                active_lines[line] -= 1
+                stats = stats_for(line_stats, line)
+                stats.count += 1
+                stats.self_ns += elapsed - nested
+                if not active_lines[line]:
+                    stats.total_ns += elapsed
+
+        def profiled_call_function(function, arguments):
+            name = function.name
+            active_functions[name] = active_functions.get(name, 0) + 1
+            call_children.append(0)
+            start = clock()
+            try:
+                return inner_call(function, arguments)
+            finally:
+                elapsed = clock() - start
+                nested = call_children.pop()
+                if call_children:
+                    call_children[-1] += elapsed
+                active_functions[name] -= 1
+                stats = stats_for(function_stats, name)
+                stats.count += 1
+                stats.self_ns += elapsed - nested
+                if not active_functions[name]:
+                    stats.total_ns += elapsed
+
+        analyzer.parse_line = profiled_parse_line
+        analyzer.call_function = profiled_call_function
+
+    def _sample(self, analyzer):
+        # each sample is weighted by the real time since the previous one
+        clock = time.perf_counter_ns
+        last = clock()
+        while not self._stop.wait(self.sample_interval):
+            now = clock()
+            weight = now - last
+            last = now
+            line = analyzer.current_line_number
+            if line is None:
+                continue
+            self.samples += 1
+
+            stats = self._stats(self.lines, line)
+            stats.count += 1
+            stats.self_ns += weight
+            stats.total_ns += weight
+
+            # loop headers and call sites on the stack are still running,
+            # and so are the functions that were called
+            frames = tuple(analyzer.call_stack)
+            calls = [name for kind, name, _ in frames if kind == 'function']
+            seen_lines = {line}
+            for _, _, frame_line in frames:
+                if frame_line not in seen_lines:
+                    seen_lines.add(frame_line)
+                    self._stats(self.lines, frame_line).total_ns += weight
+            for name in set(calls):
+                self._stats(self.functions, name).total_ns += weight
+            if calls:
+                function = self._stats(self.functions, calls[-1])
+                function.count += 1
+                function.self_ns += weight
+
+    def stop(self):
+        if self._start_ns is not None:
+            self.elapsed_ns = time.perf_counter_ns() - self._start_ns
+        self._stop.set()
+        if self._sampler is not None:
+            self._sampler.join()
+            self._sampler = None
+
+    def report(self, program=None):
+        return ProfileReport(self, program)
+
+
+# profile results, with the source text of each line when the program is given
+class ProfileReport:
+    def __init__(self, profiler, program=None):
+        self.mode = "sampling" if profiler.sample_interval else "exact"
+        self.sample_interval = profiler.sample_interval
+        self.samples = profiler.samples
+        self.elapsed_ns = profiler.elapsed_ns
+        self.lines = dict(profiler.lines)
+        self.functions = dict(profiler.functions)
+        self.source = {}
+        if program is not None:
+            for line_number in self.lines:
+                tokens = program.lines.get(line_number, [])
+                self.source[line_number] = " ".join(str(token.value) for token in tokens)
+
+    def sorted_stats(self, table, sort="self"):
+        if sort == "line":
+            return sorted(table.values(), key=lambda stats: stats.key)
+        attribute = {"self": "self_ns", "total": "total_ns", "count": "count"}[sort]
+        return sorted(table.values(), key=lambda stats: getattr(stats, attribute), reverse=True)
+
+    def format_table(self, sort="self", limit=None):
+        count_label = "samples" if self.mode == "sampling" else "count"
+        rows = [f"Profile ({self.mode}): {self.elapsed_ns / 1e6:.2f} ms"]
+        rows.append(f"{'line':>6} {count_label:>9} {'total ms':>10} {'self ms':>10}  source")
+        line_stats = self.sorted_stats(self.lines, sort)
+        if limit is not None:
+            line_stats = line_stats[:limit]
+        for stats in line_stats:
+            rows.append(f"{stats.key:>6} {stats.count:>9} {stats.total_ns / 1e6:>10.3f} {stats.self_ns / 1e6:>10.3f}  "
+                        f"{self.source.get(stats.key, '')[:60]}")
+
+        if self.functions:
+            calls_label = "samples" if self.mode == "sampling" else "calls"
+            rows.append("")
+            rows.append(f"{'function':<20} {calls_label:>9} {'total ms':>10} {'self ms':>10}")
+            for stats in self.sorted_stats(self.functions, sort):
+                rows.append(f"{stats.key:<20} {stats.count:>9} {stats.total_ns / 1e6:>10.3f} {stats.self_ns / 1e6:>10.3f}")
+        return "\n".join(rows) + "\n"
+
+    def to_dict(self):
+        return {
+            "mode": self.mode,
+            "sample_interval": self.sample_interval,
+            "samples": self.samples,
+            "elapsed_ns": self.elapsed_ns,
+            "lines": {str(line): dict(stats.to_dict(), source=self.source.get(line, ""))
+                      for line, stats in sorted(self.lines.items())},
+            "functions": {name: stats.to_dict() for name, stats in sorted(self.functions.items())},
+        }
+
+    def export_json(self, path):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f, indent=2)
+
+    def annotations(self):
+        # short per-line labels for the GUI gutter, with the line's self time
+        # relative to the hottest line (0 to 1)
+        total = max(1, max((stats.self_ns for stats in self.lines.values()), default=1))
+        labels = {}
+        for line, stats in self.lines.items():
+            labels[line] = (f"{stats.count}x {stats.total_ns / 1e6:.1f}ms", stats.self_ns / total)
+        return labels
@@ -0,0 +1,220 @@
+'''
+CMSC 124: LOLCODE Result Cache
+Caches the output, symbol table and diagnostics of deterministic runs
+'''
+
+import hashlib
+import json
+import os
+import time
+from collections import OrderedDict
+
+from syntax_analyzer import SEMANTICS_VERSION
+
+# bump when the stored entry layout changes
+CACHE_FORMAT_VERSION = 1
+
+
+def program_key(program, inputs=None):
+    # hash of the normalized token stream (comments and spacing already
+    # dropped by the lexer), plus the input vector when GIMMEH is used.
+    # line numbers are kept because diagnostics refer to them, and the
+    # interpreter's semantics version because a newer one may run it differently.
+    digest = hashlib.sha256()
+    digest.update(f"v{CACHE_FORMAT_VERSION}\ns{SEMANTICS_VERSION}\n".encode('utf-8'))
+    for line_number in program.line_numbers:
+        digest.update(f"{line_number}\x1d".encode('utf-8'))
+        for token in program.lines[line_number]:
+            digest.update(f"{token.type}\x1f{token.value}\x1e".encode('utf-8'))
+    if program.reads_input:
+        digest.update(b"\x00inputs\x00")
+        digest.update(json.dumps([str(value) for value in inputs]).encode('utf-8'))
+    return digest.hexdigest()
+
+
+def is_cacheable(program, inputs=None):
+    # a run is reproducible only from its source and its input vector, so a
+    # program that reads input without a fixed vector (stdin, a dialog) is not
+    if program.reads_input and inputs is None:
+        return False
+    return True
+
+
+# a stored run result
+class CachedResult:
+    def __init__(self, output, variables, errors, created=None):
+        self.output = output
+        self.variables = variables
+        self.errors = errors
+        self.created = created if created is not None else time.time()
+        self._size = None
+
+    def size(self):
+        # rough memory footprint used for size-based eviction
+        if self._size is None:
+            self._size = len(self.output) + len(json.dumps(self.variables)) + sum(len(e) for e in self.errors)
+        return self._size
+
+    def to_dict(self):
+        return {
+            "version": CACHE_FORMAT_VERSION,
+            "output": self.output,
+            "variables": self.variables,
+            "errors": self.errors,
+            "created": self.created,
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data["output"], data["variables"], data["errors"], data["created"])
+
+
+# how many disk writes happen between backing store prunes
+DISK_PRUNE_INTERVAL = 128
+
+
+# LRU cache with size and age limits and an optional on-disk backing store
+class ResultCache:
+    def __init__(self, max_entries=1024, max_bytes=64 * 1024 * 1024, max_age=24 * 3600, cache_dir=None):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.cache_dir = cache_dir
+        self._entries = OrderedDict()
+        self._total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.bypasses = 0
+        self._writes_since_prune = 0
+
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+
+    def _expired(self, entry):
+        return self.max_age is not None and time.time() - entry.created > self.max_age
+
+    def _disk_path(self, key):
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    def get(self, key):
+        entry = self._entries.get(key)
+        if entry is None and self.cache_dir:
+            entry = self._load_from_disk(key)
+            if entry is not None:
+                self._store_in_memory(key, entry)
+
+        if entry is None:
+            self.misses += 1
+            return None
+
+        if self._expired(entry):
+            self.remove(key)
+            self.misses += 1
+            return None
+
+        # most recently used entries live at the end; one loaded from disk
+        # may already have been evicted again if it is over the size limit
+        if key in self._entries:
+            self._entries.move_to_end(key)
+        self.hits += 1
+        return entry
+
+    def put(self, key, entry):
+        self._store_in_memory(key, entry)
+        if self.cache_dir:
+            self._save_to_disk(key, entry)
+            self._writes_since_prune += 1
+            if self._writes_since_prune >= DISK_PRUNE_INTERVAL:
+                self.prune_disk()
+
+    def remove(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._total_bytes -= entry.size()
+        if self.cache_dir:
+            try:
+                os.remove(self._disk_path(key))
+            except OSError:
+                pass
+
+    def clear(self):
+        for key in list(self._entries):
+            self.remove(key)
+        if self.cache_dir:
+            for filename in os.listdir(self.cache_dir):
+                if filename.endswith(".json"):
+                    self.remove(filename[:-5])
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _store_in_memory(self, key, entry):
+        if key in self._entries:
+            self._total_bytes -= self._entries.pop(key).size()
+        self._entries[key] = entry
+        self._total_bytes += entry.size()
+
+        # evict least recently used entries until both limits hold
+        while self._entries and (len(self._entries) > self.max_entries or self._total_bytes > self.max_bytes):
+            _, evicted = self._entries.popitem(last=False)
+            self._total_bytes -= evicted.size()
+
+    def _load_from_disk(self, key):
+        try:
+            with open(self._disk_path(key), "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if data.get("version") != CACHE_FORMAT_VERSION:
+            return None
+        return CachedResult.from_dict(data)
+
+    def _save_to_disk(self, key, entry):
+        # write to a temp file first so readers never see a partial entry
+        path = self._disk_path(key)
+        temp_path = f"{path}.{os.getpid()}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump(entry.to_dict(), f)
+        os.replace(temp_path, path)
+
+    def prune_disk(self):
+        # apply the age, entry and size limits to the backing store, oldest
+        # files first; the size limit counts the bytes of the files
+        if not self.cache_dir:
+            return 0
+        self._writes_since_prune = 0
+        files = []
+        for filename in os.listdir(self.cache_dir):
+            if filename.endswith(".json"):
+                path = os.path.join(self.cache_dir, filename)
+                try:
+                    files.append((os.path.getmtime(path), os.path.getsize(path), path))
+                except OSError:
+                    # removed by another process meanwhile
+                    pass
+        files.sort()
+
+        removed = 0
+        now = time.time()
+        excess = len(files) - self.max_entries
+        total_bytes = sum(size for _, size, _ in files)
+        for index, (mtime, size, path) in enumerate(files):
+            if (index < excess or (self.max_age is not None and now - mtime > self.max_age)
+                    or total_bytes > self.max_bytes):
+                try:
+                    os.remove(path)
+                    removed += 1
+                    total_bytes -= size
+                except OSError:
+                    pass
+        return removed
+
+    def stats(self):
+        return {
+            "entries": len(self._entries),
+            "bytes": self._total_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "bypasses": self.bypasses,
+        }
+
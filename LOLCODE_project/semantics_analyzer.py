@@ -3,11 +3,17 @@ CMSC 124: LOLCODE Semantics Evaluator (30% - Basic Operations)
 Implements: arithmetic, concatenation, boolean, comparison, assignment, VISIBLE
 '''
 
+from output_sinks import BufferSink
+
 #  semantics evaluator for LOLCODE
 class SemanticsEvaluator:
-    def __init__(self, symbol_table):
+    def __init__(self, symbol_table, output_sink=None):
         self.symbol_table = symbol_table
-        self.output_buffer = []
+        # VISIBLE output goes to this sink (in memory by default)
+        self.output_sink = output_sink if output_sink is not None else BufferSink()
+        # values that actually had to be converted (not already a number / TROOF)
+        self.numeric_coercions = 0
+        self.bool_coercions = 0
     
     # evaluate arithmetic operations
     def evaluate_arithmetic(self, operation, operand1, operand2):
@@ -112,6 +118,7 @@ class SemanticsEvaluator:
         
         # handle string inputs
         if isinstance(value, str):
+            self.numeric_coercions += 1
             # handle TROOF values
             value_upper = value.upper()
             if value_upper == 'WIN':
@@ -150,17 +157,27 @@ class SemanticsEvaluator:
                 return self._to_bool(self.symbol_table[value].get('value'))
             
             # empty string is false
+            self.bool_coercions += 1
             return len(value) > 0
         
         if isinstance(value, (int, float)):
+            self.bool_coercions += 1
             return value != 0
         
         return False
     
     # handle VISIBLE statement
+    def write_output(self, text):
+        self.output_sink.write(text)
+
+    # get everything written so far (only in-memory sinks keep it)
     def get_output(self):
-        return ''.join(self.output_buffer)
+        self.output_sink.flush()
+        if hasattr(self.output_sink, 'getvalue'):
+            return self.output_sink.getvalue()
+        return ''
     
-    # append to output buffer
+    # clear the output buffer
     def clear_output(self):
-        self.output_buffer = []
+        if hasattr(self.output_sink, 'clear'):
+            self.output_sink.clear()
@@ -0,0 +1,267 @@
+'''
+CMSC 124: LOLCODE Static Analysis
+Whole-program checks made before anything runs: undeclared variables,
+unknown functions and wrong argument counts, and unreachable code after
+GTFO or FOUND YR, which can optionally be pruned from the program
+'''
+
+from compiler import CompiledProgram
+from diagnostics import Diagnostic, WARNING
+from live_diagnostics import BLOCK_CLOSERS
+
+# keywords followed by a name that is not a variable read
+NAME_KEYWORDS = ('I HAS A', 'I IZ', 'IM IN YR', 'IM OUTTA YR', 'HOW IZ I')
+
+# operations with any number of operands, closed by MKAY
+VARIADIC_OPERATIONS = ('ALL OF', 'ANY OF', 'SMOOSH')
+OPERATION_TYPES = ('Arithmetic Operation', 'Boolean Operation', 'Comparison Operation')
+
+# lines that start the next branch or close the block; unreachable code
+# after a GTFO or FOUND YR ends at the first of them in the same block
+BRANCH_ENDS = ('OMG', 'OMGWTF', 'OIC', 'NO WAI', 'MEBBE', 'YA RLY', 'IM OUTTA YR', 'IF U SAY SO', 'KTHXBYE')
+
+# blocks a GTFO leaves (at the top level it does nothing)
+GTFO_TARGETS = ('IM IN YR', 'WTF?', 'HOW IZ I')
+
+
+# a HOW IZ I found in the program
+class FunctionSignature:
+    __slots__ = ("name", "parameters", "line")
+
+    def __init__(self, name, parameters, line):
+        self.name = name
+        self.parameters = parameters
+        self.line = line
+
+
+# one pass over the line structure of a compiled program; nothing is executed
+class StaticAnalyzer:
+    def __init__(self, program):
+        self.program = program
+        self.diagnostics = []
+        # lines that can never run, in order
+        self.unreachable_lines = []
+        self.functions = {}
+
+    def analyze(self):
+        # returns the Diagnostic objects, sorted by line
+        self.diagnostics = []
+        self.unreachable_lines = []
+        self.functions = self._collect_functions()
+        declared_anywhere = self._collect_declarations()
+
+        lines = self.program.lines
+        # open blocks as (keyword, line), and the enclosing function definitions
+        stack = []
+        scopes = []
+        declared = {'IT'}
+        defined = set()
+        # [line, block depth, keyword, reported] of the GTFO/FOUND YR that ended a branch
+        dead = None
+
+        for line_number in self.program.line_numbers:
+            tokens = lines[line_number]
+            keyword = tokens[0].value
+
+            if dead is not None:
+                if keyword == 'KTHXBYE' or (keyword in BRANCH_ENDS and len(stack) <= dead[1]):
+                    dead = None
+                else:
+                    if not dead[3]:
+                        dead[3] = True
+                        self.diagnostics.append(Diagnostic(
+                            "W801", f"Unreachable code after '{dead[2]}' on line {dead[0]}", line_number,
+                            severity=WARNING))
+                    self.unreachable_lines.append(line_number)
+
+            if keyword == 'HOW IZ I':
+                function = self.functions.get(tokens[1].value) if len(tokens) > 1 else None
+                if function is not None and function.line == line_number and not scopes:
+                    defined.add(function.name)
+                scopes.append(function)
+                stack.append((keyword, line_number))
+                continue
+
+            # names visible here: inside a function, its parameters and every
+            # variable the program declares (a call can read the globals); at
+            # the top level, what was declared on earlier lines (a function's
+            # locals live in the frame of its call)
+            if scopes:
+                visible = (declared_anywhere, scopes[-1].parameters if scopes[-1] is not None else ())
+            else:
+                visible = (declared,)
+            # a loop header declares its variable before its own condition reads it
+            if keyword == 'IM IN YR' and _declared_name(tokens) is not None:
+                visible += ({_declared_name(tokens)},)
+            self._check_names(tokens, line_number, visible)
+            self._check_calls(tokens, line_number, defined, bool(scopes))
+
+            name = _declared_name(tokens)
+            if name is not None and not scopes:
+                declared.add(name)
+
+            if keyword in BLOCK_CLOSERS:
+                stack.append((keyword, line_number))
+            elif stack and BLOCK_CLOSERS[stack[-1][0]] == keyword:
+                if stack.pop()[0] == 'HOW IZ I':
+                    scopes.pop()
+
+            if dead is None and keyword in ('GTFO', 'FOUND YR') and self._leaves_block(keyword, stack, scopes):
+                dead = [line_number, len(stack), keyword, False]
+
+        self.diagnostics.sort(key=lambda diagnostic: diagnostic.line)
+        return self.diagnostics
+
+    def _leaves_block(self, keyword, stack, scopes):
+        if keyword == 'FOUND YR':
+            return bool(scopes)
+        return any(opener in GTFO_TARGETS for opener, _ in stack)
+
+    def _collect_functions(self):
+        # name -> FunctionSignature of every well formed HOW IZ I header
+        functions = {}
+        for line_number in self.program.line_numbers:
+            tokens = self.program.lines[line_number]
+            if tokens[0].value != 'HOW IZ I' or len(tokens) < 2 or tokens[1].type != 'Variable Identifier':
+                continue
+            parameters = [tokens[index + 1].value for index in range(2, len(tokens) - 1)
+                          if tokens[index].value == 'YR' and tokens[index + 1].type == 'Variable Identifier']
+            functions.setdefault(tokens[1].value, FunctionSignature(tokens[1].value, parameters, line_number))
+        return functions
+
+    def _collect_declarations(self):
+        # every name the program declares (IT and loop variables included)
+        names = {'IT'}
+        for line_number in self.program.line_numbers:
+            name = _declared_name(self.program.lines[line_number])
+            if name is not None:
+                names.add(name)
+        return names
+
+    def _check_names(self, tokens, line_number, visible):
+        # report reads and writes of variables that are not declared
+        # (declarations take effect after the line, I HAS A x ITZ x reads the old x)
+        reported = set()
+        for index, token in enumerate(tokens):
+            if token.type != 'Variable Identifier':
+                continue
+            if index > 0 and tokens[index - 1].value in NAME_KEYWORDS:
+                continue
+            if _is_loop_variable(tokens, index):
+                continue
+            name = token.value
+            if name in reported or any(name in names for names in visible):
+                continue
+            reported.add(name)
+            self.diagnostics.append(Diagnostic("E801", f"Variable '{name}' is used before it is declared",
+                                               line_number))
+
+    def _check_calls(self, tokens, line_number, defined, in_function):
+        calls = {}
+        for index, token in enumerate(tokens):
+            if token.value == 'I IZ' and index not in calls:
+                _parse_call(tokens, index, calls)
+
+        for name, arguments in calls.values():
+            function = self.functions.get(name)
+            if function is None:
+                self.diagnostics.append(Diagnostic("E610", f"Undefined function '{name}'", line_number))
+            elif not in_function and name not in defined:
+                # top-level definitions only exist once their HOW IZ I has run
+                self.diagnostics.append(Diagnostic(
+                    "E802", f"Function '{name}' is called before its definition on line {function.line}", line_number))
+            elif arguments != len(function.parameters):
+                self.diagnostics.append(Diagnostic(
+                    "E611", f"Function '{name}' takes {len(function.parameters)} argument(s) but {arguments} "
+                    f"were given", line_number))
+
+
+def _declared_name(tokens):
+    # name declared by an I HAS A line, or created by a loop header
+    if tokens[0].value == 'I HAS A' and len(tokens) > 1 and tokens[1].type == 'Variable Identifier':
+        return tokens[1].value
+    if tokens[0].value == 'IM IN YR' and len(tokens) > 4 and tokens[3].value == 'YR':
+        return tokens[4].value
+    return None
+
+
+def _is_loop_variable(tokens, index):
+    # IM IN YR <label> UPPIN YR <var>: the loop creates its variable when missing
+    return index == 4 and tokens[0].value == 'IM IN YR' and tokens[3].value == 'YR'
+
+
+def _skip_expression(tokens, index, calls):
+    # index just past the expression starting at `index`, recording any calls
+    if index >= len(tokens):
+        return index
+    token = tokens[index]
+    if token.value == 'I IZ':
+        return _parse_call(tokens, index, calls)
+    if token.value in VARIADIC_OPERATIONS:
+        index += 1
+        while index < len(tokens) and tokens[index].value != 'MKAY':
+            following = _skip_expression(tokens, index, calls)
+            index = following if following > index else index + 1
+            if index < len(tokens) and tokens[index].value == 'AN':
+                index += 1
+        return index + 1 if index < len(tokens) else index
+    if token.value == 'NOT':
+        return _skip_expression(tokens, index + 1, calls)
+    if token.type in OPERATION_TYPES:
+        index = _skip_expression(tokens, index + 1, calls)
+        if index < len(tokens) and tokens[index].value == 'AN':
+            index += 1
+        return _skip_expression(tokens, index, calls)
+    if token.value == 'MAEK':
+        index += 1
+        if index < len(tokens) and tokens[index].value == 'A':
+            index += 1
+        index = _skip_expression(tokens, index, calls)
+        if index < len(tokens) and tokens[index].type == 'Type Literal':
+            index += 1
+        return index
+    return index + 1
+
+
+def _parse_call(tokens, index, calls):
+    # I IZ <name> [YR <arg> [AN YR <arg> ...]] [MKAY], read the way the
+    # interpreter reads it: a nested call takes the arguments that follow it
+    # unless it ends with MKAY
+    start = index
+    index += 1
+    if index >= len(tokens) or tokens[index].type != 'Variable Identifier':
+        return index
+    name = tokens[index].value
+    index += 1
+    arguments = 0
+    while index < len(tokens) and tokens[index].value == 'YR':
+        index = _skip_expression(tokens, index + 1, calls)
+        arguments += 1
+        if index < len(tokens) and tokens[index].value == 'AN':
+            index += 1
+        else:
+            break
+    if index < len(tokens) and tokens[index].value == 'MKAY':
+        index += 1
+    calls[start] = (name, arguments)
+    return index
+
+
+def analyze_program(program):
+    return StaticAnalyzer(program).analyze()
+
+
+def prune_unreachable(program, analyzer=None):
+    # a copy of the program without the lines that can never run, and how many were dropped
+    if analyzer is None:
+        analyzer = StaticAnalyzer(program)
+        analyzer.analyze()
+    dead = set(analyzer.unreachable_lines)
+    if not dead:
+        return program, 0
+    tokens = [token for token in program.tokens if token.line_number not in dead]
+    lines = {line_number: program.lines[line_number] for line_number in program.line_numbers
+             if line_number not in dead}
+    line_numbers = [line_number for line_number in program.line_numbers if line_number not in dead]
+    # not the compiled form of the source any more, so it has no source hash
+    return CompiledProgram(tokens, None, lines, line_numbers), len(dead)
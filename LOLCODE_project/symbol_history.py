@@ -0,0 +1,225 @@
+'''
+CMSC 124: LOLCODE Symbol History
+Every write to the symbol tables during a run, logged in order so the
+variables at any executed statement can be looked at afterwards: a
+statement's state is rebuilt from the nearest keyframe before it plus the
+writes logged since, so no copy is made per statement
+'''
+
+import bisect
+from array import array
+
+from frames import Frame, FramePool
+
+# writes logged between keyframes; a keyframe also waits for as many writes
+# as the last one held entries, so keyframes take no more memory than the log
+KEYFRAME_INTERVAL = 1024
+
+# log entry kinds: a write or removal of one name, a scope emptied, and
+# a call's frame pushed (holding only its IT) or popped at a depth
+SET = 0
+DELETE = 1
+CLEAR = 2
+ENTER = 3
+LEAVE = 4
+
+
+# a symbol table whose writes go to the log; depth 0 is the globals, a
+# frame's scope has the depth of its call (None while the frame is pooled)
+class RecordedScope(dict):
+    __slots__ = ("history", "depth")
+
+    def __init__(self, history, depth):
+        dict.__init__(self)
+        self.history = history
+        self.depth = depth
+
+    def __setitem__(self, name, info):
+        dict.__setitem__(self, name, info)
+        if self.depth is not None:
+            history = self.history
+            history.log.append((history.position, SET, self.depth, name, info.get("value"), info.get("type")))
+
+    def __delitem__(self, name):
+        dict.__delitem__(self, name)
+        if self.depth is not None:
+            history = self.history
+            history.log.append((history.position, DELETE, self.depth, name, None, None))
+
+    def clear(self):
+        dict.clear(self)
+        if self.depth is not None:
+            history = self.history
+            history.log.append((history.position, CLEAR, self.depth, None, None, None))
+
+    def update(self, *args, **kwargs):
+        for name, info in dict(*args, **kwargs).items():
+            self[name] = info
+
+
+# frames with recorded scopes; pushing and popping a call is logged too
+class RecordedFramePool(FramePool):
+    def __init__(self, history, limit):
+        FramePool.__init__(self, limit)
+        self.history = history
+
+    def new_frame(self):
+        frame = Frame()
+        frame.variables = RecordedScope(self.history, None)
+        return frame
+
+    def acquire(self, function, parent, call_line, call_position):
+        # the frame's IT is set before its depth is, ENTER stands for it
+        frame = FramePool.acquire(self, function, parent, call_line, call_position)
+        history = self.history
+        history.log.append((history.position, ENTER, frame.depth, None, None, None))
+        frame.variables.depth = frame.depth
+        return frame
+
+    def release(self, frame):
+        history = self.history
+        history.log.append((history.position, LEAVE, frame.depth, None, None, None))
+        frame.variables.depth = None
+        FramePool.release(self, frame)
+
+
+# the symbol tables right before one statement ran, as name -> {"value", "type"}:
+# the globals and the scope of every active call, outermost first
+class HistoryState:
+    __slots__ = ("step", "line", "globals", "frames")
+
+    def __init__(self, step, line, globals, frames):
+        self.step = step
+        self.line = line
+        self.globals = globals
+        self.frames = frames
+
+    def visible(self):
+        # what the statement sees: the running call's scope, then the globals it does not shadow
+        if not self.frames:
+            return dict(self.globals)
+        variables = dict(self.frames[-1])
+        for name, info in self.globals.items():
+            variables.setdefault(name, info)
+        return variables
+
+
+def _snapshot(scope):
+    return {name: (info.get("value"), info.get("type")) for name, info in scope.items()}
+
+
+def _entries(scope):
+    return {name: {"value": value, "type": value_type} for name, (value, value_type) in scope.items()}
+
+
+# symbol history of one run, installed by swapping the analyzer's symbol
+# tables and wrapping its parse_line, so a run without it pays nothing
+class SymbolHistory:
+    def __init__(self, keyframe_interval=KEYFRAME_INTERVAL):
+        self.keyframe_interval = keyframe_interval
+        # (position, kind, depth, name, value, type) per write
+        self.log = []
+        # line number and call depth of every executed statement (a step)
+        self.lines = array("l")
+        self.depths = array("l")
+        # statements started so far, a write logged now is seen from this step on
+        self.position = 0
+        # (step, log length, globals, frames) snapshots and their steps, for bisect
+        self.keyframes = []
+        self._keyframe_steps = []
+        self._next_keyframe = 0
+        self.analyzer = None
+
+    def install(self, analyzer):
+        # before the run, while no call is active
+        self.analyzer = analyzer
+        scope = RecordedScope(self, 0)
+        dict.update(scope, analyzer.globals)
+        analyzer.globals = analyzer.variables = analyzer.semantics.symbol_table = scope
+        analyzer.frame_pool = RecordedFramePool(self, analyzer.frame_pool.limit)
+        self._take_keyframe()
+
+        inner_parse_line = analyzer.parse_line
+        inner_parse_program = analyzer.parse_program
+        log = self.log
+        lines = self.lines
+        depths = self.depths
+
+        def recorded_parse_line():
+            # lines skipped after a GTFO are not steps
+            if not analyzer.break_requested:
+                if len(log) >= self._next_keyframe:
+                    self._take_keyframe()
+                frame = analyzer.frame
+                lines.append(analyzer.current_line_number)
+                depths.append(frame.depth if frame is not None else 0)
+                self.position += 1
+            return inner_parse_line()
+
+        def recorded_parse_program(*args, **kwargs):
+            try:
+                return inner_parse_program(*args, **kwargs)
+            finally:
+                # so the end of the run is rebuilt in bounded time as well
+                if len(log) > self.keyframes[-1][1]:
+                    self._take_keyframe()
+
+        analyzer.parse_line = recorded_parse_line
+        analyzer.parse_program = recorded_parse_program
+        return self
+
+    def _take_keyframe(self):
+        analyzer = self.analyzer
+        frames = []
+        frame = analyzer.frame
+        while frame is not None:
+            frames.append(_snapshot(frame.variables))
+            frame = frame.parent
+        frames.reverse()
+        variables = _snapshot(analyzer.globals)
+
+        self.keyframes.append((self.position, len(self.log), variables, frames))
+        self._keyframe_steps.append(self.position)
+        size = len(variables) + sum(len(scope) for scope in frames)
+        self._next_keyframe = len(self.log) + max(self.keyframe_interval, size)
+
+    def __len__(self):
+        # executed statements; state_at(len(history)) is the end of the run
+        return len(self.lines)
+
+    def line_at(self, step):
+        return self.lines[step] if 0 <= step < len(self.lines) else None
+
+    def state_at(self, step):
+        # HistoryState right before statement `step` (counted from 0) ran
+        step = max(0, min(step, len(self.lines)))
+        index = bisect.bisect_right(self._keyframe_steps, step) - 1
+        _, start, variables, frames = self.keyframes[index]
+        variables = dict(variables)
+        frames = [dict(scope) for scope in frames]
+
+        # at most one keyframe interval of writes to replay
+        log = self.log
+        for index in range(start, len(log)):
+            position, kind, depth, name, value, value_type = log[index]
+            if position > step:
+                break
+            if kind == ENTER:
+                del frames[depth - 1:]
+                frames.append({"IT": ("NOOB", "NOOB")})
+            elif kind == LEAVE:
+                del frames[depth - 1:]
+            else:
+                scope = variables if depth == 0 else frames[depth - 1]
+                if kind == SET:
+                    scope[name] = (value, value_type)
+                elif kind == DELETE:
+                    scope.pop(name, None)
+                else:
+                    scope.clear()
+
+        return HistoryState(step, self.line_at(step), _entries(variables), [_entries(scope) for scope in frames])
+
+    def variables_at(self, step):
+        # the variables the statement at `step` sees, in symbol table form
+        return self.state_at(step).visible()
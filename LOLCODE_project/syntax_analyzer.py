@@ -5,33 +5,176 @@ CMSC 124: LOLCODE Syntax Analyzer
 - Ron Russell Velasco
 '''
 
+import sys
+import threading
+
 from lexer_analyzer import tokenize, readFile
 from semantics_analyzer import SemanticsEvaluator
+from input_streams import make_input_provider
+from output_sinks import PipeSink
+from compiler import CompiledProgram, organize_tokens_by_line, build_line_index
+from cancellation import CancellationToken, ExecutionCancelled
+from diagnostics import Diagnostic, ERROR
+from type_inference import infer_types
+from frames import FramePool
+
+# bump whenever a change to the interpreter changes what a program prints or
+# leaves in its symbol table; result_cache keys include it so stored results
+# of an older interpreter are never served
+SEMANTICS_VERSION = 4
+
+# token types that can be passed as a function argument
+ARGUMENT_TYPES = ['NUMBR Literal', 'NUMBAR Literal', 'TROOF Literal', 'YARN Literal', 'Variable Identifier',
+                  'Arithmetic Operation', 'Boolean Operation', 'Comparison Operation', 'String Concatenation',
+                  'Typecasting Operation', 'Function Call']
+
+# LOLCODE type of each literal token type
+LITERAL_TYPES = {'NUMBR Literal': 'NUMBR', 'NUMBAR Literal': 'NUMBAR', 'TROOF Literal': 'TROOF',
+                 'YARN Literal': 'YARN'}
+
+# expressions whose evaluation leaves their value and type in IT
+IT_RESULT_TYPES = ('Arithmetic Operation', 'Boolean Operation', 'Comparison Operation', 'String Concatenation',
+                   'Function Call')
+
+# lines that close an enclosing block (or the program); a block missing its
+# own closer ends there, so the error does not swallow the rest of the program
+ENCLOSING_CLOSERS = ('KTHXBYE', 'IF U SAY SO', 'IM OUTTA YR')
+
+# nested function calls allowed before a call fails, and the Python stack
+# depth reserved per call (statements, expressions and the call itself)
+MAX_CALL_DEPTH = 20000
+PYTHON_FRAMES_PER_CALL = 16
+
+
+# raises the recursion limit while programs run; the limit is process-wide,
+# so it is put back only when the last run (in any thread) has finished
+class RecursionRoom:
+    def __init__(self, limit):
+        self.limit = limit
+        self.lock = threading.Lock()
+        self.runs = 0
+        self.saved_limit = None
+
+    def __enter__(self):
+        with self.lock:
+            if self.runs == 0:
+                self.saved_limit = sys.getrecursionlimit()
+                if self.saved_limit < self.limit:
+                    sys.setrecursionlimit(self.limit)
+            self.runs += 1
+
+    def __exit__(self, *exc_info):
+        with self.lock:
+            self.runs -= 1
+            if self.runs == 0:
+                sys.setrecursionlimit(self.saved_limit)
+
+
+RECURSION_ROOM = RecursionRoom(MAX_CALL_DEPTH * PYTHON_FRAMES_PER_CALL)
+
+# lines that open and close nested blocks, followed when a branch is skipped
+BLOCK_OPENERS = ('O RLY?', 'WTF?', 'IM IN YR', 'HOW IZ I')
+BLOCK_ENDS = ('OIC', 'IM OUTTA YR', 'IF U SAY SO')
+
+
+# a function defined with HOW IZ I, its body is the lines between the header and IF U SAY SO
+class FunctionDefinition:
+    def __init__(self, name, parameters, header_line, end_line):
+        self.name = name
+        self.parameters = parameters
+        self.header_line = header_line
+        self.end_line = end_line
+
 
 # syntax analyzer for LOLCODE
 class SyntaxAnalyzer:
-    def __init__(self, tokens, log_function=None):
-        # organize tokens by line number
-        self.lines = self._organize_tokens_by_line(tokens)
+    def __init__(self, tokens, log_function=None, input_provider=None, output_sink=None, cancel_token=None,
+                 checkpoints=None, specialize=True):
+        # organize tokens by line number (a compiled program is already organized)
+        if isinstance(tokens, CompiledProgram):
+            self.lines = tokens.lines
+            self.line_numbers = tokens.line_numbers
+            self.line_index = tokens.line_index
+        else:
+            self.lines = self._organize_tokens_by_line(tokens)
+            self.line_numbers = sorted(self.lines.keys())
+            self.line_index = build_line_index(self.line_numbers)
+
+        # operations whose operand types type_inference proved run specialized
+        # code; the generic evaluate_operation is left in place when there are none
+        self.typed_operations = {}
+        if specialize:
+            if isinstance(tokens, CompiledProgram):
+                if tokens.typed_operations is None:
+                    tokens.typed_operations = infer_types(self.lines, self.line_numbers)
+                self.typed_operations = tokens.typed_operations
+            else:
+                self.typed_operations = infer_types(self.lines, self.line_numbers)
+        if self.typed_operations:
+            self.evaluate_operation = self.evaluate_typed_operation
         self.current_line_number = min(self.lines.keys()) if self.lines else None
         self.current_tokens = self.lines[self.current_line_number] if self.lines else []
         self.current_position = 0
         self.current_token = self.current_tokens[0] if self.current_tokens else None
+        # Diagnostic objects, and the same errors formatted as strings
+        self.diagnostics = []
         self.error_messages = []
-        self.variables = {"IT": {"value": "NOOB", "type": "NOOB"}}
+        # the globals, and the scope statements read and write: the globals
+        # at the top level, the frame of the running call inside a function
+        # (names a frame does not hold are looked up in the globals)
+        self.globals = {"IT": {"value": "NOOB", "type": "NOOB"}}
+        self.variables = self.globals
+        self.frame = None
+        self.frame_pool = FramePool()
         self.in_wazzup_block = False
         self.inside_switch_block = False
 
+        # loop state: which block a GTFO breaks out of, and whether it fired
+        self.break_targets = []
+        self.break_requested = False
+        self.loop_ends = {}
+
+        # functions defined so far, the active function calls and loops as
+        # (kind, name, line) frames, and the value and type of a FOUND YR
+        # that is unwinding to its call
+        self.functions = {}
+        self.call_stack = []
+        self.returning = False
+        self.return_value = None
+        self.return_type = None
+
+        # run counters for metrics.RunMetrics: executions per line number,
+        # function calls and loop iterations
+        self.line_hits = {}
+        self.function_calls = 0
+        self.loop_iterations = 0
+
+        # checked once per statement, set from another thread to stop the run
+        self.cancel_token = cancel_token if cancel_token is not None else CancellationToken()
+        self.cancelled = False
+
+        # optional recorder that snapshots state before each top-level statement
+        self.checkpoints = checkpoints
+
         self.log_function = log_function
+
+        # GIMMEH reads from this provider (stdin, file, list or callback)
+        self.input_provider = make_input_provider(input_provider)
         
+        # program output (VISIBLE) goes to the sink, diagnostics go through emit
+        self.output_sink = output_sink if output_sink is not None else PipeSink()
+
         # semantics evaluator
-        self.semantics = SemanticsEvaluator(self.variables)
+        self.semantics = SemanticsEvaluator(self.variables, self.output_sink)
 
     def emit(self, message):
+        # diagnostics channel (banners and errors)
         if message is None:
             return
         if not isinstance(message, str):
             message = str(message)
+        # keep program output ahead of the diagnostic that follows it
+        self.output_sink.flush()
         if self.log_function:
             # send to GUI console
             self.log_function(message)
@@ -41,34 +184,34 @@ class SyntaxAnalyzer:
 
     def _organize_tokens_by_line(self, tokens):
         # group all tokens by their line numbers so we can process line by line
-        lines = {}
-        for token in tokens:
-            # skip comment tokens since we dont need to parse them
-            if token.type != "Comment Line":
-                if token.line_number not in lines:
-                    lines[token.line_number] = []
-                lines[token.line_number].append(token)
-        return lines
-
-    def log_syntax_error(self, message, expected=None, found=None):
-        # format error message depending on what info we have
-        if expected and found:
-            error_message = (
-                f"Syntax Error: {message}. Expected '{expected}', but found '{found}' "
-                f"(line {self.current_line_number})"
-            )
-        elif expected:
-            error_message = (
-                f"Syntax Error: {message}. Expected '{expected}' "
-                f"(line {self.current_line_number})"
-            )
-        else:
-            error_message = f"Syntax Error: {message} (line {self.current_line_number})"
+        return organize_tokens_by_line(tokens)
+
+    def log_syntax_error(self, message, expected=None, found=None, code=None, severity=ERROR, line=None):
+        # record a structured diagnostic and its formatted line; `line` reports
+        # it somewhere other than the current line (e.g. an unclosed opener)
+        line = line if line is not None else self.current_line_number
+        diagnostic = Diagnostic(code, message, line, expected, found, severity)
+        self.diagnostics.append(diagnostic)
+        error_message = str(diagnostic)
 
         # save error and display it
         self.error_messages.append(error_message)
         self.emit(error_message + "\n")
 
+    def lookup(self, name):
+        # symbol table entry of a variable, None when it is not declared
+        info = self.variables.get(name)
+        if info is None and self.frame is not None:
+            info = self.globals.get(name)
+        return info
+
+    def scope_for(self, name):
+        # where a write to `name` goes: a global the running call does not
+        # shadow is written in place, anything else belongs to the current scope
+        if self.frame is not None and name not in self.variables and name in self.globals:
+            return self.globals
+        return self.variables
+
     def print_variables(self):
         print("\nVariables:")
         for identifier, identifier_info in self.variables.items():
@@ -83,10 +226,9 @@ class SyntaxAnalyzer:
             self.current_token = None
             return
 
-        # get all line numbers in order
-        line_numbers = sorted(self.lines.keys())
-        current_index = line_numbers.index(self.current_line_number)
-        next_line_index = current_index + 1
+        # line numbers are kept in order, so the next one is an index away
+        line_numbers = self.line_numbers
+        next_line_index = self.line_index[self.current_line_number] + 1
         
         # if theres a next line, move to it
         if next_line_index < len(line_numbers):
@@ -100,6 +242,26 @@ class SyntaxAnalyzer:
             self.current_token = None
             self.current_line_number = None
 
+    def jump_to_line(self, line_number, position=0):
+        # move to a given line (and token position) directly
+        self.current_line_number = line_number
+        self.current_tokens = self.lines[line_number]
+        self.current_position = position
+        self.current_token = self.current_tokens[position] if position < len(self.current_tokens) else None
+
+    # error recovery: after a bad block, parsing resumes at a block boundary
+    # instead of giving up on the rest of the program
+
+    def skip_past(self, line_number):
+        # continue after the whole of `line_number` (e.g. the closer of a bad block)
+        self.jump_to_line(line_number, len(self.lines[line_number]))
+
+    def stop_before(self, line_number):
+        # continue at `line_number`, which the caller's advance_to_next_line reaches next
+        index = self.line_index[line_number]
+        if index > 0:
+            self.skip_past(self.line_numbers[index - 1])
+
     def advance_to_next_token(self):
         # move to the next token on the current line
         if self.current_position < len(self.current_tokens) - 1:
@@ -135,8 +297,37 @@ class SyntaxAnalyzer:
         # handle string concatenation
         elif self.current_token.type == 'String Concatenation':
             return self.parse_concatenation()
+        # handle function calls used as a value
+        elif self.current_token.value == 'I IZ':
+            return self.parse_call_expression()
         else:
             return None
+
+    def parse_call_expression(self):
+        # I IZ <name> [YR <arg> [AN YR <arg> ...]] [MKAY], read without calling it
+        self.advance_to_next_token()
+        if not self.current_token or self.current_token.type != 'Variable Identifier':
+            self.log_syntax_error("Expected function name after 'I IZ'", code="E607")
+            return "I IZ Missing Name"
+
+        function_name = self.current_token.value
+        self.advance_to_next_token()
+        arguments = []
+        while self.current_token and self.current_token.value == 'YR':
+            self.advance_to_next_token()
+            argument = self.parse_expression()
+            if argument is None:
+                self.log_syntax_error("Expected argument after 'YR'", code="E608")
+                return f"I IZ {function_name} Missing Argument"
+            arguments.append(argument)
+            if self.current_token and self.current_token.value == 'AN':
+                self.advance_to_next_token()
+            else:
+                break
+
+        if self.current_token and self.current_token.value == 'MKAY':
+            self.advance_to_next_token()
+        return f"I IZ {function_name} {' AN '.join(arguments)}".rstrip()
     
     def evaluate_expression(self):
         # evaluate an expression and return actual computed value
@@ -160,11 +351,10 @@ class SyntaxAnalyzer:
             return result
         # for variables, look up their value in the symbol table
         elif self.current_token.type == 'Variable Identifier':
-            var_name = self.current_token.value
-            if var_name in self.variables:
-                result = self.variables[var_name].get('value', 'NOOB')
-            else:
-                result = 'NOOB'
+            info = self.variables.get(self.current_token.value)
+            if info is None and self.frame is not None:
+                info = self.globals.get(self.current_token.value)
+            result = info.get('value', 'NOOB') if info is not None else 'NOOB'
             self.advance_to_next_token()
             return result
         # for operations, evaluate them and return the result
@@ -176,9 +366,44 @@ class SyntaxAnalyzer:
         # for typecasting (MAEK A x TROOF)
         elif self.current_token.type == 'Typecasting Operation':
             return self.evaluate_typecasting()
+        # for function calls, the value is what the function returns
+        elif self.current_token.type == 'Function Call' and self.current_token.value == 'I IZ':
+            return self.parse_functioncall()
         else:
             return None
 
+    def evaluate_typed_expression(self):
+        # (value, LOLCODE type) of the expression at the current token; numbers
+        # are carried as strings, so literals and variables keep their own type,
+        # operations and calls the type they leave in IT
+        token = self.current_token
+        if token is None:
+            return None, None
+        if token.type == 'Variable Identifier':
+            info = self.lookup(token.value)
+            value = self.evaluate_expression()
+            return value, (info.get('type') if info is not None else None) or self.type_of(value)
+        if token.type in LITERAL_TYPES:
+            return self.evaluate_expression(), LITERAL_TYPES[token.type]
+        value = self.evaluate_expression()
+        if token.type in IT_RESULT_TYPES and value is not None:
+            return value, self.variables['IT'].get('type')
+        return value, self.type_of(value)
+
+    def type_of(self, value):
+        # LOLCODE type name of a computed value
+        if isinstance(value, float):
+            return 'NUMBAR'
+        elif isinstance(value, int):
+            return 'NUMBR'
+        elif value in ['WIN', 'FAIL']:
+            return 'TROOF'
+        elif value == 'NOOB' or value is None:
+            return 'NOOB'
+        elif isinstance(value, str):
+            return 'YARN'
+        return None
+
     def parse_operation(self):
         # figure out what kind of operation this is and parse it accordingly
         operation = self.current_token.value
@@ -200,7 +425,7 @@ class SyntaxAnalyzer:
         elif operation == 'SMOOSH':
             return self.parse_concatenation()
         else:
-            self.log_syntax_error("Unknown operation", found=operation)
+            self.log_syntax_error("Unknown operation", found=operation, code="E101")
             return f"Unknown operation '{operation}'"
     
     def evaluate_operation(self):
@@ -223,10 +448,32 @@ class SyntaxAnalyzer:
         else:
             return None
 
+    def evaluate_typed_operation(self):
+        # evaluate_operation for a program with typed operations
+        plan = self.typed_operations.get((self.current_line_number, self.current_position))
+        if plan is None:
+            return SyntaxAnalyzer.evaluate_operation(self)
+        try:
+            result = plan.evaluate(self.variables)
+        except (KeyError, TypeError, ValueError, ZeroDivisionError):
+            # a value of another type than inferred, or a division by zero
+            return SyntaxAnalyzer.evaluate_operation(self)
+
+        # only the outermost result is left in IT, as on the generic path
+        result_type = plan.result_type or ('NUMBAR' if isinstance(result, float) else 'NUMBR')
+        self.variables['IT'] = {"value": result, "type": result_type}
+        if plan.end < len(self.current_tokens):
+            self.current_position = plan.end
+            self.current_token = self.current_tokens[plan.end]
+        else:
+            self.current_position = len(self.current_tokens) - 1
+            self.current_token = None
+        return result
+
     def parse_unary_operation(self, operation):
         # parse operations that only take one operand (like NOT)
         if not self.current_token:
-            self.log_syntax_error(f"Expected operand for '{operation}'")
+            self.log_syntax_error(f"Expected operand for '{operation}'", code="E102")
             return f"{operation} Missing Operand"
 
         # check if its a simple value or variable
@@ -239,7 +486,7 @@ class SyntaxAnalyzer:
             operand = self.parse_operation()
             return f"{operation} {operand}"
         else:
-            self.log_syntax_error(f"Expected TROOF, variable, or operation for '{operation}'")
+            self.log_syntax_error(f"Expected TROOF, variable, or operation for '{operation}'", code="E103")
             return f"{operation} Invalid Operand"
 
     def parse_binary_operation(self, operation):
@@ -257,18 +504,21 @@ class SyntaxAnalyzer:
             # or if its a nested operation
             elif self.current_token.type in ['Arithmetic Operation', 'Boolean Operation', 'Comparison Operation']:
                 return self.parse_operation()
+            # or the value of a function call
+            elif self.current_token.value == 'I IZ':
+                return self.parse_call_expression()
             else:
                 return None
 
         # get the first operand
         first_operand = parse_single_operand()
         if first_operand is None:
-            self.log_syntax_error(f"Missing first operand for '{operation}'")
+            self.log_syntax_error(f"Missing first operand for '{operation}'", code="E104")
             return f"{operation} Missing First Operand"
 
         # expect AN keyword between operands
         if not self.current_token or self.current_token.value != 'AN':
-            self.log_syntax_error(f"Missing 'AN' after first operand in '{operation}'")
+            self.log_syntax_error(f"Missing 'AN' after first operand in '{operation}'", code="E105")
             return f"{operation} {first_operand} Missing AN"
 
         self.advance_to_next_token()
@@ -276,7 +526,7 @@ class SyntaxAnalyzer:
         # get the second operand
         second_operand = parse_single_operand()
         if second_operand is None:
-            self.log_syntax_error(f"Missing second operand for '{operation}'")
+            self.log_syntax_error(f"Missing second operand for '{operation}'", code="E106")
             return f"{operation} {first_operand} AN Missing Second Operand"
 
         return f"{operation} {first_operand} AN {second_operand}"
@@ -291,7 +541,7 @@ class SyntaxAnalyzer:
             # handle AN separators between operands
             if self.current_token.value == 'AN':
                 if not first_operand_parsed:
-                    self.log_syntax_error(f"Unexpected 'AN' at the start of {operation}")
+                    self.log_syntax_error(f"Unexpected 'AN' at the start of {operation}", code="E107")
                     return f"{operation} Invalid Start with AN"
                 self.advance_to_next_token()
                 continue
@@ -311,14 +561,14 @@ class SyntaxAnalyzer:
 
         # make sure we have MKAY at the end
         if not self.current_token or self.current_token.value != 'MKAY':
-            self.log_syntax_error(f"Missing 'MKAY' at the end of {operation}")
+            self.log_syntax_error(f"Missing 'MKAY' at the end of {operation}", code="E108")
             return f"{operation} {' AN '.join(operands)} Missing MKAY"
 
         self.advance_to_next_token()
 
         # make sure we got at least one operand
         if not operands:
-            self.log_syntax_error(f"No operands provided for {operation}")
+            self.log_syntax_error(f"No operands provided for {operation}", code="E109")
             return f"{operation} Missing Operands"
 
         return f"{operation} {' AN '.join(operands)} MKAY"
@@ -338,7 +588,7 @@ class SyntaxAnalyzer:
             # AN separator
             if self.current_token.value == 'AN':
                 if not first_operand_parsed:
-                    self.log_syntax_error("Unexpected 'AN' at the start of SMOOSH")
+                    self.log_syntax_error("Unexpected 'AN' at the start of SMOOSH", code="E107")
                     self.advance_to_next_token()
                     return "SMOOSH Invalid Start with AN"
                 self.advance_to_next_token()
@@ -352,8 +602,8 @@ class SyntaxAnalyzer:
             ]:
                 val = self.current_token.value
                 # For variables, resolve their value
-                if self.current_token.type == 'Variable Identifier' and val in self.variables:
-                    val = self.variables[val].get('value', 'NOOB')
+                if self.current_token.type == 'Variable Identifier' and self.lookup(val) is not None:
+                    val = self.lookup(val).get('value', 'NOOB')
                 operands.append(str(val))
                 first_operand_parsed = True
                 self.advance_to_next_token()
@@ -370,7 +620,7 @@ class SyntaxAnalyzer:
 
             # nested SMOOSH not allowed
             if self.current_token.type == 'String Concatenation':
-                self.log_syntax_error("Nested SMOOSH not allowed")
+                self.log_syntax_error("Nested SMOOSH not allowed", code="E110")
                 self.advance_to_next_token()
                 return "SMOOSH Nested Error"
 
@@ -379,11 +629,11 @@ class SyntaxAnalyzer:
 
         # Validation
         if not operands:
-            self.log_syntax_error("No operands specified after SMOOSH")
+            self.log_syntax_error("No operands specified after SMOOSH", code="E109")
             return "SMOOSH Missing Operands"
 
         if len(operands) == 1:
-            self.log_syntax_error("Only one operand specified after SMOOSH, requires at least two")
+            self.log_syntax_error("Only one operand specified after SMOOSH, requires at least two", code="E111")
             return f"SMOOSH {' + '.join(operands)} Missing AN"
 
         return f"{' + '.join(operands)}"
@@ -537,8 +787,9 @@ class SyntaxAnalyzer:
                 self.advance_to_next_token()
             elif self.current_token.type == 'Variable Identifier':
                 var_name = self.current_token.value
-                if var_name in self.variables:
-                    operands.append(self.variables[var_name].get('value', 'NOOB'))
+                info = self.lookup(var_name)
+                if info is not None:
+                    operands.append(info.get('value', 'NOOB'))
                 else:
                     operands.append(var_name)
                 self.advance_to_next_token()
@@ -562,7 +813,7 @@ class SyntaxAnalyzer:
         self.advance_to_next_token()
 
         if not self.current_token or self.current_token.type != 'Variable Identifier':
-            self.log_syntax_error("Variable name is missing or invalid after 'I HAS A'")
+            self.log_syntax_error("Variable name is missing or invalid after 'I HAS A'", code="E201")
             return
 
         variable_name = self.current_token.value
@@ -572,7 +823,7 @@ class SyntaxAnalyzer:
             self.advance_to_next_token()
 
             if not self.current_token:
-                self.log_syntax_error(f"Missing expression to initialize variable '{variable_name}' after 'ITZ'")
+                self.log_syntax_error(f"Missing expression to initialize variable '{variable_name}' after 'ITZ'", code="E202")
                 return
 
             if self.current_token.type == 'YARN Literal':
@@ -590,20 +841,20 @@ class SyntaxAnalyzer:
 
     def parse_assignment(self):
         if not self.current_token or self.current_token.type != 'Variable Identifier':
-            self.log_syntax_error("Invalid variable name for assignment")
+            self.log_syntax_error("Invalid variable name for assignment", code="E203")
             return
 
         variable_name = self.current_token.value
         self.advance_to_next_token()
 
         if not self.current_token or self.current_token.value != "R":
-            self.log_syntax_error("Expected assignment operator 'R'")
+            self.log_syntax_error("Expected assignment operator 'R'", code="E204")
             return
 
         self.advance_to_next_token()
 
         if not self.current_token:
-            self.log_syntax_error("Missing value after assignment operator")
+            self.log_syntax_error("Missing value after assignment operator", code="E205")
             return
 
         # Evaluate expression to get actual value
@@ -621,7 +872,7 @@ class SyntaxAnalyzer:
         else:
             data_type = None
         
-        self.variables[variable_name] = {"value": value, "type": data_type}
+        self.scope_for(variable_name)[variable_name] = {"value": value, "type": data_type}
 
     def evaluate_typecasting(self):
         # evaluate MAEK A <var> <type> typecasting and return the casted value
@@ -629,29 +880,26 @@ class SyntaxAnalyzer:
             self.advance_to_next_token()
 
             if not self.current_token or self.current_token.value != 'A':
-                self.log_syntax_error("Expected 'A' after 'MAEK'")
+                self.log_syntax_error("Expected 'A' after 'MAEK'", code="E206")
                 return None
 
             self.advance_to_next_token()
 
             if not self.current_token:
-                self.log_syntax_error("Expected value to cast after 'MAEK A'")
+                self.log_syntax_error("Expected value to cast after 'MAEK A'", code="E207")
                 return None
 
             # Get the value to cast
             if self.current_token.type == 'Variable Identifier':
-                var_name = self.current_token.value
-                if var_name in self.variables:
-                    cast_value = self.variables[var_name].get('value', 'NOOB')
-                else:
-                    cast_value = 'NOOB'
+                info = self.lookup(self.current_token.value)
+                cast_value = info.get('value', 'NOOB') if info is not None else 'NOOB'
             else:
                 cast_value = self.current_token.value
             
             self.advance_to_next_token()
 
             if not self.current_token or self.current_token.type != 'Type Literal':
-                self.log_syntax_error("Expected type literal after value in 'MAEK A' operation")
+                self.log_syntax_error("Expected type literal after value in 'MAEK A' operation", code="E208")
                 return None
 
             target_type = self.current_token.value
@@ -700,20 +948,20 @@ class SyntaxAnalyzer:
             self.advance_to_next_token()
 
             if not self.current_token or self.current_token.value != 'A':
-                self.log_syntax_error("Expected 'A' after 'MAEK'")
+                self.log_syntax_error("Expected 'A' after 'MAEK'", code="E206")
                 return
 
             self.advance_to_next_token()
 
             if not self.current_token:
-                self.log_syntax_error("Expected value to cast after 'MAEK A'")
+                self.log_syntax_error("Expected value to cast after 'MAEK A'", code="E207")
                 return
 
             cast_value = self.current_token.value
             self.advance_to_next_token()
 
             if not self.current_token or self.current_token.type != 'Type Literal':
-                self.log_syntax_error("Expected type literal after value in 'MAEK A' operation")
+                self.log_syntax_error("Expected type literal after value in 'MAEK A' operation", code="E208")
                 return
 
             self.advance_to_next_token()
@@ -722,31 +970,35 @@ class SyntaxAnalyzer:
             self.advance_to_next_token()
 
             if not self.current_token or self.current_token.value != 'IS NOW A':
-                self.log_syntax_error("Expected 'IS NOW A' for typecasting")
+                self.log_syntax_error("Expected 'IS NOW A' for typecasting", code="E209")
                 return
 
             self.advance_to_next_token()
 
             if not self.current_token or self.current_token.type != 'Type Literal':
-                self.log_syntax_error("Expected type literal after 'IS NOW A'")
+                self.log_syntax_error("Expected type literal after 'IS NOW A'", code="E208")
                 return
 
             target_type = self.current_token.value
             self.advance_to_next_token()
-            if variable_name in self.variables:
-                self.variables[variable_name]['type'] = target_type
+            info = self.lookup(variable_name)
+            if info is not None:
+                # replaced rather than changed in place, like every other write,
+                # so symbol_history sees it
+                self.scope_for(variable_name)[variable_name] = dict(info, type=target_type)
 
     def parse_print(self):
         self.advance_to_next_token()
 
         if not self.current_token:
-            self.log_syntax_error("No output specified after VISIBLE")
+            self.log_syntax_error("No output specified after VISIBLE", code="E301")
             return
 
         output = []
+        suppress_newline = False
         while self.current_token:
             if self.current_token.type == 'INVALID TOKEN':
-                self.log_syntax_error(f"Invalid token in VISIBLE statement", found=self.current_token.value)
+                self.log_syntax_error(f"Invalid token in VISIBLE statement", found=self.current_token.value, code="E302")
                 return
 
             if self.current_token.type in ['NUMBR Literal', 'NUMBAR Literal', 'TROOF Literal']:
@@ -755,8 +1007,9 @@ class SyntaxAnalyzer:
             elif self.current_token.type == 'Variable Identifier':
                 # append variable value if exists, else name
                 varname = self.current_token.value
-                if varname in self.variables:
-                    val = self.variables[varname].get("value", "NOOB")
+                info = self.lookup(varname)
+                if info is not None:
+                    val = info.get("value", "NOOB")
                     output.append(str(val))
                 else:
                     output.append(str(varname))
@@ -773,7 +1026,14 @@ class SyntaxAnalyzer:
                 result = self.evaluate_concatenation()
                 output.append(str(result))
                 break
+            elif self.current_token.value == 'I IZ':
+                # print what the function returns, NOOB when the call failed
+                result = self.parse_functioncall()
+                output.append(str(result) if result is not None else 'NOOB')
             elif self.current_token.type in ['Parameter Delimiter', 'Output Separator']:
+                # a '!' suppresses the trailing newline
+                if self.current_token.value == '!':
+                    suppress_newline = True
                 self.advance_to_next_token()
             else:
                 break
@@ -783,154 +1043,264 @@ class SyntaxAnalyzer:
         if final_output:
             # store to IT
             self.variables["IT"] = {"value": final_output, "type": "YARN"}
-            # Emit to console (GUI display)
-            self.emit(final_output + "\n")
+            # write to the output sink
+            self.semantics.write_output(final_output if suppress_newline else final_output + "\n")
 
     def parse_input(self):
         self.advance_to_next_token()
 
         if not self.current_token or self.current_token.type != 'Variable Identifier':
-            self.log_syntax_error("Missing variable identifier after GIMMEH")
+            self.log_syntax_error("Missing variable identifier after GIMMEH", code="E303")
             return
 
         variable_name = self.current_token.value
         
         # Check if variable was declared in WAZZUP block
-        if variable_name not in self.variables:
-            self.log_syntax_error(f"Undefined variable '{variable_name}' - must be declared in WAZZUP block")
+        if self.lookup(variable_name) is None:
+            self.log_syntax_error(f"Undefined variable '{variable_name}' - must be declared in WAZZUP block", code="E304")
             return
         
-        # GIMMEH doesn't create variables, it just reads input into existing ones
+        # GIMMEH doesn't create variables, it just reads input into existing ones;
+        # buffered output (a prompt) has to be shown before waiting for input
+        self.output_sink.flush()
+        value = self.input_provider.read_value(variable_name)
+        if value is None:
+            self.log_syntax_error(f"No input available for GIMMEH '{variable_name}'", code="E305")
+        else:
+            # input is always read as a YARN
+            self.scope_for(variable_name)[variable_name] = {"value": value, "type": "YARN"}
+
         self.advance_to_next_token()
 
     def parse_conditional(self):
         if self.current_token.value != 'O RLY?':
-            self.log_syntax_error("Expected 'O RLY?' for conditional block")
+            self.log_syntax_error("Expected 'O RLY?' for conditional block", code="E401")
             return
 
+        # IT picks the branch: YA RLY when it is WIN, otherwise the first
+        # MEBBE whose condition is WIN, otherwise NO WAI
+        opener_line = self.current_line_number
+        taken = self.semantics._to_bool(self.variables['IT'].get('value', 'NOOB'))
         self.advance_to_next_line()
 
         if not self.current_token or self.current_token.value != 'YA RLY':
-            self.log_syntax_error("Expected 'YA RLY' after 'O RLY?'")
-            return
-
-        self.advance_to_next_line()
-
-        while True:
+            self.log_syntax_error("Expected 'YA RLY' after 'O RLY?'", code="E402")
             if not self.current_token:
-                if not self.advance_to_next_line():
-                    break
-                continue
+                return
+            # recover by reading the block as if YA RLY were there
+        else:
+            self.advance_to_next_line()
 
-            if self.current_token.value in ['NO WAI', 'OIC']:
-                break
+        self.run_branch(taken, ('MEBBE', 'NO WAI', 'OIC'))
 
-            self.parse_line()
+        while self.current_token and self.current_token.value == 'MEBBE':
+            self.advance_to_next_token()
+            run = False
+            if not taken:
+                if not self.current_token:
+                    self.log_syntax_error("Expected condition after 'MEBBE'", code="E408")
+                else:
+                    run = taken = self.semantics._to_bool(self.evaluate_expression())
             self.advance_to_next_line()
+            self.run_branch(run, ('MEBBE', 'NO WAI', 'OIC'))
 
         if self.current_token and self.current_token.value == 'NO WAI':
             self.advance_to_next_line()
-
-            while True:
-                if not self.current_token:
-                    if not self.advance_to_next_line():
-                        break
-                    continue
-
-                if self.current_token.value == 'OIC':
-                    break
-
-                self.parse_line()
-                self.advance_to_next_line()
+            self.run_branch(not taken, ('OIC',))
 
         if not self.current_token or self.current_token.value != 'OIC':
-            self.log_syntax_error("Expected 'OIC' to close 'O RLY?' block")
+            self.log_syntax_error("Expected 'OIC' to close 'O RLY?' block", code="E403", line=opener_line)
+            if self.current_token:
+                self.stop_before(self.current_line_number)
+
+    def run_branch(self, run, stops):
+        # the lines of one O RLY? or WTF? branch, up to the keyword in `stops`
+        # that ends it; a branch that is not taken, or that a GTFO or FOUND YR
+        # left, is skipped over whole (nested blocks included)
+        depth = 0
+        while self.current_token:
+            value = self.current_token.value
+            if depth == 0 and (value in stops or value in ENCLOSING_CLOSERS):
+                break
+            if run and not self.break_requested:
+                self.parse_line()
+            elif value in BLOCK_OPENERS:
+                depth += 1
+            elif value in BLOCK_ENDS and depth:
+                depth -= 1
+            self.advance_to_next_line()
 
     def parse_loop(self):
         if self.current_token.value != 'IM IN YR':
-            self.log_syntax_error("Expected 'IM IN YR' to define a loop")
+            self.log_syntax_error("Expected 'IM IN YR' to define a loop", code="E501")
             return
 
+        header_line = self.current_line_number
         self.advance_to_next_token()
 
         if not self.current_token or self.current_token.type != 'Variable Identifier':
-            self.log_syntax_error("Expected loop label after 'IM IN YR'")
-            return
+            self.log_syntax_error("Expected loop label after 'IM IN YR'", code="E502")
+            return self.skip_loop(header_line)
 
         loop_label = self.current_token.value
         self.advance_to_next_token()
 
         if not self.current_token or self.current_token.value not in ['UPPIN', 'NERFIN']:
-            self.log_syntax_error("Expected loop operation (UPPIN/NERFIN) after loop label")
-            return
+            self.log_syntax_error("Expected loop operation (UPPIN/NERFIN) after loop label", code="E503")
+            return self.skip_loop(header_line)
 
+        loop_operation = self.current_token.value
         self.advance_to_next_token()
 
         if not self.current_token or self.current_token.value != 'YR':
-            self.log_syntax_error("Expected 'YR' after loop operation")
-            return
+            self.log_syntax_error("Expected 'YR' after loop operation", code="E504")
+            return self.skip_loop(header_line)
 
         self.advance_to_next_token()
 
         if not self.current_token or self.current_token.type != 'Variable Identifier':
-            self.log_syntax_error("Expected variable name after 'YR'")
-            return
+            self.log_syntax_error("Expected variable name after 'YR'", code="E505")
+            return self.skip_loop(header_line)
 
+        loop_variable = self.current_token.value
         self.advance_to_next_token()
 
+        # a loop variable that does not exist yet starts at NUMBR 0, before
+        # the condition reads it for the first time
+        if self.lookup(loop_variable) is None:
+            self.variables[loop_variable] = {"value": 0, "type": "NUMBR"}
+
         if not self.current_token or self.current_token.value not in ['TIL', 'WILE']:
-            self.log_syntax_error("Expected loop condition (TIL/WILE) after loop variable")
-            return
+            self.log_syntax_error("Expected loop condition (TIL/WILE) after loop variable", code="E506")
+            return self.skip_loop(header_line)
 
+        condition_keyword = self.current_token.value
         self.advance_to_next_token()
 
+        # remember where the condition starts so it can be re-evaluated
+        condition_position = self.current_position
+
         condition_expression = self.parse_expression()
         if condition_expression is None:
-            self.log_syntax_error("Invalid loop condition expression")
+            self.log_syntax_error("Invalid loop condition expression", code="E507")
+            return self.skip_loop(header_line)
+
+        end_line = self.find_loop_end(header_line)
+        if end_line is None:
+            # the body is left to run once as ordinary statements, so its own
+            # errors are still reported
+            self.log_syntax_error(f"Expected 'IM OUTTA YR {loop_label}' to close loop", code="E508")
             return
 
-        self.advance_to_next_line()
+        end_index = self.line_index[end_line]
+        self.break_targets.append('loop')
+        self.call_stack.append(('loop', loop_label, header_line))
+        try:
+            while True:
+                if self.cancel_token.cancelled:
+                    raise ExecutionCancelled(self.cancel_token.reason)
 
-        while True:
-            if not self.current_token:
-                if not self.advance_to_next_line():
+                # TIL runs until the condition is WIN, WILE while it is WIN
+                self.jump_to_line(header_line, condition_position)
+                condition = self.semantics._to_bool(self.evaluate_expression())
+                if condition == (condition_keyword == 'TIL'):
                     break
-                continue
+                self.loop_iterations += 1
 
-            if self.current_token.value == 'IM OUTTA YR':
-                break
+                # run the body lines up to IM OUTTA YR
+                self.advance_to_next_line()
+                while self.current_line_number is not None and self.line_index[self.current_line_number] < end_index:
+                    if self.break_requested:
+                        break
+                    if self.current_token:
+                        self.parse_line()
+                    self.advance_to_next_line()
 
-            self.parse_line()
-            self.advance_to_next_line()
+                # GTFO leaves the loop, a FOUND YR keeps unwinding to its call
+                if self.break_requested:
+                    if not self.returning:
+                        self.break_requested = False
+                    break
 
-        if not self.current_token or self.current_token.value != 'IM OUTTA YR':
-            self.log_syntax_error(f"Expected 'IM OUTTA YR {loop_label}' to close loop")
-            return
+                self.step_loop_variable(loop_variable, loop_operation)
+        finally:
+            self.break_targets.pop()
+            self.call_stack.pop()
 
+        self.jump_to_line(end_line)
         self.advance_to_next_token()
 
         if not self.current_token or self.current_token.value != loop_label:
-            self.log_syntax_error(f"Expected loop label '{loop_label}' after 'IM OUTTA YR'")
+            self.log_syntax_error(f"Expected loop label '{loop_label}' after 'IM OUTTA YR'", code="E509")
         else:
             self.advance_to_next_token()
 
+    def find_loop_end(self, header_line):
+        # line of the IM OUTTA YR matching the loop at header_line (nesting aware)
+        if header_line in self.loop_ends:
+            return self.loop_ends[header_line]
+
+        end_line = None
+        depth = 0
+        for line_number in self.line_numbers[self.line_index[header_line] + 1:]:
+            first_value = self.lines[line_number][0].value
+            if first_value == 'IM IN YR':
+                depth += 1
+            elif first_value == 'IM OUTTA YR':
+                if depth == 0:
+                    end_line = line_number
+                    break
+                depth -= 1
+
+        self.loop_ends[header_line] = end_line
+        return end_line
+
+    def skip_loop(self, header_line):
+        # a loop with a bad header never runs, parsing resumes after its IM OUTTA YR
+        end_line = self.find_loop_end(header_line)
+        if end_line is not None:
+            self.skip_past(end_line)
+
+    def step_loop_variable(self, variable_name, operation):
+        # UPPIN adds one, NERFIN subtracts one (NOOB counts as 0)
+        info = self.lookup(variable_name)
+        current = info.get('value', 'NOOB') if info is not None else 'NOOB'
+        value = self.semantics._to_numeric(current)
+        if value is None:
+            value = 0
+        value = value + 1 if operation == 'UPPIN' else value - 1
+        self.scope_for(variable_name)[variable_name] = {"value": value,
+                                                       "type": 'NUMBAR' if isinstance(value, float) else 'NUMBR'}
+
     def parse_switch(self):
+        # a GTFO inside the switch belongs to it, not to an enclosing loop
+        self.break_targets.append('switch')
+        try:
+            self.parse_switch_block()
+        finally:
+            self.break_targets.pop()
+        # the switch has been left; a FOUND YR keeps unwinding to its call
+        if self.break_requested and not self.returning:
+            self.break_requested = False
+
+    def parse_switch_block(self):
         self.inside_switch_block = True
 
         if self.current_token.value != 'WTF?':
-            self.log_syntax_error("Switch must start with 'WTF?'")
+            self.log_syntax_error("Switch must start with 'WTF?'", code="E404")
             return
 
+        # IT is compared with each OMG literal; the first match runs, and the
+        # cases after it too (falling through) until a GTFO; OMGWTF runs when
+        # nothing matched or the cases fall through to it
+        opener_line = self.current_line_number
+        subject = self.variables['IT'].get('value', 'NOOB')
+        matched = False
         self.advance_to_next_line()
         found_cases = False
 
-        while True:
-            if not self.current_token:
-                if not self.advance_to_next_line():
-                    break
-                continue
-
-            if self.current_token.value == 'OIC':
+        while self.current_token:
+            if self.current_token.value == 'OIC' or self.current_token.value in ENCLOSING_CLOSERS:
                 break
 
             if self.current_token.value == 'OMG':
@@ -938,59 +1308,42 @@ class SyntaxAnalyzer:
                 self.advance_to_next_token()
 
                 if not self.current_token or self.current_token.type not in ['NUMBR Literal', 'NUMBAR Literal', 'YARN Literal', 'TROOF Literal']:
-                    self.log_syntax_error("Expected literal value after 'OMG'")
-                    return
+                    # the case can never match
+                    self.log_syntax_error("Expected literal value after 'OMG'", code="E405")
+                elif not matched:
+                    matched = self.semantics.evaluate_comparison('BOTH SAEM', subject, self.current_token.value) == 'WIN'
 
                 self.advance_to_next_line()
-
-                while True:
-                    if not self.current_token:
-                        if not self.advance_to_next_line():
-                            break
-                        continue
-
-                    if self.current_token.value in ['OMG', 'OMGWTF', 'OIC']:
-                        break
-
-                    self.parse_line()
-                    self.advance_to_next_line()
+                self.run_branch(matched, ('OMG', 'OMGWTF', 'OIC'))
 
             elif self.current_token.value == 'OMGWTF':
                 found_cases = True
                 self.advance_to_next_line()
-
-                while True:
-                    if not self.current_token:
-                        if not self.advance_to_next_line():
-                            break
-                        continue
-
-                    if self.current_token.value == 'OIC':
-                        break
-
-                    self.parse_line()
-                    self.advance_to_next_line()
+                self.run_branch(True, ('OIC',))
             else:
                 self.parse_line()
                 self.advance_to_next_line()
 
         if not self.current_token or self.current_token.value != 'OIC':
-            self.log_syntax_error("Switch must end with 'OIC'")
+            self.log_syntax_error("Switch must end with 'OIC'", code="E403", line=opener_line)
+            if self.current_token:
+                self.stop_before(self.current_line_number)
         if not found_cases:
-            self.log_syntax_error("Switch must have at least one case (OMG/OMGWTF)")
+            self.log_syntax_error("Switch must have at least one case (OMG/OMGWTF)", code="E406")
 
         self.inside_switch_block = False
 
     def parse_function(self):
         if self.current_token.value != 'HOW IZ I':
-            self.log_syntax_error("Function must start with 'HOW IZ I'")
+            self.log_syntax_error("Function must start with 'HOW IZ I'", code="E601")
             return
 
+        header_line = self.current_line_number
         self.advance_to_next_token() # move past 'HOW IZ I'
 
         if not self.current_token or self.current_token.type != 'Variable Identifier':
-            self.log_syntax_error("Expected function name after 'HOW IZ I'")
-            return
+            self.log_syntax_error("Expected function name after 'HOW IZ I'", code="E602")
+            return self.skip_function(header_line)
 
         function_name = self.current_token.value
         self.advance_to_next_token()
@@ -1002,8 +1355,8 @@ class SyntaxAnalyzer:
                 self.advance_to_next_token()
 
                 if not self.current_token or self.current_token.type != 'Variable Identifier':
-                    self.log_syntax_error("Expected parameter name after 'YR'")
-                    return
+                    self.log_syntax_error("Expected parameter name after 'YR'", code="E603")
+                    return self.skip_function(header_line)
 
                 parameter_name = self.current_token.value 
                 parameters.append(parameter_name) # store parameter name
@@ -1013,101 +1366,183 @@ class SyntaxAnalyzer:
                 if self.current_token and self.current_token.value == 'AN':
                     self.advance_to_next_token()
                 elif self.current_token and self.current_token.value == 'YR':
-                    self.log_syntax_error("Expected 'AN' between multiple parameters")
-                    return
+                    self.log_syntax_error("Expected 'AN' between multiple parameters", code="E604")
+                    return self.skip_function(header_line)
             else:
                 break
 
-        self.advance_to_next_line() 
+        end_line = self.find_function_end(header_line)
+        if end_line is None:
+            self.log_syntax_error("Function must end with 'IF U SAY SO'", code="E605")
+            return self.skip_function(header_line)
 
-        while True: # function body
-            if not self.current_token:
-                if not self.advance_to_next_line():
-                    break
-                continue
-
-            # check for function end
-            if self.current_token.value == 'IF U SAY SO':
-                break
-
-            if self.current_token.value == 'FOUND YR':
-                self.advance_to_next_token()
-
-                if not self.current_token:
-                    self.log_syntax_error("Expected return value after 'FOUND YR'")
-                    return
-
-                if self.current_token.type in ['NUMBR Literal', 'NUMBAR Literal', 'TROOF Literal', 'YARN Literal', 'Variable Identifier']:
-                    self.advance_to_next_token()
-                elif self.current_token.type == 'Arithmetic Operation':
-                    self.parse_operation()
-                else:
-                    self.log_syntax_error("Invalid return value")
-                    return
-
-                self.advance_to_next_line()
-                continue
-
-            if self.current_token.value == 'GTFO':
-                # GTFO is a void return (no value)
-                self.advance_to_next_token()
-                self.advance_to_next_line()
-                continue
-
-            self.parse_line()
-            self.advance_to_next_line()
+        # the body runs when the function is called, not where it is defined
+        self.functions[function_name] = FunctionDefinition(function_name, parameters, header_line, end_line)
+        self.jump_to_line(end_line)
+        self.advance_to_next_token()
 
-        if not self.current_token or self.current_token.value != 'IF U SAY SO':
-            self.log_syntax_error("Function must end with 'IF U SAY SO'")
-        else:
-            self.advance_to_next_token()
+    def skip_function(self, header_line):
+        # a function with a bad header is not defined, parsing resumes after
+        # its IF U SAY SO; without one, the body is read as ordinary statements
+        # so the rest of the program is still checked
+        end_line = self.find_function_end(header_line)
+        if end_line is not None:
+            self.skip_past(end_line)
+
+    def find_function_end(self, header_line):
+        # line of the IF U SAY SO closing the function at header_line
+        for line_number in self.line_numbers[self.line_index[header_line] + 1:]:
+            first_value = self.lines[line_number][0].value
+            if first_value == 'IF U SAY SO':
+                return line_number
+            if first_value == 'HOW IZ I':
+                return None
+        return None
 
     def parse_functioncall(self):
+        # I IZ <name> [YR <arg> [AN YR <arg> ...]] [MKAY], returns the function's value
         if self.current_token.value != 'I IZ':
-            self.log_syntax_error("Function call must start with 'I IZ'")
-            return
+            self.log_syntax_error("Function call must start with 'I IZ'", code="E606")
+            return None
 
         self.advance_to_next_token()
 
         if not self.current_token or self.current_token.type != 'Variable Identifier':
-            self.log_syntax_error("Expected function name after 'I IZ'")
-            return
+            self.log_syntax_error("Expected function name after 'I IZ'", code="E607")
+            return None
 
         function_name = self.current_token.value
         self.advance_to_next_token()
         
-        while self.current_token: # parse arguments
-            if self.current_token.value == 'YR':
+        arguments = []
+        while self.current_token and self.current_token.value == 'YR': # parse arguments
+            self.advance_to_next_token()
+
+            if not self.current_token:
+                self.log_syntax_error("Expected argument after 'YR'", code="E608")
+                return None
+
+            if self.current_token.type not in ARGUMENT_TYPES:
+                self.log_syntax_error("Expected literal, variable, or function call after 'YR'", code="E609")
+                return None
+            arguments.append(self.evaluate_typed_expression())
+
+            if self.current_token and self.current_token.value == 'AN':
                 self.advance_to_next_token()
+            else:
+                break
 
-                if not self.current_token:
-                    self.log_syntax_error("Expected argument after 'YR'")
-                    return
+        if self.current_token and self.current_token.value == 'MKAY':
+            self.advance_to_next_token()
 
-                if self.current_token.type in ['NUMBR Literal', 'NUMBAR Literal', 'TROOF Literal', 'YARN Literal', 'Variable Identifier']:
-                    self.advance_to_next_token()
-                elif self.current_token.type == 'Arithmetic Operation':
-                    self.parse_operation()
-                elif self.current_token.value == 'I IZ':
-                    self.parse_functioncall()
-                else:
-                    self.log_syntax_error("Expected literal, variable, or function call after 'YR'")
-                    return
+        function = self.functions.get(function_name)
+        if function is None:
+            self.log_syntax_error(f"Undefined function '{function_name}'", code="E610")
+            return None
+        if len(arguments) != len(function.parameters):
+            self.log_syntax_error(f"Function '{function_name}' takes {len(function.parameters)} "
+                                  f"argument(s) but {len(arguments)} were given", code="E611")
+            return None
 
-                if self.current_token and self.current_token.value == 'AN':
-                    self.advance_to_next_token()
-                else:
+        return self.call_function(function, arguments)
+
+    def call_function(self, function, arguments):
+        # run a function body in a frame of its own and return its value (also
+        # stored in the caller's IT); arguments are (value, type) pairs
+        if self.frame is not None and self.frame.depth >= MAX_CALL_DEPTH:
+            self.log_syntax_error(f"Call to '{function.name}' exceeds the maximum call depth of {MAX_CALL_DEPTH}",
+                                  code="E615")
+            return None
+
+        caller = self.variables
+        frame = self.frame_pool.acquire(function, self.frame, self.current_line_number, self.current_position)
+        scope = frame.variables
+        # an argument whose evaluation failed is passed as NOOB
+        for name, (value, value_type) in zip(function.parameters, arguments):
+            if value is None:
+                value, value_type = 'NOOB', 'NOOB'
+            scope[name] = {"value": value, "type": value_type}
+        self.frame = frame
+        self.variables = scope
+        self.semantics.symbol_table = scope
+
+        self.function_calls += 1
+        self.call_stack.append(('function', function.name, frame.call_line))
+        self.break_targets.append('function')
+        try:
+            end_index = self.line_index[function.end_line]
+            self.jump_to_line(function.header_line)
+            self.advance_to_next_line()
+            while self.current_line_number is not None and self.line_index[self.current_line_number] < end_index:
+                if self.break_requested:
                     break
+                if self.current_token:
+                    self.parse_line()
+                self.advance_to_next_line()
+
+            # FOUND YR returns a value, GTFO returns NOOB, falling off the end returns IT
+            if self.returning:
+                result, result_type = self.return_value, self.return_type
+            elif self.break_requested:
+                result, result_type = 'NOOB', 'NOOB'
             else:
-                break
+                result, result_type = scope['IT'].get('value', 'NOOB'), scope['IT'].get('type')
+        finally:
+            self.break_targets.pop()
+            self.call_stack.pop()
+            self.break_requested = False
+            self.returning = False
+            self.return_value = None
+            self.return_type = None
+            self.frame = frame.parent
+            self.variables = caller
+            self.semantics.symbol_table = caller
+            self.jump_to_line(frame.call_line, frame.call_position)
+            self.frame_pool.release(frame)
+
+        # a return value whose evaluation failed (e.g. arithmetic on NOOB) is NOOB
+        if result is None:
+            result, result_type = 'NOOB', 'NOOB'
+        self.variables['IT'] = {"value": result, "type": result_type or self.type_of(result)}
+        return result
+
+    def parse_return(self):
+        # FOUND YR <expression> ends the innermost function call with a value
+        self.advance_to_next_token()
+
+        if 'function' not in self.break_targets:
+            self.log_syntax_error("'FOUND YR' outside of a function", code="E612")
+            return
+
+        if not self.current_token:
+            self.log_syntax_error("Expected return value after 'FOUND YR'", code="E613")
+            return
+
+        if self.current_token.type not in ARGUMENT_TYPES:
+            self.log_syntax_error("Invalid return value", code="E614")
+            return
+
+        self.return_value, self.return_type = self.evaluate_typed_expression()
+        self.returning = True
+        self.break_requested = True
 
     def parse_line(self):
-        print(f"\nParsing line {self.current_line_number}: {[t.value for t in self.current_tokens]}")
+        # cooperative cancellation point, one attribute check per statement
+        if self.cancel_token.cancelled:
+            raise ExecutionCancelled(self.cancel_token.reason)
+
+        # after a GTFO, the rest of the loop body is skipped
+        if self.break_requested:
+            return
+
+        line_hits = self.line_hits
+        line_hits[self.current_line_number] = line_hits.get(self.current_line_number, 0) + 1
+        error_count = len(self.diagnostics)
 
         while self.current_token:
             # check for invalid tokens first
             if self.current_token.type == 'INVALID TOKEN':
-                self.log_syntax_error(f"Invalid token '{self.current_token.value}'")
+                self.log_syntax_error(f"Invalid token '{self.current_token.value}'", code="E701")
                 return
 
             if self.current_token.value == 'WAZZUP':
@@ -1136,16 +1571,22 @@ class SyntaxAnalyzer:
                 return
             elif self.current_token.value == 'I IZ':
                 self.parse_functioncall()
+                return
             elif self.current_token.value == 'WTF?':
                 self.parse_switch()
                 return
             elif self.current_token.value == 'GTFO':
                 # GTFO can be a break (in loops/switch) or void return (in functions)
+                if self.break_targets:
+                    self.break_requested = True
                 self.advance_to_next_token()
                 return
+            elif self.current_token.value == 'FOUND YR':
+                self.parse_return()
+                return
             elif self.current_token.value in ['OMG', 'OMGWTF']:
                 if not self.inside_switch_block:
-                    self.log_syntax_error(f"Found '{self.current_token.value}' without preceding 'WTF?'")
+                    self.log_syntax_error(f"Found '{self.current_token.value}' without preceding 'WTF?'", code="E407")
                     return
                 self.advance_to_next_token()
             elif self.current_token.type in ['Arithmetic Operation', 'Boolean Operation', 'Comparison Operation', 'String Concatenation']:
@@ -1174,63 +1615,90 @@ class SyntaxAnalyzer:
                     self.parse_typecasting()
                 elif not next_token:
                     # check if the next line starts with WTF?
-                    line_numbers = sorted(self.lines.keys())
-                    current_index = line_numbers.index(self.current_line_number)
+                    line_numbers = self.line_numbers
+                    current_index = self.line_index[self.current_line_number]
                     next_line_number = line_numbers[current_index + 1] if current_index + 1 < len(line_numbers) else None
                     
                     if next_line_number:
                         next_line_tokens = self.lines[next_line_number]
                         if next_line_tokens and next_line_tokens[0].value == 'WTF?':
                             # standalone expression before switch
-                            if self.current_token.value not in self.variables:
-                                self.log_syntax_error(f"Undefined variable '{self.current_token.value}'")
+                            info = self.lookup(self.current_token.value)
+                            if info is None:
+                                self.log_syntax_error(f"Undefined variable '{self.current_token.value}'", code="E702")
                                 return
-                            self.variables['IT'] = self.variables.get(self.current_token.value, {"value": None, "type": None})
+                            self.variables['IT'] = info
                             self.advance_to_next_token()
                             return
                     
                     # invalid: standalone identifier not before WTF?
-                    self.log_syntax_error("Unknown statement", found=self.current_token.value)
+                    self.log_syntax_error("Unknown statement", found=self.current_token.value, code="E703")
                     return
                 else:
                     # unknown statement starting with Variable Identifier
-                    self.log_syntax_error("Unknown statement", found=self.current_token.value)
+                    self.log_syntax_error("Unknown statement", found=self.current_token.value, code="E703")
                     return
             else:
                 # general fallback for unrecognized tokens
-                self.log_syntax_error("Unexpected or invalid statement", found=self.current_token.value)
+                self.log_syntax_error("Unexpected or invalid statement", found=self.current_token.value, code="E704")
+                return
+
+            # panic mode: the rest of a line with an error is not parsed, it
+            # would only report errors that follow from the first one
+            if len(self.diagnostics) != error_count:
                 return
 
             self.advance_to_next_token()
 
-    def parse_program(self):
+    def parse_program(self, start_line=None, resumed_output=""):
+        # each nested call takes several Python frames, deep recursion needs
+        # room while the program runs
+        with RECURSION_ROOM:
+            return self._parse_program(start_line, resumed_output)
+
+    def _parse_program(self, start_line, resumed_output):
         self.emit("\n" + "="*60 + "\n")
         self.emit("SYNTAX ANALYSIS\n")
         self.emit("="*60 + "\n")
 
-        if self.current_token and self.current_token.value == "HAI":
-            self.emit("\nProgram starts with 'HAI'\n")
-            self.advance_to_next_line()
-
-            while self.current_line_number is not None and self.current_token:
-                if self.current_token.value == "KTHXBYE":
-                    break
-
-                self.parse_line()
-
-                if self.error_messages and "Function must end with 'IF U SAY SO'" in self.error_messages[-1]:
-                    break
+        # start_line resumes a run whose state was restored from a checkpoint,
+        # resumed_output is what the skipped statements printed
+        if start_line is not None:
+            self.emit(f"\nResuming from checkpoint at line {start_line}\n")
+            self.semantics.write_output(resumed_output)
+            self.jump_to_line(start_line)
 
+        if start_line is not None or (self.current_token and self.current_token.value == "HAI"):
+            if start_line is None:
+                self.emit("\nProgram starts with 'HAI'\n")
                 self.advance_to_next_line()
 
-            if self.current_token and self.current_token.value == "KTHXBYE":
+            checkpoints = self.checkpoints
+            try:
+                while self.current_line_number is not None and self.current_token:
+                    if self.current_token.value == "KTHXBYE":
+                        break
+
+                    if checkpoints is not None:
+                        checkpoints.record(self)
+                    self.parse_line()
+                    self.advance_to_next_line()
+            except ExecutionCancelled:
+                # keep the partial output and symbol table, just stop here
+                self.cancelled = True
+                self.emit(f"\nExecution stopped ({self.cancel_token.reason or 'cancelled'}) at line {self.current_line_number}\n")
+
+            if self.cancelled:
+                pass
+            elif self.current_token and self.current_token.value == "KTHXBYE":
                 self.emit("\nProgram ends with 'KTHXBYE'\n")
             else:
-                if not any("Program must end with 'KTHXBYE'" in e for e in self.error_messages):
-                    self.log_syntax_error("Program must end with 'KTHXBYE'")
+                if not any(diagnostic.code == "E705" for diagnostic in self.diagnostics):
+                    self.log_syntax_error("Program must end with 'KTHXBYE'", code="E705")
         else:
-            self.log_syntax_error("Program must start with 'HAI'")
+            self.log_syntax_error("Program must start with 'HAI'", code="E706")
 
+        self.output_sink.flush()
         self.emit("\n" + "="*60 + "\n")
         self.emit("SYNTAX ANALYSIS RESULTS\n")
         self.emit("="*60 + "\n")
@@ -1242,13 +1710,13 @@ class SyntaxAnalyzer:
         else:
             self.emit("\nNo syntax errors found!\n")
 
-        return self.variables
+        return self.globals
 
 
 
-def analyze_syntax(tokens):
+def analyze_syntax(tokens, input_provider=None):
     # analyze syntax from tokenized LOLCODE
-    analyzer = SyntaxAnalyzer(tokens)
+    analyzer = SyntaxAnalyzer(tokens, input_provider=input_provider)
     return analyzer.parse_program()
 
 
@@ -0,0 +1,159 @@
+'''
+CMSC 124: LOLCODE Statement Tracer
+Records executed statements into a fixed-size ring buffer
+'''
+
+import json
+import time
+
+# events kept by default, older ones are overwritten
+DEFAULT_TRACE_CAPACITY = 4096
+
+# statement kind by the first token of the line
+STATEMENT_KINDS = {
+    'I HAS A': 'declaration',
+    'VISIBLE': 'print',
+    'GIMMEH': 'input',
+    'O RLY?': 'conditional',
+    'WTF?': 'switch',
+    'IM IN YR': 'loop',
+    'HOW IZ I': 'function',
+    'I IZ': 'call',
+    'FOUND YR': 'return',
+    'GTFO': 'break',
+    'WAZZUP': 'block',
+    'BUHBYE': 'block',
+}
+EXPRESSION_TYPES = ('Arithmetic Operation', 'Boolean Operation', 'Comparison Operation', 'String Concatenation')
+
+
+def statement_kind(tokens):
+    if not tokens:
+        return 'empty'
+    first = tokens[0]
+    kind = STATEMENT_KINDS.get(first.value)
+    if kind is not None:
+        return kind
+    if first.type in EXPRESSION_TYPES:
+        return 'expression'
+    if first.type == 'Variable Identifier':
+        if len(tokens) > 1 and tokens[1].value == 'R':
+            return 'assignment'
+        if len(tokens) > 1 and tokens[1].value == 'IS NOW A':
+            return 'typecast'
+        return 'expression'
+    return 'other'
+
+
+# one executed statement
+class TraceEvent:
+    __slots__ = ("line", "kind", "it", "start_ns", "elapsed_ns", "depth")
+
+    def __init__(self, line, kind, it, start_ns, elapsed_ns, depth):
+        self.line = line
+        self.kind = kind
+        self.it = it
+        self.start_ns = start_ns
+        self.elapsed_ns = elapsed_ns
+        self.depth = depth
+
+    def to_dict(self):
+        return {
+            "line": self.line,
+            "kind": self.kind,
+            "it": self.it if isinstance(self.it, (int, float)) else str(self.it),
+            "start_ns": self.start_ns,
+            "elapsed_ns": self.elapsed_ns,
+            "depth": self.depth,
+        }
+
+    def __str__(self):
+        indent = "  " * self.depth
+        return f"{indent}line {self.line:<5} {self.kind:<12} IT={self.it!s:<16} {self.elapsed_ns / 1000:10.1f} us"
+
+
+# statement tracer, installed by wrapping an analyzer's parse_line so an
+# untraced run pays nothing for it
+class StatementTracer:
+    def __init__(self, capacity=DEFAULT_TRACE_CAPACITY):
+        self.capacity = capacity
+        self._events = [None] * capacity
+        self._next = 0
+        self.recorded = 0
+        self.origin_ns = None
+        self._kinds = {}
+        self._inner = None
+
+    def install(self, analyzer):
+        inner = self._inner = analyzer.parse_line
+        clock = time.perf_counter_ns
+        events = self._events
+        capacity = self.capacity
+        kinds = self._kinds
+        depth = [0]
+        if self.origin_ns is None:
+            self.origin_ns = clock()
+        origin = self.origin_ns
+
+        def traced_parse_line():
+            tokens = analyzer.current_tokens
+            line = analyzer.current_line_number
+            start = clock()
+            depth[0] += 1
+            try:
+                inner()
+            finally:
+                depth[0] -= 1
+                elapsed = clock() - start
+                # the kind only depends on the line, so it is worked out once
+                kind = kinds.get(line)
+                if kind is None:
+                    kind = kinds[line] = statement_kind(tokens)
+                it = analyzer.variables.get('IT', {}).get('value')
+                events[self._next] = TraceEvent(line, kind, it, start - origin, elapsed, depth[0])
+                self._next = (self._next + 1) % capacity
+                self.recorded += 1
+
+        analyzer.parse_line = traced_parse_line
+        return self
+
+    def uninstall(self, analyzer):
+        # put back whatever parse_line was before install
+        analyzer.parse_line = self._inner
+
+    @property
+    def dropped(self):
+        return max(0, self.recorded - self.capacity)
+
+    def events(self):
+        # events oldest first (in the order statements finished)
+        if self.recorded <= self.capacity:
+            return self._events[:self.recorded]
+        return self._events[self._next:] + self._events[:self._next]
+
+    def clear(self):
+        # in place, an installed wrapper keeps a reference to the buffer
+        self._events[:] = [None] * self.capacity
+        self._next = 0
+        self.recorded = 0
+
+    def to_dict(self):
+        return {
+            "capacity": self.capacity,
+            "recorded": self.recorded,
+            "dropped": self.dropped,
+            "events": [event.to_dict() for event in self.events()],
+        }
+
+    def export_json(self, path):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f, indent=2)
+
+    def format(self, limit=None):
+        # text listing for a console, the last `limit` events when given
+        events = self.events()
+        if limit is not None:
+            events = events[-limit:]
+        lines = [f"Trace: {self.recorded} statements ({self.dropped} dropped, showing {len(events)})"]
+        lines.extend(str(event) for event in events)
+        return "\n".join(lines) + "\n"
@@ -0,0 +1,523 @@
+'''
+CMSC 124: LOLCODE Type Inference
+Flow-sensitive pass that proves which variables hold NUMBR, NUMBAR, TROOF
+or YARN values at each line, and builds specialized implementations of the
+operations whose operands all have proven types
+'''
+
+import operator
+
+NUMBR = 'NUMBR'
+NUMBAR = 'NUMBAR'
+TROOF = 'TROOF'
+YARN = 'YARN'
+# a NUMBR or a NUMBAR, which one depends on the values
+NUMBER = 'NUMBER'
+
+NUMERIC_KINDS = (NUMBR, NUMBAR, NUMBER)
+
+OPERATION_TYPES = ('Arithmetic Operation', 'Boolean Operation', 'Comparison Operation')
+
+ARITHMETIC = {
+    'SUM OF': operator.add,
+    'DIFF OF': operator.sub,
+    'PRODUKT OF': operator.mul,
+    'QUOSHUNT OF': operator.truediv,
+    'MOD OF': operator.mod,
+    'BIGGR OF': max,
+    'SMALLR OF': min,
+}
+COMPARISON = {'BOTH SAEM': operator.eq, 'DIFFRINT': operator.ne}
+BOOLEAN = ('BOTH OF', 'EITHER OF', 'WON OF')
+
+# block openers and the keyword that closes them
+BLOCKS = {'O RLY?': 'OIC', 'WTF?': 'OIC', 'IM IN YR': 'IM OUTTA YR', 'HOW IZ I': 'IF U SAY SO'}
+
+# lines that start the next branch of a conditional or switch
+BRANCH_KEYWORDS = ('YA RLY', 'MEBBE', 'NO WAI', 'OMG', 'OMGWTF')
+
+# rounds of a loop body before the types at its head must have settled
+MAX_LOOP_ROUNDS = 8
+
+TROOF_NUMBERS = {'WIN': 1, 'FAIL': 0}
+TROOF_TRUTHS = {'WIN': True, 'FAIL': False}
+
+
+# an operation whose operand types are proven: `evaluate(variables)` returns
+# what the generic evaluator would, `end` is the token position after it.
+# Values that turn out to be of another type (or a division by zero) raise
+# KeyError, TypeError, ValueError or ZeroDivisionError, and the caller falls
+# back to the generic path
+class TypedOperation:
+    __slots__ = ("evaluate", "end", "result_type")
+
+    def __init__(self, evaluate, end, result_type=None):
+        self.evaluate = evaluate
+        self.end = end
+        # TROOF, or None for arithmetic (NUMBR or NUMBAR by the result)
+        self.result_type = result_type
+
+
+# an expression while it is analyzed: its type, where it ends, and how to get
+# its value as a number (_to_numeric) or a truth value (_to_bool), when known
+class _Node:
+    __slots__ = ("kind", "end", "numeric", "truth", "constant")
+
+    def __init__(self, kind, end, numeric=None, truth=None, constant=None):
+        self.kind = kind
+        self.end = end
+        self.numeric = numeric
+        self.truth = truth
+        # (number,) when the numeric value is known ahead of time
+        self.constant = constant
+
+
+def join(first, second):
+    # the type of a value that is either of the two
+    if first == second:
+        return first
+    if first in NUMERIC_KINDS and second in NUMERIC_KINDS:
+        return NUMBER
+    return None
+
+
+def join_types(first, second):
+    # the types of variables on either of two paths
+    joined = {}
+    for name, kind in first.items():
+        kind = join(kind, second.get(name))
+        if kind is not None:
+            joined[name] = kind
+    return joined
+
+
+class TypeInference:
+    def __init__(self, lines, line_numbers):
+        self.lines = lines
+        self.line_numbers = line_numbers
+        self.keywords = [lines[line_number][0].value for line_number in line_numbers]
+        self.closers = self._match_blocks()
+        # a call can change any of these (variables are global)
+        self.function_writes = self._collect_function_writes()
+        # (line, token position) -> TypedOperation
+        self.operations = {}
+        # off while a loop body is analyzed with types that have not settled
+        self.recording = True
+        # per enclosing loop or switch, the types at each GTFO / FOUND YR
+        self.exits = []
+
+    def infer(self):
+        self._block(0, len(self.line_numbers), {})
+        return self.operations
+
+    def _match_blocks(self):
+        # index of each opener line -> index of its closer line
+        closers = {}
+        stack = []
+        for index, keyword in enumerate(self.keywords):
+            if keyword in BLOCKS:
+                stack.append(index)
+            elif stack and BLOCKS[self.keywords[stack[-1]]] == keyword:
+                closers[stack.pop()] = index
+        return closers
+
+    def _collect_function_writes(self):
+        names = set()
+        depth = 0
+        for line_number in self.line_numbers:
+            tokens = self.lines[line_number]
+            if tokens[0].value == 'HOW IZ I':
+                depth += 1
+                names.update(tokens[index + 1].value for index in range(2, len(tokens) - 1)
+                             if tokens[index].value == 'YR')
+            elif tokens[0].value == 'IF U SAY SO' and depth:
+                depth -= 1
+            elif depth:
+                names.update(_written_names(tokens))
+        return names
+
+    # -- statements -----------------------------------------------------
+
+    def _block(self, start, end, types):
+        # types after the lines start..end (indexes into line_numbers)
+        index = start
+        while index < end:
+            keyword = self.keywords[index]
+            closer = self.closers.get(index)
+            if closer is not None and closer < end:
+                if keyword == 'HOW IZ I':
+                    # a body runs when called, with whatever the globals hold then
+                    self._block(index + 1, closer, {})
+                elif keyword == 'IM IN YR':
+                    types = self._loop(index, closer, types)
+                else:
+                    types = self._branches(index, closer, types)
+                index = closer + 1
+                continue
+
+            types = self._statement(index, types)
+            if keyword in ('GTFO', 'FOUND YR') and self.exits:
+                self.exits[-1].append(types)
+            index += 1
+        return types
+
+    def _statement(self, index, types):
+        line_number = self.line_numbers[index]
+        tokens = self.lines[line_number]
+        if any(token.value == 'I IZ' for token in tokens):
+            types = {name: kind for name, kind in types.items() if name not in self.function_writes}
+        self._record_line(line_number, tokens, types)
+
+        keyword = tokens[0].value
+        if keyword == 'I HAS A' and len(tokens) > 1:
+            kind = self._value_kind(line_number, tokens, 3, types) if len(tokens) > 3 and tokens[2].value == 'ITZ' \
+                else None
+            return _assign(types, tokens[1].value, kind)
+        if tokens[0].type == 'Variable Identifier' and len(tokens) > 2 and tokens[1].type == 'Variable Assignment':
+            return _assign(types, keyword, self._value_kind(line_number, tokens, 2, types))
+        if keyword == 'GIMMEH' or 'I HAS A' in (token.value for token in tokens[1:]):
+            # input is a YARN, but any text; anything else declared mid-line is not followed
+            for name in _written_names(tokens):
+                types = _assign(types, name, None)
+        return types
+
+    def _loop(self, header, closer, types):
+        tokens = self.lines[self.line_numbers[header]]
+        variable = tokens[4].value if len(tokens) > 4 and tokens[3].value == 'YR' else None
+        operation = tokens[2].value if len(tokens) > 2 else None
+
+        # the types at the head are those before the loop joined with those
+        # after each run of the body, found by running it until they settle
+        recording = self.recording
+        self.recording = False
+        head = types
+        for _ in range(MAX_LOOP_ROUNDS):
+            after = self._loop_body(header, closer, head, variable, operation)[0]
+            settled = join_types(types, after)
+            if settled == head:
+                break
+            head = settled
+        else:
+            head = {}
+        self.recording = recording
+
+        after, exits = self._loop_body(header, closer, head, variable, operation)
+        for exit_types in exits:
+            head = join_types(head, exit_types)
+        return head
+
+    def _loop_body(self, header, closer, head, variable, operation):
+        # the condition is read with the head types, then the body and the step run
+        self._record_line(self.line_numbers[header], self.lines[self.line_numbers[header]], head)
+        self.exits.append([])
+        try:
+            types = self._block(header + 1, closer, head)
+        finally:
+            exits = self.exits.pop()
+        if variable is not None and variable != 'IT':
+            current = types.get(variable)
+            if current in (NUMBR, TROOF):
+                stepped = NUMBR
+            elif current == NUMBAR:
+                stepped = NUMBAR
+            else:
+                stepped = NUMBER
+            types = _assign(types, variable, stepped if operation in ('UPPIN', 'NERFIN') else None)
+        return types, exits
+
+    def _branches(self, opener, closer, types):
+        # O RLY? and WTF?: each branch may run or not, and may follow another
+        # (switch cases fall through), so every branch starts from the types
+        # before the block joined with those after the previous branch
+        entry = types
+        after = entry
+        starts = self._branch_starts(opener, closer)
+        switch = self.keywords[opener] == 'WTF?'
+        if switch:
+            self.exits.append([])
+        try:
+            previous = entry
+            bounds = starts + [closer]
+            for position, start in enumerate(bounds[:-1]):
+                # a MEBBE line holds the branch's own condition
+                branch = self._statement(start, join_types(entry, previous))
+                previous = self._block(start + 1, bounds[position + 1], branch)
+                after = join_types(after, previous)
+        finally:
+            exits = self.exits.pop() if switch else []
+        for exit_types in exits:
+            after = join_types(after, exit_types)
+        return after
+
+    def _branch_starts(self, opener, closer):
+        # lines directly inside the block that start a branch (nested blocks skipped)
+        starts = []
+        index = opener + 1
+        while index < closer:
+            nested = self.closers.get(index)
+            if nested is not None and nested < closer:
+                index = nested + 1
+                continue
+            if self.keywords[index] in BRANCH_KEYWORDS:
+                starts.append(index)
+            index += 1
+        return starts
+
+    def _value_kind(self, line_number, tokens, position, types):
+        # type of the value a declaration or assignment stores
+        token = tokens[position]
+        if token.type == 'String Concatenation' or token.type == 'YARN Literal':
+            return YARN
+        if token.value == 'MAEK':
+            return _cast_kind(tokens, position, types)
+        if token.value == 'I IZ':
+            return None
+        node = self._expression(line_number, tokens, position, types)
+        return node.kind if node is not None else None
+
+    # -- expressions ----------------------------------------------------
+
+    def _record_line(self, line_number, tokens, types):
+        # build the TypedOperation of every operation on the line
+        for position, token in enumerate(tokens):
+            if token.type in OPERATION_TYPES and (line_number, position) not in self.operations:
+                self._expression(line_number, tokens, position, types)
+
+    def _expression(self, line_number, tokens, position, types):
+        # _Node of the expression at `position`, read the way evaluate_expression
+        # reads it; None when its end or type cannot be told ahead of time
+        if position >= len(tokens):
+            return None
+        token = tokens[position]
+        kind = token.type
+        if kind == 'NUMBR Literal':
+            return _constant(NUMBR, position + 1, int(token.value))
+        if kind == 'NUMBAR Literal':
+            return _constant(NUMBAR, position + 1, float(token.value))
+        if kind == 'TROOF Literal':
+            node = _constant(TROOF, position + 1, TROOF_NUMBERS[token.value])
+            truth = TROOF_TRUTHS[token.value]
+            node.truth = lambda variables: truth
+            return node
+        if kind == 'YARN Literal':
+            return _Node(YARN, position + 1)
+        if kind == 'Variable Identifier':
+            # IT changes under an expression (every operation stores into it)
+            return _variable(token.value, None if token.value == 'IT' else types.get(token.value), position + 1)
+        if kind not in OPERATION_TYPES:
+            return None
+
+        operation = token.value
+        if operation in ('ALL OF', 'ANY OF'):
+            return self._variadic(line_number, tokens, position, types)
+        if operation == 'NOT':
+            operand = self._expression(line_number, tokens, position + 1, types)
+            if operand is None:
+                return None
+            node = _Node(TROOF, operand.end)
+            if operand.truth is not None:
+                truth = operand.truth
+                node.truth = test = lambda variables: not truth(variables)
+                self._typed(node, line_number, position, test)
+            return node
+
+        first = self._expression(line_number, tokens, position + 1, types)
+        if first is None or first.end >= len(tokens) or tokens[first.end].value != 'AN':
+            return None
+        second = self._expression(line_number, tokens, first.end + 1, types)
+        if second is None:
+            return None
+
+        if operation in ARITHMETIC:
+            return self._arithmetic(line_number, position, operation, first, second)
+        node = _Node(TROOF, second.end)
+        if operation in COMPARISON:
+            if first.numeric is not None and second.numeric is not None:
+                test = _binary(COMPARISON[operation], first, second)
+                node.truth = test
+                self._typed(node, line_number, position, test)
+        elif operation in BOOLEAN:
+            if first.truth is not None and second.truth is not None:
+                test = _boolean(operation, first.truth, second.truth)
+                node.truth = test
+                self._typed(node, line_number, position, test)
+        else:
+            return None
+        return node
+
+    def _arithmetic(self, line_number, position, operation, first, second):
+        if first.numeric is None or second.numeric is None:
+            # the generic path gives NOOB for operands that are not numbers
+            return _Node(None, second.end)
+
+        # int with int stays a NUMBR, a NUMBAR operand makes a NUMBAR (QUOSHUNT
+        # always does), BIGGR and SMALLR give back whichever operand they pick
+        kinds = (first.kind, second.kind)
+        if operation == 'QUOSHUNT OF':
+            kind = NUMBAR
+        elif _integral(first.kind) and _integral(second.kind):
+            kind = NUMBR
+        elif operation in ('BIGGR OF', 'SMALLR OF'):
+            kind = NUMBAR if kinds == (NUMBAR, NUMBAR) else NUMBER
+        else:
+            kind = NUMBAR if NUMBAR in kinds else NUMBER
+
+        function = ARITHMETIC[operation]
+        if first.constant is not None and second.constant is not None:
+            try:
+                value = function(first.constant[0], second.constant[0])
+            except ZeroDivisionError:
+                # left to the generic path, which gives NOOB
+                return _Node(None, second.end)
+            node = _constant(kind, second.end, value)
+        else:
+            node = _Node(kind, second.end, _binary(function, first, second))
+        numeric = node.numeric
+        node.truth = lambda variables: numeric(variables) != 0
+        self._add(line_number, position, TypedOperation(numeric, node.end))
+        return node
+
+    def _variadic(self, line_number, tokens, position, types):
+        # ALL OF / ANY OF ... MKAY always give a TROOF, they are left generic
+        position += 1
+        while position < len(tokens) and tokens[position].value != 'MKAY':
+            if tokens[position].value == 'AN':
+                position += 1
+                continue
+            operand = self._expression(line_number, tokens, position, types)
+            if operand is None:
+                return None
+            position = operand.end
+        if position < len(tokens):
+            position += 1
+        return _Node(TROOF, position)
+
+    def _typed(self, node, line_number, position, test):
+        # a TROOF result; in arithmetic and comparisons it counts as 1 or 0
+        node.numeric = lambda variables: 1 if test(variables) else 0
+        self._add(line_number, position,
+                  TypedOperation(lambda variables: 'WIN' if test(variables) else 'FAIL', node.end, TROOF))
+
+    def _add(self, line_number, position, operation):
+        if self.recording:
+            self.operations[(line_number, position)] = operation
+
+
+def _assign(types, name, kind):
+    # the types after `name` is set to a value of type `kind` (None: unknown)
+    if name == 'IT' or (kind is None and name not in types):
+        return types
+    types = dict(types)
+    if kind is None:
+        del types[name]
+    else:
+        types[name] = kind
+    return types
+
+
+def _written_names(tokens):
+    # variables a line can set: declared, assigned, read into or looped over
+    names = []
+    for index, token in enumerate(tokens[:-1]):
+        following = tokens[index + 1]
+        if token.value in ('I HAS A', 'GIMMEH') and following.type == 'Variable Identifier':
+            names.append(following.value)
+        elif token.type == 'Variable Identifier' and following.type == 'Variable Assignment':
+            names.append(token.value)
+    if tokens[0].value == 'IM IN YR' and len(tokens) > 4 and tokens[3].value == 'YR':
+        names.append(tokens[4].value)
+    return names
+
+
+def _cast_kind(tokens, position, types):
+    # MAEK A <value> <type>: TROOF and YARN casts always succeed, numeric
+    # ones only from a number or a TROOF (anything else may give NOOB)
+    if position + 3 >= len(tokens) or tokens[position + 3].type != 'Type Literal':
+        return None
+    target = tokens[position + 3].value
+    if target in (TROOF, YARN):
+        return target
+    source = tokens[position + 2]
+    if source.type == 'Variable Identifier':
+        source_kind = types.get(source.value) if source.value != 'IT' else None
+    else:
+        source_kind = {'NUMBR Literal': NUMBR, 'NUMBAR Literal': NUMBAR, 'TROOF Literal': TROOF}.get(source.type)
+    if target in (NUMBR, NUMBAR) and source_kind in NUMERIC_KINDS + (TROOF,):
+        return target
+    return None
+
+
+def _integral(kind):
+    # TROOFs count as 1 and 0 in arithmetic
+    return kind in (NUMBR, TROOF)
+
+
+def _constant(kind, end, value):
+    return _Node(kind, end, lambda variables: value, constant=(value,))
+
+
+def _variable(name, kind, end):
+    # reads check the stored value, so a wrong guess falls back instead of
+    # giving a different answer than _to_numeric / _to_bool would
+    if kind == NUMBR:
+        def numeric(variables):
+            value = variables[name]['value']
+            if value.__class__ is int:
+                return value
+            if value.__class__ is str:
+                return int(value)
+            raise TypeError(name)
+    elif kind == NUMBAR:
+        def numeric(variables):
+            value = variables[name]['value']
+            if value.__class__ is float:
+                return value
+            if value.__class__ is str and '.' in value:
+                return float(value)
+            raise TypeError(name)
+    elif kind == NUMBER:
+        def numeric(variables):
+            value = variables[name]['value']
+            if value.__class__ is int or value.__class__ is float:
+                return value
+            if value.__class__ is str:
+                return float(value) if '.' in value else int(value)
+            raise TypeError(name)
+    elif kind == TROOF:
+        def numeric(variables):
+            return TROOF_NUMBERS[variables[name]['value']]
+
+        def truth(variables):
+            return TROOF_TRUTHS[variables[name]['value']]
+        return _Node(kind, end, numeric, truth)
+    else:
+        return _Node(kind, end)
+    return _Node(kind, end, numeric)
+
+
+def _binary(function, first, second):
+    # function(first, second) over the operands' numeric values, with
+    # constants bound ahead of time
+    left = first.numeric
+    right = second.numeric
+    if second.constant is not None:
+        constant = second.constant[0]
+        return lambda variables: function(left(variables), constant)
+    if first.constant is not None:
+        constant = first.constant[0]
+        return lambda variables: function(constant, right(variables))
+    return lambda variables: function(left(variables), right(variables))
+
+
+def _boolean(operation, left, right):
+    # both sides are always read, as in the generic path
+    if operation == 'BOTH OF':
+        return lambda variables: left(variables) & right(variables)
+    if operation == 'EITHER OF':
+        return lambda variables: left(variables) | right(variables)
+    return lambda variables: left(variables) != right(variables)
+
+
+def infer_types(lines, line_numbers):
+    # (line, token position) -> TypedOperation for a program's lines
+    return TypeInference(lines, line_numbers).infer()
@@ -0,0 +1,164 @@
+'''
+CMSC 124: LOLCODE Virtual Table
+A table widget that only draws the rows currently in view
+'''
+
+import bisect
+import tkinter as tk
+import tkinter.font as tkfont
+
+import customtkinter as ctk
+
+ALL_CATEGORIES = "All"
+
+
+# scrollable table over row accessor functions, drawing only the visible rows
+class VirtualTable(ctk.CTkFrame):
+    def __init__(self, master, columns, font=("Courier New", 11), row_padding=4,
+                 background="#08121a", text_color="#D6E6FF", show_jump=False, **kwargs):
+        super().__init__(master, **kwargs)
+        # columns is a list of (title, width in characters)
+        self.columns = columns
+        self.text_color = text_color
+        self.font = tkfont.Font(family=font[0], size=font[1])
+        self.row_height = self.font.metrics("linespace") + row_padding
+        char_width = self.font.measure("0")
+        self.column_x = []
+        x = 4
+        for _, width in columns:
+            self.column_x.append(x)
+            x += width * char_width
+
+        # data accessors, see set_source
+        self.row_count = 0
+        self.get_row = None
+        self.get_category = None
+        self.get_line = None
+        self.view = None  # filtered row indexes, None means every row
+        self.first_row = 0
+        self.items = []
+
+        # filter bar: category menu and optional jump-to-line entry
+        bar = ctk.CTkFrame(self, fg_color="transparent")
+        bar.pack(fill="x", pady=(0, 4))
+        self.category_menu = ctk.CTkOptionMenu(bar, values=[ALL_CATEGORIES], width=160, height=24,
+                                               command=lambda _: self.apply_filter())
+        self.category_menu.pack(side="left")
+        if show_jump:
+            self.jump_entry = ctk.CTkEntry(bar, width=70, height=24, placeholder_text="line")
+            self.jump_entry.pack(side="right")
+            self.jump_entry.bind("<Return>", lambda e: self.jump_to_line(self.jump_entry.get()))
+        self.count_label = ctk.CTkLabel(bar, text="", text_color=text_color, font=("Arial", 10))
+        self.count_label.pack(side="left", padx=8)
+
+        body = ctk.CTkFrame(self, fg_color="transparent")
+        body.pack(fill="both", expand=True)
+        self.canvas = tk.Canvas(body, background=background, highlightthickness=0, borderwidth=0)
+        self.scrollbar = ctk.CTkScrollbar(body, command=self._on_scrollbar)
+        self.scrollbar.pack(side="right", fill="y")
+        self.canvas.pack(side="left", fill="both", expand=True)
+
+        self.canvas.bind("<Configure>", lambda e: self._rebuild_items())
+        self.canvas.bind("<MouseWheel>", self._on_mousewheel)
+        self.canvas.bind("<Button-4>", lambda e: self.scroll_by(-3))
+        self.canvas.bind("<Button-5>", lambda e: self.scroll_by(3))
+
+    # data source: row count plus accessors that work on the underlying arrays
+    def set_source(self, row_count, get_row, get_category=None, get_line=None, categories=None):
+        self.row_count = row_count
+        self.get_row = get_row
+        self.get_category = get_category
+        self.get_line = get_line
+        self.first_row = 0
+
+        values = [ALL_CATEGORIES] + sorted(categories or [])
+        self.category_menu.configure(values=values)
+        if self.category_menu.get() not in values:
+            self.category_menu.set(ALL_CATEGORIES)
+        self.apply_filter()
+
+    def clear(self):
+        self.set_source(0, None)
+
+    def visible_count(self):
+        return len(self.view) if self.view is not None else self.row_count
+
+    def _row_index(self, position):
+        # map a position in the (filtered) view to an underlying row index
+        return self.view[position] if self.view is not None else position
+
+    def apply_filter(self):
+        # one pass over the rows per filter change, scrolling stays O(visible rows)
+        category = self.category_menu.get()
+        if category == ALL_CATEGORIES or self.get_category is None:
+            self.view = None
+        else:
+            get_category = self.get_category
+            self.view = [index for index in range(self.row_count) if get_category(index) == category]
+        self.first_row = 0
+        self.count_label.configure(text=f"{self.visible_count()} rows")
+        self.redraw()
+
+    def jump_to_line(self, text):
+        # scroll to the first row at or after a source line (rows are in line order)
+        if self.get_line is None:
+            return
+        try:
+            line_number = int(text)
+        except ValueError:
+            return
+        get_line = self.get_line
+        position = bisect.bisect_left(range(self.visible_count()), line_number,
+                                      key=lambda p: get_line(self._row_index(p)))
+        self.scroll_to(position)
+
+    def _page_size(self):
+        return max(1, self.canvas.winfo_height() // self.row_height)
+
+    def _rebuild_items(self):
+        # keep one text item per visible cell, resized only when the canvas is
+        rows_needed = self._page_size() + 1
+        if len(self.items) != rows_needed:
+            self.canvas.delete("all")
+            self.items = []
+            for row in range(rows_needed):
+                y = row * self.row_height + 2
+                self.items.append([self.canvas.create_text(x, y, anchor="nw", font=self.font,
+                                                           fill=self.text_color, text="")
+                                   for x in self.column_x])
+        self.redraw()
+
+    def redraw(self):
+        # only the rows in view are formatted and drawn
+        total = self.visible_count()
+        for offset, cells in enumerate(self.items):
+            position = self.first_row + offset
+            values = self.get_row(self._row_index(position)) if position < total and self.get_row else ()
+            for column, item in enumerate(cells):
+                self.canvas.itemconfigure(item, text=str(values[column]) if column < len(values) else "")
+
+        if total:
+            first = self.first_row / total
+            last = min(1.0, (self.first_row + self._page_size()) / total)
+            self.scrollbar.set(first, last)
+        else:
+            self.scrollbar.set(0.0, 1.0)
+
+    def scroll_to(self, position):
+        max_first = max(0, self.visible_count() - self._page_size())
+        self.first_row = min(max(0, position), max_first)
+        self.redraw()
+
+    def scroll_by(self, rows):
+        self.scroll_to(self.first_row + rows)
+
+    def _on_mousewheel(self, event):
+        self.scroll_by(-3 if event.delta > 0 else 3)
+
+    def _on_scrollbar(self, action, *args):
+        # standard tk scrollbar protocol: moveto fraction / scroll n units|pages
+        if action == "moveto":
+            self.scroll_to(int(float(args[0]) * self.visible_count()))
+        elif action == "scroll":
+            amount = int(args[0])
+            self.scroll_by(amount * self._page_size() if args[1] == "pages" else amount)